@@ -1,15 +1,23 @@
+import hmac
 import os
-import sys
 import json
-from fastapi import FastAPI, HTTPException, Header, BackgroundTasks
+import threading
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Header, BackgroundTasks, Depends
 from pydantic import BaseModel
 from typing import List, Optional
-import requests
 from dotenv import load_dotenv
 
 load_dotenv()
 
-app = FastAPI(title="Blog Agent API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Release pooled embeddings / LLM / Qdrant / Redis connections on shutdown
+    from agents.rag.clients import aclose_clients
+    await aclose_clients()
+
+app = FastAPI(title="Blog Agent API", lifespan=lifespan)
 
 class GenerateRequest(BaseModel):
     topic: str
@@ -17,12 +25,40 @@ class GenerateRequest(BaseModel):
 class IndexRequest(BaseModel):
     blog_id: str
     text: str
+    notify: bool = False  # POST the finished job to RAG_INDEX_CALLBACK_URL (HMAC-signed)
+    wait: bool = False  # index inline and return the counts, like the old /index
+
+class BulkIndexRequest(BaseModel):
+    source: str = "mongo"  # "mongo" (MONGO_URI) or "jsonl"
+    path: Optional[str] = None  # JSONL file under RAG_BULK_IMPORT_DIR (absolute or relative to it)
+    mongo_db: str = "test"
+    mongo_collection: str = "blogs"
+    resume: bool = True  # continue after the last checkpoint of the same source
+    embed_batch: Optional[int] = None
+    upload_batch: Optional[int] = None
+    parallel: Optional[int] = None
 
 class QueryRequest(BaseModel):
     blog_id: str
     rag_data: Optional[List[dict]] = None  # Optional — Qdrant is now primary
     question: str
 
+class BatchQueryItem(BaseModel):
+    blog_id: str
+    question: str
+
+class BatchQueryRequest(BaseModel):
+    items: List[BatchQueryItem]
+    concurrency: Optional[int] = None
+
+def require_agent_key(x_agent_key: Optional[str] = Header(None)):
+    """Admin endpoints share the agent secret used by the Node backend; without one they stay closed."""
+    expected = os.getenv("AGENT_SECRET_KEY")
+    if not expected:
+        raise HTTPException(status_code=503, detail="AGENT_SECRET_KEY is not configured")
+    if not x_agent_key or not hmac.compare_digest(x_agent_key.encode(), expected.encode()):
+        raise HTTPException(status_code=401, detail="Unauthorized Agent Access")
+
 # Re-importing or defining logic
 def trigger_generation(topic: str):
     from agent_push import generate_and_push
@@ -39,27 +75,167 @@ def generate_blog(request: GenerateRequest, background_tasks: BackgroundTasks):
 
 @app.post("/index")
 def index_blog_api(request: IndexRequest):
-    from agents.rag_logic import index_content
-    try:
-        rag_data = index_content(request.text, request.blog_id)
-        return {"blog_id": request.blog_id, "success": True, "chunks_indexed": len(rag_data)}
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
+    """Queue an (incremental) index of the blog and return its job id; `wait=true` indexes inline."""
+    if request.wait:
+        from agents.rag_logic import index_blog
+        try:
+            result = index_blog(request.text, request.blog_id)
+            return {
+                "blog_id": request.blog_id,
+                "success": True,
+                "chunks_indexed": result["chunks"],
+                "chunks_embedded": result["embedded"],
+                "chunks_reused": result["reused"],
+                "chunks_dropped": result["dropped"],  # left out of the new version, deleted later by version GC
+            }
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            raise HTTPException(status_code=500, detail=str(e))
+
+    from agents.rag.clients import get_index_jobs
+    job = get_index_jobs().submit(request.blog_id, request.text, notify=request.notify)
+    print(f"DEBUG: Queued index job {job['job_id']} for blog {request.blog_id} (collapsed {job['collapsed']})")
+    return {"blog_id": request.blog_id, "job_id": job["job_id"], "status": job["status"]}
+
+_bulk_run = {"status": "idle", "source": None, "report": None, "error": None}
+_bulk_lock = threading.Lock()
+
+@app.post("/index/bulk", dependencies=[Depends(require_agent_key)])
+def bulk_index_api(request: BulkIndexRequest):
+    """Start a checkpointed bulk index in the background; poll GET /index/bulk for the report."""
+    from agents.rag.config import BULK_CHECKPOINT_PATH, BULK_IMPORT_DIR
+    from agents.rag.bulk_index import iter_jsonl, iter_mongo
+    from agents.rag_logic import bulk_index
+    if request.source == "jsonl":
+        import_dir = os.path.realpath(BULK_IMPORT_DIR)
+        path = os.path.realpath(os.path.join(import_dir, request.path or ""))
+        if os.path.commonpath([import_dir, path]) != import_dir:
+            raise HTTPException(status_code=400, detail="JSONL path must be inside RAG_BULK_IMPORT_DIR")
+        if not request.path or not os.path.isfile(path):
+            raise HTTPException(status_code=400, detail="JSONL source needs an existing path")
+        source = f"jsonl:{path}"
+        records_for = lambda after: iter_jsonl(path, after)
+    elif request.source == "mongo":
+        mongo_uri = os.getenv("MONGO_URI")
+        if not mongo_uri:
+            raise HTTPException(status_code=400, detail="MONGO_URI is not configured")
+        source = f"mongo:{request.mongo_db}.{request.mongo_collection}"
+        records_for = lambda after: iter_mongo(mongo_uri, request.mongo_db, request.mongo_collection, after)
+    else:
+        raise HTTPException(status_code=400, detail="source must be 'mongo' or 'jsonl'")
+
+    with _bulk_lock:
+        if _bulk_run["status"] == "running":
+            raise HTTPException(status_code=409, detail=f"Bulk index of {_bulk_run['source']} already running")
+        _bulk_run.update(status="running", source=source, report=None, error=None)
+
+    def run():
+        try:
+            report = bulk_index(
+                source, records_for,
+                checkpoint_path=BULK_CHECKPOINT_PATH,
+                resume=request.resume,
+                embed_batch=request.embed_batch,
+                upload_batch=request.upload_batch,
+                parallel=request.parallel,
+            )
+            _bulk_run.update(status="succeeded", report=report)
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            _bulk_run.update(status="failed", error=str(e))
+
+    threading.Thread(target=run, name="bulk-index", daemon=True).start()
+    return dict(_bulk_run)
+
+@app.get("/index/bulk", dependencies=[Depends(require_agent_key)])
+def bulk_index_status_api():
+    return dict(_bulk_run)
+
+@app.get("/index/{job_id}")
+def index_status_api(job_id: str):
+    from agents.rag.clients import get_index_jobs
+    job = get_index_jobs().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown index job")
+    return job
 
 @app.post("/query")
-def query_blog_api(request: QueryRequest):
+async def query_blog_api(request: QueryRequest):
     print(f"DEBUG: Querying blog {request.blog_id}. Question: {request.question}")
-    from agents.rag_logic import query_content
+    from agents.rag_logic import aquery_content
     try:
-        answer = query_content(request.blog_id, request.rag_data or [], request.question)
+        answer = await aquery_content(request.blog_id, request.rag_data or [], request.question)
         return {"answer": answer}
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/query/stream")
+async def query_stream_api(request: QueryRequest):
+    """Server-sent events: `token` events while the LLM writes, `answer` for cached replies, then `done`."""
+    print(f"DEBUG: Streaming query for blog {request.blog_id}. Question: {request.question}")
+    from fastapi.responses import StreamingResponse
+    from agents.rag_logic import astream_query
+
+    async def events():
+        try:
+            async for event in astream_query(request.blog_id, request.rag_data or [], request.question):
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            yield f"event: error\ndata: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post("/query/batch", dependencies=[Depends(require_agent_key)])
+async def query_batch_api(request: BatchQueryRequest):
+    """NDJSON stream, one line per item in request order: {index, blog_id, question, answer, source}."""
+    from fastapi.responses import StreamingResponse
+    from agents.rag.config import BATCH_QUERY_MAX_ITEMS, BATCH_QUERY_CONCURRENCY
+    from agents.rag_logic import abatch_query
+    if len(request.items) > BATCH_QUERY_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_QUERY_MAX_ITEMS} items per batch")
+    print(f"DEBUG: Batch query with {len(request.items)} items")
+    items = [(item.blog_id, item.question) for item in request.items]
+    concurrency = min(request.concurrency or BATCH_QUERY_CONCURRENCY, BATCH_QUERY_CONCURRENCY)
+
+    async def lines():
+        async for result in abatch_query(items, concurrency):
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@app.get("/metrics")
+def metrics_api():
+    from agents.rag import metrics
+    return metrics.snapshot()
+
+@app.get("/admin/cache/stats", dependencies=[Depends(require_agent_key)])
+def cache_stats_api(blog_id: Optional[str] = None):
+    from agents.rag import semantic_cache
+    from agents.rag.clients import get_redis_client
+    r = get_redis_client()
+    if blog_id:
+        return semantic_cache.blog_stats(r, blog_id)
+    return semantic_cache.all_stats(r)
+
+@app.delete("/admin/cache/{blog_id}", dependencies=[Depends(require_agent_key)])
+def cache_flush_api(blog_id: str):
+    from agents.rag import semantic_cache
+    from agents.rag.clients import get_invalidation_bus, get_redis_client
+    removed = semantic_cache.flush_blog(get_redis_client(), blog_id)
+    # Every worker drops its in-process (L1) answers for the blog too
+    get_invalidation_bus().publish(blog_id)
+    return {"blog_id": blog_id, "entries_removed": removed}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
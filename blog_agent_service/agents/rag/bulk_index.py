@@ -0,0 +1,212 @@
+"""
+Bulk (re-)indexing of many blogs in one run.
+
+Blogs stream in from a JSONL file or a Mongo cursor as (key, blog_id, text)
+records. Their chunks are packed across blog boundaries into provider-sized
+`embed_documents` batches, and each embedded batch is handed to a writer
+thread (in production `upload_points` with parallel workers) while the next
+batch is being embedded.
+
+Work is committed one window of blogs at a time. Once all points of a window
+are written, its blogs are committed (new index versions activated) and the
+checkpoint file records the key of the last finished record. An interrupted
+run resumes right after it.
+
+Only depends on the stdlib; splitting, embedding, writing and committing are
+passed in by `rag_logic.bulk_index`.
+"""
+from __future__ import annotations
+
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .chunk_diff import chunk_ids
+from .chunker import Chunk
+
+Record = Tuple[str, str, str]  # (source key, blog_id, text)
+
+
+# -----------------------------
+# Sources
+# -----------------------------
+def iter_jsonl(path: str, after: Optional[str] = None) -> Iterator[Record]:
+    """One blog per line: {"blog_id" or "_id", "text" or "content"}; keys are line numbers."""
+    skip = int(after) if after is not None else 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            if line_no <= skip or not line.strip():
+                continue
+            doc = json.loads(line)
+            blog_id = str(doc.get("blog_id") or doc.get("_id"))
+            yield str(line_no), blog_id, doc.get("text") or doc.get("content") or ""
+
+
+def iter_mongo(
+    uri: str,
+    database: str = "test",
+    collection: str = "blogs",
+    after: Optional[str] = None,
+    batch_size: int = 500,
+) -> Iterator[Record]:
+    """Blogs in `_id` order with only their content fetched; keys are the `_id`s."""
+    try:
+        from bson import ObjectId
+        from pymongo import MongoClient
+    except ImportError as e:
+        raise RuntimeError("Mongo sources need pymongo (pip install pymongo)") from e
+    client = MongoClient(uri)
+    try:
+        query = {"_id": {"$gt": ObjectId(after)}} if after is not None else {}
+        cursor = (
+            client[database][collection]
+            .find(query, {"_id": 1, "content": 1})
+            .sort("_id", 1)
+            .batch_size(batch_size)
+        )
+        for doc in cursor:
+            yield str(doc["_id"]), str(doc["_id"]), doc.get("content") or ""
+    finally:
+        client.close()
+
+
+# -----------------------------
+# Checkpoints
+# -----------------------------
+def load_checkpoint(path: Optional[str], source: str) -> Optional[dict]:
+    """The saved state for `source`, or None (no file, or it belongs to another source)."""
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        state = json.load(f)
+    if state.get("source") != source:
+        print(f"DEBUG: Ignoring checkpoint {path} for another source ({state.get('source')})")
+        return None
+    return state
+
+
+def save_checkpoint(path: str, state: dict) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+# -----------------------------
+# Indexer
+# -----------------------------
+Item = Tuple[str, List[float], Dict[str, Any]]  # (point id, vector, payload)
+
+
+class BulkIndexer:
+    def __init__(
+        self,
+        split: Callable[[str, str], List[Chunk]],
+        embed: Callable[[List[str]], List[List[float]]],
+        write: Callable[[List[Item]], None],
+        commit: Callable[[List[str]], None],
+        embed_batch: int = 256,
+        window_chunks: int = 4096,
+        checkpoint_path: Optional[str] = None,
+        source: str = "",
+    ):
+        self.split = split
+        self.embed = embed
+        self.write = write
+        self.commit = commit
+        self.embed_batch = max(1, embed_batch)
+        self.window_chunks = max(1, window_chunks)
+        self.checkpoint_path = checkpoint_path
+        self.source = source
+        self.stats = {
+            "blogs": 0, "skipped": 0, "chunks": 0, "tokens": 0, "embed_calls": 0,
+            "embed_s": 0.0, "upload_s": 0.0, "elapsed_s": 0.0, "last_key": None,
+        }
+        self._totals = {"blogs": 0, "chunks": 0, "tokens": 0}
+
+    def resume_key(self) -> Optional[str]:
+        """Key of the last committed record of a previous run on the same source."""
+        state = load_checkpoint(self.checkpoint_path, self.source)
+        if state is None:
+            return None
+        self._totals = {k: state.get("totals", {}).get(k, 0) for k in self._totals}
+        return state.get("last_key")
+
+    def run(self, records: Iterable[Record]) -> dict:
+        started = time.perf_counter()
+        window: List[Tuple[str, List[Chunk]]] = []
+        pending, last_key = 0, None
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="bulk-upload") as writer:
+            for key, blog_id, text in records:
+                chunks = self.split(blog_id, text) if text and text.strip() else []
+                if not chunks:
+                    self.stats["skipped"] += 1
+                window.append((blog_id, chunks))
+                pending += len(chunks)
+                last_key = key
+                if pending >= self.window_chunks:
+                    self._flush(writer, window, last_key, started)
+                    window, pending = [], 0
+            if window:
+                self._flush(writer, window, last_key, started)
+        return self.report(started)
+
+    def _timed_write(self, items: List[Item]) -> None:
+        start = time.perf_counter()
+        self.write(items)
+        self.stats["upload_s"] += time.perf_counter() - start
+
+    def _flush(self, writer: ThreadPoolExecutor, window: List[Tuple[str, List[Chunk]]], last_key: str, started: float) -> None:
+        rows, tokens = [], 0
+        for blog_id, chunks in window:
+            for i, (point_id, digest) in enumerate(chunk_ids(blog_id, [chunk.text for chunk in chunks])):
+                chunk = chunks[i]
+                rows.append((point_id, chunk.text, {
+                    "blog_id": blog_id, "text": chunk.text, "chunk_index": i, "content_hash": digest, **chunk.payload(),
+                }))
+                tokens += chunk.tokens
+
+        uploads = []
+        for start in range(0, len(rows), self.embed_batch):
+            batch = rows[start:start + self.embed_batch]
+            t0 = time.perf_counter()
+            vectors = self.embed([text for _, text, _ in batch])
+            self.stats["embed_s"] += time.perf_counter() - t0
+            self.stats["embed_calls"] += 1
+            uploads.append(writer.submit(self._timed_write, [
+                (point_id, vector, payload) for (point_id, _, payload), vector in zip(batch, vectors)
+            ]))
+        for upload in uploads:
+            upload.result()  # a failed upload aborts the run before the checkpoint moves
+
+        indexed = list(dict.fromkeys(blog_id for blog_id, chunks in window if chunks))
+        if indexed:
+            self.commit(indexed)
+        added = {"blogs": len(indexed), "chunks": len(rows), "tokens": tokens}
+        for k, v in added.items():
+            self.stats[k] += v
+            self._totals[k] += v
+        self.stats["last_key"] = last_key
+        if self.checkpoint_path:
+            save_checkpoint(self.checkpoint_path, {"source": self.source, "last_key": last_key, "totals": self._totals})
+
+        elapsed = time.perf_counter() - started
+        print(
+            f"DEBUG: Bulk index committed {self.stats['blogs']} blogs / {self.stats['chunks']} chunks "
+            f"({self.stats['chunks'] / max(elapsed, 1e-9):.0f} chunks/s) up to {last_key}"
+        )
+
+    def report(self, started: float) -> dict:
+        elapsed = time.perf_counter() - started
+        self.stats["elapsed_s"] = round(elapsed, 3)
+        self.stats["embed_s"] = round(self.stats["embed_s"], 3)
+        self.stats["upload_s"] = round(self.stats["upload_s"], 3)
+        self.stats["chunks_per_s"] = round(self.stats["chunks"] / elapsed, 1) if elapsed else 0.0
+        self.stats["tokens_per_s"] = round(self.stats["tokens"] / elapsed, 1) if elapsed else 0.0
+        self.stats["totals"] = dict(self._totals)
+        return dict(self.stats)
@@ -0,0 +1,63 @@
+"""
+Content-addressed chunk ids and the diff behind incremental re-indexing.
+
+A chunk's point id is derived from its blog, the sha256 of its text and how
+many identical chunks precede it, so an unchanged paragraph keeps its id (and
+its vector) across edits. `plan_reindex` compares the freshly split chunks
+with what Qdrant holds for the blog and says what to embed, re-number and
+delete.
+"""
+from __future__ import annotations
+
+import hashlib
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_ids(blog_id: str, chunks: List[str]) -> List[Tuple[str, str]]:
+    """(point id, content hash) for each chunk, stable for unchanged text."""
+    seen: Dict[str, int] = {}
+    out = []
+    for chunk in chunks:
+        digest = content_hash(chunk)
+        dup = seen.get(digest, 0)
+        seen[digest] = dup + 1
+        out.append((str(uuid.uuid5(uuid.NAMESPACE_DNS, f"{blog_id}_{digest}_{dup}")), digest))
+    return out
+
+
+@dataclass
+class ReindexPlan:
+    # (point id, chunk_index, text, content hash) for chunks that need a vector
+    new: List[Tuple[str, int, str, str]] = field(default_factory=list)
+    # (point id, new chunk_index) for kept chunks whose position changed
+    moved: List[Tuple[str, int]] = field(default_factory=list)
+    delete: List[str] = field(default_factory=list)
+    reused: int = 0
+
+    @property
+    def changed(self) -> bool:
+        """True when chunk text was added or removed (positions alone don't change answers)."""
+        return bool(self.new or self.delete)
+
+
+def plan_reindex(blog_id: str, chunks: List[str], existing: Iterable[Tuple[str, Optional[int]]]) -> ReindexPlan:
+    """Diff new `chunks` against `existing` (point id, chunk_index) pairs stored for the blog."""
+    stored = {str(point_id): index for point_id, index in existing}
+    plan = ReindexPlan()
+    wanted = set()
+    for i, (point_id, digest) in enumerate(chunk_ids(blog_id, chunks)):
+        wanted.add(point_id)
+        if point_id not in stored:
+            plan.new.append((point_id, i, chunks[i], digest))
+            continue
+        plan.reused += 1
+        if stored[point_id] != i:
+            plan.moved.append((point_id, i))
+    plan.delete = [point_id for point_id in stored if point_id not in wanted]
+    return plan
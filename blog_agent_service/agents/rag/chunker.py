@@ -0,0 +1,196 @@
+"""
+Markdown-aware chunker for blog posts.
+
+Blogs come out of `merge_content` as `#` / `##` sections, so chunks are cut
+on heading boundaries first, then between paragraphs, and only inside an
+oversized paragraph between sentences (then words). Sizes are measured in
+tokens, not characters, and chunks do not overlap.
+
+Each `Chunk` is an exact slice `text[char_start:char_end]` of the source and
+carries the title of the section it belongs to. A heading with no body of its
+own (e.g. the `# Title` right before `## Introduction`) is folded into the
+next chunk. Headings inside fenced code blocks are ignored.
+
+`iter_chunks` is a generator, so large posts are emitted section by section.
+`chunk_sections` builds the two-level index used for small-to-big retrieval:
+section-sized parents, each cut again into small child chunks for search.
+Only depends on the stdlib; tiktoken is used for counting when installed.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Callable, Iterator, List, Optional, Tuple
+
+_HEADING = re.compile(r"^(#{1,6})[ \t]+(.+?)[ \t#]*$")
+_FENCE = re.compile(r"^\s*(```|~~~)")
+# Finer and finer places to cut an oversized paragraph
+_SEPARATORS = [re.compile(r"(?<=[.!?])\s+"), re.compile(r"\s+")]
+
+
+@dataclass
+class Chunk:
+    text: str
+    section: str
+    char_start: int
+    char_end: int
+    tokens: int
+    parent: Optional[int] = None  # index of the enclosing section in `chunk_sections` output
+
+    def payload(self) -> dict:
+        return {"section": self.section, "char_start": self.char_start, "char_end": self.char_end}
+
+
+def token_counter() -> Callable[[str], int]:
+    """tiktoken's cl100k count when available, else the usual len/4 estimate."""
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return lambda text: len(encoding.encode_ordinary(text))
+    except Exception:
+        return lambda text: max(1, len(text) // 4)
+
+
+def _blocks(text: str) -> Iterator[tuple]:
+    """("heading", start, end, level, title) and ("para", start, end) in document order."""
+    pos, start, end, in_fence = 0, None, 0, False
+    for line in text.splitlines(keepends=True):
+        content = line.rstrip("\r\n")
+        line_start, pos = pos, pos + len(line)
+        fence = bool(_FENCE.match(content))
+        if not in_fence and not fence:
+            heading = _HEADING.match(content)
+            if heading or not content.strip():
+                if start is not None:
+                    yield "para", start, end
+                    start = None
+                if heading:
+                    yield "heading", line_start, line_start + len(content), len(heading.group(1)), heading.group(2).strip()
+                continue
+        if fence:
+            in_fence = not in_fence
+        if start is None:
+            start = line_start + (len(content) - len(content.lstrip()))
+        end = line_start + len(content.rstrip())
+    if start is not None:
+        yield "para", start, end
+
+
+def _spans(text: str, start: int, end: int, separator: re.Pattern) -> Iterator[Tuple[int, int]]:
+    pos = start
+    for match in separator.finditer(text, start, end):
+        if match.start() > pos:
+            yield pos, match.start()
+        pos = match.end()
+    if pos < end:
+        yield pos, end
+
+
+def _split_long(text: str, start: int, end: int, max_tokens: int, count: Callable[[str], int], level: int = 0) -> List[Tuple[int, int]]:
+    """Cut one oversized block into spans of at most `max_tokens` (a single huge word stays whole)."""
+    if level >= len(_SEPARATORS):
+        return [(start, end)]
+    out: List[Tuple[int, int]] = []
+    current: Optional[Tuple[int, int]] = None
+    current_tokens = 0
+    for s, e in _spans(text, start, end, _SEPARATORS[level]):
+        tokens = count(text[s:e])
+        if tokens > max_tokens:
+            if current is not None:
+                out.append(current)
+                current = None
+            out.extend(_split_long(text, s, e, max_tokens, count, level + 1))
+            continue
+        if current is not None and current_tokens + tokens > max_tokens:
+            out.append(current)
+            current = None
+        if current is None:
+            current, current_tokens = (s, e), tokens
+        else:
+            current, current_tokens = (current[0], e), current_tokens + tokens
+    if current is not None:
+        out.append(current)
+    return out
+
+
+def iter_chunks(text: str, max_tokens: int = 200, count: Optional[Callable[[str], int]] = None) -> Iterator[Chunk]:
+    count = count or token_counter()
+    headings: List[Tuple[int, str]] = []  # open (level, title) path
+    pending: Optional[int] = None  # start of headings still waiting for a body
+    heading_end = 0
+    current: Optional[List] = None  # [start, end, tokens, section]
+
+    def make(start: int, end: int, section: str) -> Chunk:
+        body = text[start:end]
+        return Chunk(body, section, start, end, count(body))
+
+    for block in _blocks(text):
+        kind, start, end = block[:3]
+        if kind == "heading":
+            if current is not None:
+                yield make(current[0], current[1], current[3])
+                current = None
+            level, title = block[3:]
+            while headings and headings[-1][0] >= level:
+                headings.pop()
+            headings.append((level, title))
+            heading_end = end
+            if pending is None:
+                pending = start
+            continue
+
+        section = headings[-1][1] if headings else ""
+        tokens = count(text[start:end])
+        if tokens > max_tokens:
+            if current is not None:
+                yield make(current[0], current[1], current[3])
+                current = None
+            for s, e in _split_long(text, start, end, max_tokens, count):
+                yield make(pending if pending is not None else s, e, section)
+                pending = None
+            continue
+
+        if current is not None and current[2] + tokens > max_tokens:
+            yield make(current[0], current[1], current[3])
+            current = None
+        if current is None:
+            chunk_start = pending if pending is not None else start
+            current = [chunk_start, end, count(text[chunk_start:start]) + tokens if pending is not None else tokens, section]
+            pending = None
+        else:
+            current[1] = end
+            current[2] += tokens
+
+    if current is not None:
+        yield make(current[0], current[1], current[3])
+    elif pending is not None:
+        # Trailing headings with no body at all
+        yield make(pending, heading_end, headings[-1][1] if headings else "")
+
+
+def chunk_markdown(text: str, max_tokens: int = 200, count: Optional[Callable[[str], int]] = None) -> List[Chunk]:
+    return list(iter_chunks(text, max_tokens, count))
+
+
+def chunk_sections(
+    text: str,
+    section_tokens: int = 600,
+    chunk_tokens: int = 128,
+    count: Optional[Callable[[str], int]] = None,
+) -> Tuple[List[Chunk], List[Chunk]]:
+    """
+    (sections, chunks): sections are heading-bounded parents of at most
+    `section_tokens`; chunks are their children of at most `chunk_tokens`,
+    with offsets into `text` and `parent` set to the section's index.
+    """
+    count = count or token_counter()
+    sections = chunk_markdown(text, section_tokens, count)
+    chunks: List[Chunk] = []
+    for n, section in enumerate(sections):
+        for child in iter_chunks(section.text, chunk_tokens, count):
+            child.char_start += section.char_start
+            child.char_end += section.char_start
+            child.section = child.section or section.section
+            child.parent = n
+            chunks.append(child)
+    return sections, chunks
@@ -0,0 +1,452 @@
+"""
+Process-wide client registry for the RAG pipeline.
+
+Each dependency (embeddings, LLM, Qdrant, Redis) is built once on first use and
+shared by every request for the lifetime of the process. The underlying HTTP
+and Redis connection pools are thread-safe, so the same instance is handed to
+every worker thread. Call `close_clients()` on shutdown.
+
+Async variants (`get_async_redis_client`, `get_async_qdrant_client`) back the
+async query path. They bind to the event loop that first uses them, so they are
+meant for the single uvicorn loop and are released with `aclose_clients()`.
+
+Tests can swap in local fakes with `override_clients(redis=FakeRedis(), ...)`.
+"""
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict
+
+from . import config
+
+_lock = threading.RLock()
+_clients: Dict[str, Any] = {}
+_overrides: Dict[str, Any] = {}
+
+
+# -----------------------------
+# Registry
+# -----------------------------
+def get_client(name: str, factory: Callable[[], Any]) -> Any:
+    """Return the shared client registered under `name`, building it on first use."""
+    if name in _overrides:
+        return _overrides[name]
+    client = _clients.get(name)
+    if client is None:
+        with _lock:
+            client = _clients.get(name)
+            if client is None:
+                client = factory()
+                _clients[name] = client
+    return client
+
+
+@contextmanager
+def override_clients(**fakes: Any):
+    """Temporarily replace registered clients (e.g. `redis=`, `qdrant=`) with fakes."""
+    with _lock:
+        previous = dict(_overrides)
+        _overrides.update(fakes)
+    try:
+        yield
+    finally:
+        with _lock:
+            _overrides.clear()
+            _overrides.update(previous)
+
+
+def _close(client: Any) -> None:
+    pool = getattr(client, "connection_pool", None)
+    if pool is not None:
+        pool.disconnect()
+    close = getattr(client, "close", None)
+    if callable(close):
+        close()
+
+
+def close_clients() -> None:
+    """Close every pooled sync client. Safe to call more than once."""
+    with _lock:
+        clients = [(n, c) for n, c in _clients.items() if not n.startswith("async_")]
+        for name, _ in clients:
+            del _clients[name]
+    for name, client in clients:
+        try:
+            _close(client)
+        except Exception as e:
+            print(f"DEBUG: Failed to close client '{name}': {e}")
+
+
+async def _aclose(client: Any) -> None:
+    pool = getattr(client, "connection_pool", None)
+    if pool is not None:
+        await pool.disconnect()
+    for method in ("aclose", "close"):
+        close = getattr(client, method, None)
+        if callable(close):
+            result = close()
+            if hasattr(result, "__await__"):
+                await result
+            return
+
+
+async def aclose_clients() -> None:
+    """Close every pooled client, awaiting the async ones first."""
+    with _lock:
+        clients = [(n, c) for n, c in _clients.items() if n.startswith("async_")]
+        for name, _ in clients:
+            del _clients[name]
+    for name, client in clients:
+        try:
+            await _aclose(client)
+        except Exception as e:
+            print(f"DEBUG: Failed to close client '{name}': {e}")
+    close_clients()
+
+
+# -----------------------------
+# Factories
+# -----------------------------
+def _build_http_client():
+    import httpx
+    return httpx.Client(
+        limits=httpx.Limits(
+            max_connections=config.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=config.HTTP_MAX_KEEPALIVE,
+        ),
+        timeout=config.HTTP_TIMEOUT,
+    )
+
+
+def _build_async_http_client():
+    import httpx
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=config.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=config.HTTP_MAX_KEEPALIVE,
+        ),
+        timeout=config.HTTP_TIMEOUT,
+    )
+
+
+def _build_raw_embeddings(dimensions=None):
+    from langchain_openai import OpenAIEmbeddings
+    key = os.getenv("OPENROUTER_API_KEY")
+    if not key:
+        print("CRITICAL: OPENROUTER_API_KEY is missing!")
+    dimensions = dimensions or config.EMBEDDING_DIMENSIONS
+    return OpenAIEmbeddings(
+        model=config.EMBEDDING_MODEL,
+        dimensions=None if dimensions == config.EMBEDDING_NATIVE_DIMENSIONS else dimensions,
+        openai_api_key=key,
+        openai_api_base=config.OPENROUTER_API_BASE,
+        http_client=get_client("http", _build_http_client),
+        http_async_client=get_client("async_http", _build_async_http_client),
+    )
+
+
+def _build_batched_embeddings():
+    from .embed_batcher import BatchedEmbeddings
+    return BatchedEmbeddings(
+        get_client("raw_embeddings", _build_raw_embeddings),
+        window_ms=config.EMBED_BATCH_WINDOW_MS,
+        max_batch=config.EMBED_BATCH_MAX,
+        max_in_flight=config.EMBED_BATCH_MAX_IN_FLIGHT,
+    )
+
+
+def _build_embeddings():
+    # raw provider -> micro-batcher -> chunk store -> cache; cache hits never wait for a batch window.
+    inner = get_client("raw_embeddings", _build_raw_embeddings)
+    if config.EMBED_BATCH_ENABLED:
+        inner = get_client("batched_embeddings", _build_batched_embeddings)
+    if config.EMBEDDING_STORE_ENABLED:
+        from .embedding_store import StoredEmbeddings
+        inner = StoredEmbeddings(inner, get_embedding_store(), config.EMBEDDING_MODEL_KEY)
+    if not config.EMBEDDING_CACHE_ENABLED:
+        return inner
+    from .embedding_cache import CachedEmbeddings
+    return CachedEmbeddings(
+        inner,
+        model=config.EMBEDDING_MODEL_KEY,
+        redis_getter=get_redis_client,
+        async_redis_getter=get_async_redis_client,
+        dtype=config.EMBEDDING_CACHE_DTYPE,
+        ttl=config.EMBEDDING_CACHE_TTL,
+        lru_size=config.EMBEDDING_CACHE_LRU_SIZE,
+    )
+
+
+def get_bulk_embeddings():
+    """Document embeddings for bulk indexing: provider batches through the chunk store, no Redis or batch window."""
+    def _build():
+        inner = get_client("raw_embeddings", _build_raw_embeddings)
+        if not config.EMBEDDING_STORE_ENABLED:
+            return inner
+        from .embedding_store import StoredEmbeddings
+        return StoredEmbeddings(inner, get_embedding_store(), config.EMBEDDING_MODEL_KEY)
+    return get_client("bulk_embeddings", _build)
+
+
+def embeddings_for(dimensions):
+    """Uncached document embeddings at `dimensions`, through the chunk store (for collection migrations)."""
+    from .embedding_store import StoredEmbeddings
+    return StoredEmbeddings(
+        _build_raw_embeddings(dimensions), get_embedding_store(), config.embedding_model_key(dimensions)
+    )
+
+
+def get_embedding_store():
+    def _build():
+        from .embedding_store import EmbeddingStore
+        return EmbeddingStore(config.EMBEDDING_STORE_PATH)
+    return get_client("embedding_store", _build)
+
+
+def _build_llm():
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(
+        model=config.LLM_MODEL,
+        openai_api_key=os.getenv("OPENROUTER_API_KEY"),
+        openai_api_base=config.OPENROUTER_API_BASE,
+        temperature=0,
+        max_tokens=1000,
+        http_client=get_client("http", _build_http_client),
+        http_async_client=get_client("async_http", _build_async_http_client),
+    )
+
+
+def _build_qdrant():
+    import httpx
+    from qdrant_client import QdrantClient
+    return QdrantClient(
+        url=os.getenv("QDRANT_URL"),
+        api_key=os.getenv("QDRANT_API_KEY"),
+        prefer_grpc=config.QDRANT_PREFER_GRPC,
+        grpc_port=config.QDRANT_GRPC_PORT,
+        timeout=config.QDRANT_TIMEOUT,
+        limits=httpx.Limits(max_connections=config.QDRANT_MAX_CONNECTIONS),
+    )
+
+
+def _build_async_qdrant():
+    import httpx
+    from qdrant_client import AsyncQdrantClient
+    return AsyncQdrantClient(
+        url=os.getenv("QDRANT_URL"),
+        api_key=os.getenv("QDRANT_API_KEY"),
+        prefer_grpc=config.QDRANT_PREFER_GRPC,
+        grpc_port=config.QDRANT_GRPC_PORT,
+        timeout=config.QDRANT_TIMEOUT,
+        limits=httpx.Limits(max_connections=config.QDRANT_MAX_CONNECTIONS),
+    )
+
+
+def redis_url() -> str:
+    return os.getenv("REDIS_URL", "redis://localhost:6379")
+
+
+def _build_redis():
+    import redis
+    url = redis_url()
+    log_url = re.sub(r':([^:@]+)@', ':****@', url)
+    print(f"DEBUG: Connecting to Redis at {log_url} (pool size {config.REDIS_MAX_CONNECTIONS})")
+    pool = redis.BlockingConnectionPool.from_url(
+        url,
+        max_connections=config.REDIS_MAX_CONNECTIONS,
+        timeout=config.REDIS_POOL_TIMEOUT,
+    )
+    return redis.Redis(connection_pool=pool)
+
+
+def _build_async_redis():
+    import redis.asyncio as aioredis
+    pool = aioredis.BlockingConnectionPool.from_url(
+        redis_url(),
+        max_connections=config.REDIS_MAX_CONNECTIONS,
+        timeout=config.REDIS_POOL_TIMEOUT,
+    )
+    return aioredis.Redis(connection_pool=pool)
+
+
+# -----------------------------
+# Accessors
+# -----------------------------
+def get_embeddings():
+    return get_client("embeddings", _build_embeddings)
+
+
+def get_llm():
+    return get_client("llm", _build_llm)
+
+
+def get_qdrant_client():
+    return get_client("qdrant", _build_qdrant)
+
+
+def get_redis_client():
+    return get_client("redis", _build_redis)
+
+
+def get_async_qdrant_client():
+    return get_client("async_qdrant", _build_async_qdrant)
+
+
+def get_async_redis_client():
+    return get_client("async_redis", _build_async_redis)
+
+
+def get_single_flight():
+    from .singleflight import SingleFlight
+    return get_client("single_flight", lambda: SingleFlight(
+        get_redis_client,
+        lock_ttl=config.SINGLE_FLIGHT_LOCK_TTL,
+        wait_timeout=config.SINGLE_FLIGHT_WAIT_TIMEOUT,
+        poll_interval=config.SINGLE_FLIGHT_POLL_INTERVAL,
+    ))
+
+
+def get_async_single_flight():
+    from .singleflight import AsyncSingleFlight
+    return get_client("async_single_flight", lambda: AsyncSingleFlight(
+        get_async_redis_client,
+        lock_ttl=config.SINGLE_FLIGHT_LOCK_TTL,
+        wait_timeout=config.SINGLE_FLIGHT_WAIT_TIMEOUT,
+        poll_interval=config.SINGLE_FLIGHT_POLL_INTERVAL,
+    ))
+
+
+def get_invalidation_bus():
+    from .invalidation import InvalidationBus
+    return get_client("invalidation_bus", lambda: InvalidationBus(get_redis_client))
+
+
+def get_l1_cache():
+    def _build():
+        from .l1_cache import L1AnswerCache
+        cache = L1AnswerCache(
+            max_entries=config.L1_MAX_ENTRIES,
+            ttl=config.L1_TTL,
+            max_blogs=config.L1_MAX_BLOGS,
+            vectors_per_blog=config.L1_VECTORS_PER_BLOG,
+            max_distance=config.SEMANTIC_CACHE_MAX_DISTANCE,
+        )
+        get_invalidation_bus().subscribe(cache.invalidate_blog)
+        return cache
+    return get_client("l1_cache", _build)
+
+
+def get_fallback_index():
+    def _build():
+        from .fallback_index import FallbackIndex
+        index = FallbackIndex(max_blogs=config.FALLBACK_INDEX_MAX_BLOGS, dimensions=config.EMBEDDING_DIMENSIONS)
+        get_invalidation_bus().subscribe(index.invalidate_blog)
+        return index
+    return get_client("fallback_index", _build)
+
+
+def get_index_versions():
+    def _build():
+        from .versions import IndexVersions
+        versions = IndexVersions(
+            get_redis_client,
+            ttl=config.INDEX_VERSION_CACHE_TTL,
+            gc_delay=config.INDEX_GC_DELAY,
+        )
+        get_invalidation_bus().subscribe(versions.invalidate)
+        return versions
+    return get_client("index_versions", _build)
+
+
+def get_section_cache():
+    def _build():
+        from .sections import SectionCache, qdrant_section_loader
+        from .versions import blog_filter
+
+        def active_sections(blog_id):
+            return blog_filter(blog_id, get_index_versions().active(blog_id))
+
+        cache = SectionCache(
+            qdrant_section_loader(get_qdrant_client, config.QDRANT_SECTIONS_COLLECTION, active_sections),
+            max_blogs=config.SECTION_CACHE_BLOGS,
+        )
+        get_invalidation_bus().subscribe(cache.invalidate)
+        return cache
+    return get_client("section_cache", _build)
+
+
+def get_hot_tier():
+    def _build():
+        from .hot_tier import HotBlogTier, qdrant_loader
+        from .versions import blog_filter
+
+        def active_chunks(blog_id):
+            return blog_filter(blog_id, get_index_versions().active(blog_id, fresh=True))
+
+        tier = HotBlogTier(
+            qdrant_loader(get_qdrant_client, config.QDRANT_COLLECTION, filter_fn=active_chunks),
+            max_blogs=config.HOT_TIER_MAX_BLOGS,
+            min_queries=config.HOT_TIER_MIN_QUERIES,
+            half_life=config.HOT_TIER_HALF_LIFE,
+            max_chunks=config.HOT_TIER_MAX_CHUNKS,
+        )
+        get_invalidation_bus().subscribe(tier.refresh)
+        return tier
+    return get_client("hot_tier", _build)
+
+
+def get_snapshot_store():
+    def _build():
+        from .snapshot import SnapshotStore
+        return SnapshotStore(config.SNAPSHOT_DIR)
+    return get_client("snapshot_store", _build)
+
+
+def sign_webhook(body: bytes, timestamp: str) -> str:
+    """HMAC-SHA256 of "<timestamp>.<body>" keyed by the agent secret; the secret itself is never sent."""
+    key = os.getenv("AGENT_SECRET_KEY", "").encode()
+    return "sha256=" + hmac.new(key, timestamp.encode() + b"." + body, hashlib.sha256).hexdigest()
+
+
+def _post_index_webhook(job: dict) -> None:
+    if not config.INDEX_CALLBACK_URL:
+        return
+    body = json.dumps(job).encode()
+    timestamp = str(int(time.time()))
+    http = get_client("http", _build_http_client)
+    response = http.post(
+        config.INDEX_CALLBACK_URL,
+        content=body,
+        headers={
+            "content-type": "application/json",
+            "x-agent-timestamp": timestamp,
+            "x-agent-signature": sign_webhook(body, timestamp),
+        },
+        timeout=config.INDEX_WEBHOOK_TIMEOUT,
+    )
+    response.raise_for_status()
+
+
+def get_index_jobs():
+    def _build():
+        from .index_jobs import IndexJobQueue
+        from ..rag_logic import index_blog
+
+        def run(blog_id, text):
+            result = index_blog(text, blog_id)
+            return {k: v for k, v in result.items() if k != "rag_data"}
+
+        return IndexJobQueue(
+            run,
+            notify=_post_index_webhook,
+            workers=config.INDEX_WORKERS,
+            max_jobs_kept=config.INDEX_JOBS_KEPT,
+        )
+    return get_client("index_jobs", _build)
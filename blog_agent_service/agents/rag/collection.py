@@ -0,0 +1,76 @@
+"""
+Storage layout of the chunk collection.
+
+`blog_embeddings` can be created with shortened `text-embedding-3-small`
+vectors (RAG_EMBEDDING_DIMENSIONS), int8 scalar quantization kept in RAM
+with the float32 originals on disk, and tuned HNSW `m` / `ef_construct`.
+Queries then search the quantized vectors and rescore an oversampled
+candidate list against the originals.
+
+`blog_embeddings` may be an alias: `scripts/migrate_collection.py` builds a
+collection with new settings next to the live one, backfills it and flips
+the alias, so existence checks have to look at aliases too.
+
+Qdrant models are imported lazily so the memory estimate is usable without
+qdrant-client installed.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+QUANTIZATIONS = ("none", "int8")
+
+
+def vector_bytes(dimensions: int, quantization: str = "none", on_disk: bool = False) -> Dict[str, int]:
+    """Approximate bytes per vector in RAM and on disk (HNSW links not included)."""
+    original = dimensions * 4
+    quantized = dimensions if quantization == "int8" else 0
+    return {"ram": quantized + (0 if on_disk else original), "disk": original if on_disk else 0}
+
+
+def collection_config(
+    dimensions: int,
+    quantization: str = "none",
+    on_disk: bool = False,
+    hnsw_m: int = 16,
+    hnsw_ef_construct: int = 100,
+    sparse_name: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Keyword arguments for `create_collection`."""
+    from qdrant_client import models
+
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unknown quantization {quantization!r}, expected one of {QUANTIZATIONS}")
+    kwargs: Dict[str, Any] = {
+        "vectors_config": models.VectorParams(size=dimensions, distance=models.Distance.COSINE, on_disk=on_disk),
+        "hnsw_config": models.HnswConfigDiff(m=hnsw_m, ef_construct=hnsw_ef_construct),
+    }
+    if quantization == "int8":
+        kwargs["quantization_config"] = models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(type=models.ScalarType.INT8, quantile=0.99, always_ram=True)
+        )
+    if sparse_name:
+        # IDF is applied by Qdrant at query time, over the whole collection
+        kwargs["sparse_vectors_config"] = {sparse_name: models.SparseVectorParams(modifier=models.Modifier.IDF)}
+    return kwargs
+
+
+def search_params(hnsw_ef: int = 0, oversampling: float = 2.0, exact: bool = False):
+    """Dense search parameters; rescoring only matters on quantized collections."""
+    from qdrant_client import models
+
+    return models.SearchParams(
+        hnsw_ef=hnsw_ef or None,
+        exact=exact,
+        quantization=models.QuantizationSearchParams(rescore=True, oversampling=oversampling),
+    )
+
+
+def resolve(client, name: str) -> Optional[str]:
+    """Collection behind `name` (itself or the alias target), or None when neither exists."""
+    for alias in client.get_aliases().aliases:
+        if alias.alias_name == name:
+            return alias.collection_name
+    if name in {c.name for c in client.get_collections().collections}:
+        return name
+    return None
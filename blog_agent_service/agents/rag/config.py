@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# -----------------------------
+# Helpers
+# -----------------------------
+def env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        print(f"DEBUG: Invalid integer for {name}={value!r}, using {default}")
+        return default
+
+
+def env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        print(f"DEBUG: Invalid number for {name}={value!r}, using {default}")
+        return default
+
+
+def env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# -----------------------------
+# Providers
+# -----------------------------
+OPENROUTER_API_BASE = "https://openrouter.ai/api/v1"
+EMBEDDING_MODEL = "openai/text-embedding-3-small"
+LLM_MODEL = "openai/gpt-4o-mini"
+
+# text-embedding-3-small is 1536-d natively and can return shortened vectors
+# (e.g. 512 or 768). Changing this needs a collection built at the new size:
+# see scripts/migrate_collection.py.
+EMBEDDING_NATIVE_DIMENSIONS = 1536
+EMBEDDING_DIMENSIONS = env_int("RAG_EMBEDDING_DIMENSIONS", EMBEDDING_NATIVE_DIMENSIONS)
+
+
+def embedding_model_key(dimensions: int) -> str:
+    """Embedding cache / store key: vectors of different sizes must never be mixed up."""
+    return EMBEDDING_MODEL if dimensions == EMBEDDING_NATIVE_DIMENSIONS else f"{EMBEDDING_MODEL}@{dimensions}"
+
+
+EMBEDDING_MODEL_KEY = embedding_model_key(EMBEDDING_DIMENSIONS)
+
+QDRANT_COLLECTION = "blog_embeddings"  # collection or alias
+VECTOR_SIZE = EMBEDDING_DIMENSIONS
+
+# -----------------------------
+# Collection layout (applies when a collection is created)
+# -----------------------------
+# "int8": scalar-quantized copy in RAM, searched first, rescored on the originals
+QDRANT_QUANTIZATION = os.getenv("RAG_QDRANT_QUANTIZATION", "none").lower()
+QDRANT_ON_DISK = env_bool("RAG_QDRANT_ON_DISK", False)  # float32 originals on disk
+QDRANT_HNSW_M = env_int("RAG_QDRANT_HNSW_M", 16)
+QDRANT_HNSW_EF_CONSTRUCT = env_int("RAG_QDRANT_HNSW_EF_CONSTRUCT", 100)
+QDRANT_HNSW_EF = env_int("RAG_QDRANT_HNSW_EF", 0)  # search-time ef; 0 = Qdrant's default
+QDRANT_RESCORE_OVERSAMPLING = env_float("RAG_QDRANT_RESCORE_OVERSAMPLING", 2.0)
+
+# -----------------------------
+# Connection pools
+# -----------------------------
+# Max keep-alive HTTP connections shared by the OpenRouter embeddings and LLM clients.
+HTTP_MAX_CONNECTIONS = env_int("RAG_HTTP_MAX_CONNECTIONS", 100)
+HTTP_MAX_KEEPALIVE = env_int("RAG_HTTP_MAX_KEEPALIVE", 20)
+HTTP_TIMEOUT = env_float("RAG_HTTP_TIMEOUT", 60.0)
+
+REDIS_MAX_CONNECTIONS = env_int("RAG_REDIS_MAX_CONNECTIONS", 50)
+# Seconds a caller waits for a free Redis connection before erroring out.
+REDIS_POOL_TIMEOUT = env_float("RAG_REDIS_POOL_TIMEOUT", 5.0)
+
+QDRANT_MAX_CONNECTIONS = env_int("RAG_QDRANT_MAX_CONNECTIONS", 50)
+QDRANT_TIMEOUT = env_int("RAG_QDRANT_TIMEOUT", 30)
+QDRANT_PREFER_GRPC = env_bool("QDRANT_PREFER_GRPC", False)
+QDRANT_GRPC_PORT = env_int("QDRANT_GRPC_PORT", 6334)
+
+# -----------------------------
+# Single-flight
+# -----------------------------
+# The leader's lock expires after this many seconds if its worker dies mid-answer.
+SINGLE_FLIGHT_LOCK_TTL = env_int("RAG_SINGLE_FLIGHT_LOCK_TTL", 60)
+# Followers give up waiting and answer on their own after this long.
+SINGLE_FLIGHT_WAIT_TIMEOUT = env_float("RAG_SINGLE_FLIGHT_WAIT_TIMEOUT", 30.0)
+# Safety net for a missed pub/sub wake-up: followers re-check the cache this often.
+SINGLE_FLIGHT_POLL_INTERVAL = env_float("RAG_SINGLE_FLIGHT_POLL_INTERVAL", 5.0)
+
+# -----------------------------
+# Semantic cache
+# -----------------------------
+# Max cosine distance between two questions for a semantic cache hit.
+SEMANTIC_CACHE_MAX_DISTANCE = env_float("RAG_SEMANTIC_CACHE_MAX_DISTANCE", 0.2)
+# Base lifetime of a semantic cache entry; every hit stretches it up to the max.
+SEMANTIC_CACHE_TTL = env_int("RAG_SEMANTIC_CACHE_TTL", 7200)
+SEMANTIC_CACHE_MAX_TTL = env_int("RAG_SEMANTIC_CACHE_MAX_TTL", 7 * 24 * 3600)
+SEMANTIC_CACHE_MAX_PER_BLOG = env_int("RAG_SEMANTIC_CACHE_MAX_PER_BLOG", 200)
+SEMANTIC_CACHE_MAX_BYTES = env_int("RAG_SEMANTIC_CACHE_MAX_BYTES", 256 * 1024 * 1024)
+EXACT_CACHE_TTL = env_int("RAG_EXACT_CACHE_TTL", 7200)
+
+# -----------------------------
+# In-process L1 answer cache
+# -----------------------------
+L1_MAX_ENTRIES = env_int("RAG_L1_MAX_ENTRIES", 2048)
+# Never outlive the Redis exact cache the L1 sits in front of.
+L1_TTL = min(env_int("RAG_L1_TTL", 600), EXACT_CACHE_TTL)
+L1_MAX_BLOGS = env_int("RAG_L1_MAX_BLOGS", 64)
+L1_VECTORS_PER_BLOG = env_int("RAG_L1_VECTORS_PER_BLOG", 64)
+
+# -----------------------------
+# Chunking
+# -----------------------------
+# "markdown" (heading/paragraph aware, token sized) or "recursive" (old 800/150 character splitter)
+CHUNKER = os.getenv("RAG_CHUNKER", "markdown").lower()
+CHUNK_MAX_TOKENS = env_int("RAG_CHUNK_MAX_TOKENS", 128)  # child chunks, the unit of vector search
+
+# -----------------------------
+# Small-to-big retrieval
+# -----------------------------
+# Section-sized parents live in their own vector-less collection
+SECTIONS_ENABLED = env_bool("RAG_SECTIONS_ENABLED", True)
+QDRANT_SECTIONS_COLLECTION = os.getenv("RAG_SECTIONS_COLLECTION", "blog_sections")
+SECTION_MAX_TOKENS = env_int("RAG_SECTION_MAX_TOKENS", 600)
+SECTION_CACHE_BLOGS = env_int("RAG_SECTION_CACHE_BLOGS", 256)
+CONTEXT_MAX_TOKENS = env_int("RAG_CONTEXT_MAX_TOKENS", 1500)
+# Context packing: how many candidates to fetch, then adaptive k (cut at a
+# relevance drop of CONTEXT_SCORE_GAP) and MMR down to CONTEXT_MAX_CHUNKS
+CONTEXT_CANDIDATES = env_int("RAG_CONTEXT_CANDIDATES", 24)
+CONTEXT_MAX_CHUNKS = env_int("RAG_CONTEXT_MAX_CHUNKS", 8)
+CONTEXT_MIN_CHUNKS = env_int("RAG_CONTEXT_MIN_CHUNKS", 2)
+CONTEXT_SCORE_GAP = env_float("RAG_CONTEXT_SCORE_GAP", 0.08)
+CONTEXT_MMR_LAMBDA = env_float("RAG_CONTEXT_MMR_LAMBDA", 0.7)  # 1.0 = relevance only
+
+# -----------------------------
+# Hybrid (dense + BM25 sparse) retrieval
+# -----------------------------
+# Chunks also carry a local BM25 sparse vector; queries fuse both with RRF
+HYBRID_ENABLED = env_bool("RAG_HYBRID_ENABLED", True)
+SPARSE_VECTOR_NAME = os.getenv("RAG_SPARSE_VECTOR_NAME", "bm25")
+HYBRID_PREFETCH = env_int("RAG_HYBRID_PREFETCH", 48)  # candidates per side before fusion
+BM25_K1 = env_float("RAG_BM25_K1", 1.2)
+BM25_B = env_float("RAG_BM25_B", 0.75)
+BM25_AVG_TOKENS = env_float("RAG_BM25_AVG_TOKENS", 100.0)  # average chunk length, in sparse terms
+
+# -----------------------------
+# Embedding cache
+# -----------------------------
+EMBEDDING_CACHE_ENABLED = env_bool("RAG_EMBEDDING_CACHE_ENABLED", True)
+# float16 halves the Redis footprint; cosine scores move by ~1e-3.
+EMBEDDING_CACHE_DTYPE = os.getenv("RAG_EMBEDDING_CACHE_DTYPE", "float16")
+EMBEDDING_CACHE_TTL = env_int("RAG_EMBEDDING_CACHE_TTL", 30 * 24 * 3600)
+EMBEDDING_CACHE_LRU_SIZE = env_int("RAG_EMBEDDING_CACHE_LRU_SIZE", 4096)
+
+# -----------------------------
+# Embedding micro-batching
+# -----------------------------
+EMBED_BATCH_ENABLED = env_bool("RAG_EMBED_BATCH_ENABLED", True)
+# How long the first query in a batch waits for company before the call goes out.
+EMBED_BATCH_WINDOW_MS = env_float("RAG_EMBED_BATCH_WINDOW_MS", 5.0)
+EMBED_BATCH_MAX = env_int("RAG_EMBED_BATCH_MAX", 64)
+EMBED_BATCH_MAX_IN_FLIGHT = env_int("RAG_EMBED_BATCH_MAX_IN_FLIGHT", 4)
+
+# -----------------------------
+# Batch query endpoint
+# -----------------------------
+BATCH_QUERY_MAX_ITEMS = env_int("RAG_BATCH_QUERY_MAX_ITEMS", 1000)
+# Concurrent LLM calls per /query/batch request.
+BATCH_QUERY_CONCURRENCY = env_int("RAG_BATCH_QUERY_CONCURRENCY", 8)
+
+# -----------------------------
+# MongoDB rag_data fallback
+# -----------------------------
+# Blogs whose rag_data matrix stays resident for the Qdrant-empty fallback.
+FALLBACK_INDEX_MAX_BLOGS = env_int("RAG_FALLBACK_INDEX_MAX_BLOGS", 128)
+
+# -----------------------------
+# Hot-blog retrieval tier
+# -----------------------------
+HOT_TIER_ENABLED = env_bool("RAG_HOT_TIER_ENABLED", True)
+HOT_TIER_MAX_BLOGS = env_int("RAG_HOT_TIER_MAX_BLOGS", 32)
+# Decayed query count a blog needs before it is pulled into memory.
+HOT_TIER_MIN_QUERIES = env_float("RAG_HOT_TIER_MIN_QUERIES", 5.0)
+HOT_TIER_HALF_LIFE = env_float("RAG_HOT_TIER_HALF_LIFE", 600.0)
+# Bigger blogs stay in Qdrant; exact search stops being cheap.
+HOT_TIER_MAX_CHUNKS = env_int("RAG_HOT_TIER_MAX_CHUNKS", 500)
+
+# -----------------------------
+# Local Qdrant snapshot
+# -----------------------------
+# "qdrant" (snapshot only as an outage fallback) or "snapshot" (never call Qdrant).
+RETRIEVAL_BACKEND = os.getenv("RAG_RETRIEVAL_BACKEND", "qdrant").strip().lower()
+SNAPSHOT_DIR = os.getenv(
+    "RAG_SNAPSHOT_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "qdrant_snapshot"),
+)
+
+# -----------------------------
+# Persistent chunk embedding store
+# -----------------------------
+EMBEDDING_STORE_ENABLED = env_bool("RAG_EMBEDDING_STORE_ENABLED", True)
+EMBEDDING_STORE_PATH = os.getenv(
+    "RAG_EMBEDDING_STORE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data", "embeddings.sqlite3"),
+)
+
+# -----------------------------
+# Background indexing
+# -----------------------------
+INDEX_WORKERS = env_int("RAG_INDEX_WORKERS", 2)
+INDEX_JOBS_KEPT = env_int("RAG_INDEX_JOBS_KEPT", 1000)
+INDEX_WEBHOOK_TIMEOUT = env_float("RAG_INDEX_WEBHOOK_TIMEOUT", 10.0)
+# The only place job webhooks go; requests cannot choose it. Bodies are signed
+# with HMAC-SHA256 over "<timestamp>.<body>" keyed by AGENT_SECRET_KEY.
+INDEX_CALLBACK_URL = os.getenv("RAG_INDEX_CALLBACK_URL", "http://127.0.0.1:5000/api/blogs/rag-index-callback")
+
+# -----------------------------
+# Bulk indexing
+# -----------------------------
+BULK_EMBED_BATCH = env_int("RAG_BULK_EMBED_BATCH", 256)  # texts per embed_documents call
+BULK_UPLOAD_BATCH = env_int("RAG_BULK_UPLOAD_BATCH", 256)  # points per upload request
+BULK_UPLOAD_PARALLEL = env_int("RAG_BULK_UPLOAD_PARALLEL", 4)
+BULK_WINDOW_CHUNKS = env_int("RAG_BULK_WINDOW_CHUNKS", 4096)  # chunks per commit + checkpoint
+BULK_CHECKPOINT_PATH = os.getenv(
+    "RAG_BULK_CHECKPOINT_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data", "bulk_index.checkpoint.json"),
+)
+# JSONL sources of POST /index/bulk must live under this directory
+BULK_IMPORT_DIR = os.getenv(
+    "RAG_BULK_IMPORT_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data", "imports"),
+)
+
+# -----------------------------
+# Versioned re-index
+# -----------------------------
+# How long a process trusts its cached active version (the bus drops it sooner)
+INDEX_VERSION_CACHE_TTL = env_float("RAG_INDEX_VERSION_CACHE_TTL", 60.0)
+# Superseded chunk versions are deleted only after every worker's cached version
+# has expired, plus this margin for queries still in flight
+INDEX_GC_MARGIN = env_float("RAG_INDEX_GC_MARGIN", 30.0)
+INDEX_GC_DELAY = INDEX_VERSION_CACHE_TTL + INDEX_GC_MARGIN
@@ -0,0 +1,153 @@
+"""
+Prompt context assembly for RAG answers.
+
+`expand_to_sections` is the "big" half of small-to-big retrieval: the small
+chunks that won the vector search are grouped under the section they were
+cut from, and each group is replaced by its whole section while the token
+budget allows. Several fragments of one section then cost one copy of it,
+and the paragraphs around a hit come along. A section too large for what is
+left of the budget contributes only its retrieved chunks. Chunks without a
+known section (legacy points, MongoDB rag_data) pass through as they are.
+
+Children are exact slices of their section, so membership is a substring
+check and works for every retrieval backend (Qdrant, hot tier, snapshot).
+
+Before that, `select_chunks` decides which candidates are worth sending:
+candidates after a sharp drop in relevance are cut (adaptive k), the rest
+are picked by Maximal Marginal Relevance so near-duplicates do not crowd
+out other parts of the post, and `strip_overlap` removes text repeated
+between neighbouring chunks (legacy 800/150 splits share up to 150 chars).
+"""
+from __future__ import annotations
+
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from . import metrics
+
+# (text, relevance score or None, vector or None), best first
+Hit = Tuple[str, Optional[float], Optional[Sequence[float]]]
+
+
+def adaptive_k(scores: Sequence[float], min_k: int, max_k: int, gap: float) -> int:
+    """Number of candidates to keep: stop at the first score drop of at least `gap` after `min_k`."""
+    n = min(len(scores), max_k)
+    for i in range(max(1, min_k), n):
+        if scores[i - 1] - scores[i] >= gap:
+            return i
+    return n
+
+
+def mmr(query_vector: Sequence[float], vectors: Sequence[Sequence[float]], k: int, lambda_: float) -> List[int]:
+    """Indices picked by Maximal Marginal Relevance (cosine), in pick order.
+
+    `vectors` come best first; the retriever's top hit is always picked first,
+    cosine only ranks the rest against it.
+    """
+    import numpy as np
+    from .vectors import unit, unit_rows
+
+    if not len(vectors) or k <= 0:
+        return []
+    matrix = unit_rows(vectors)
+    relevance = matrix @ unit(query_vector)
+    picked = [0]
+    redundancy = matrix @ matrix[picked[0]]
+    while len(picked) < min(k, len(vectors)):
+        scores = lambda_ * relevance - (1 - lambda_) * redundancy
+        scores[picked] = -np.inf
+        best = int(np.argmax(scores))
+        picked.append(best)
+        redundancy = np.maximum(redundancy, matrix @ matrix[best])
+    return picked
+
+
+def select_chunks(
+    query_vector: Optional[Sequence[float]],
+    hits: Sequence[Hit],
+    max_k: int = 8,
+    min_k: int = 2,
+    gap: float = 0.08,
+    lambda_: float = 0.7,
+) -> List[str]:
+    """Texts worth sending, best first: adaptive k on the scores, then MMR when vectors are known."""
+    if not hits:
+        return []
+    scores = [score for _, score, _ in hits]
+    if all(score is not None for score in scores):
+        order = sorted(range(len(hits)), key=lambda i: -scores[i])
+        hits = [hits[i] for i in order]
+        hits = hits[:adaptive_k([score for _, score, _ in hits], min_k, len(hits), gap)]
+    if query_vector is None or any(vector is None for _, _, vector in hits) or len(hits) <= 1:
+        picked = list(range(min(max_k, len(hits))))
+    else:
+        picked = mmr(query_vector, [vector for _, _, vector in hits], max_k, lambda_)
+    metrics.observe("context.candidates", len(hits))
+    metrics.observe("context.chunks", len(picked))
+    return [hits[i][0] for i in picked]
+
+
+def _overlap(left: str, right: str, min_chars: int, max_chars: int) -> int:
+    """Length of the longest suffix of `left` that is a prefix of `right`."""
+    for n in range(min(len(left), len(right), max_chars), min_chars - 1, -1):
+        if left.endswith(right[:n]):
+            return n
+    return 0
+
+
+def strip_overlap(texts: Sequence[str], min_chars: int = 20, max_chars: int = 400) -> List[str]:
+    """Drop chunks already contained in an earlier one and trim text shared with earlier chunks."""
+    kept: List[str] = []
+    for text in texts:
+        if any(text in other for other in kept):
+            continue
+        for other in kept:
+            head = _overlap(other, text, min_chars, max_chars)
+            if head:
+                text = text[head:]
+            tail = _overlap(text, other, min_chars, max_chars)
+            if tail:
+                text = text[:-tail]
+        text = text.strip()
+        if text:
+            kept.append(text)
+    return kept
+
+
+def _section_of(chunk: str, sections: Sequence[str]) -> Optional[int]:
+    for n, section in enumerate(sections):
+        if chunk in section:
+            return n
+    return None
+
+
+def expand_to_sections(
+    chunks: Sequence[str],
+    sections: Sequence[str],
+    budget_tokens: int,
+    count: Callable[[str], int],
+) -> List[str]:
+    """Context blocks in retrieval order; always at least the best chunk."""
+    groups: Dict[Union[int, Tuple[str, int]], List[str]] = {}
+    for rank, chunk in enumerate(chunks):
+        parent = _section_of(chunk, sections) if sections else None
+        groups.setdefault(parent if parent is not None else ("chunk", rank), []).append(chunk)
+
+    blocks: List[str] = []
+    used = expanded = 0
+    for key, members in groups.items():
+        if isinstance(key, int):
+            tokens = count(sections[key])
+            if used + tokens <= budget_tokens or not blocks:
+                blocks.append(sections[key])
+                used += tokens
+                expanded += 1
+                continue
+        for chunk in members:
+            tokens = count(chunk)
+            if used + tokens > budget_tokens and blocks:
+                break
+            blocks.append(chunk)
+            used += tokens
+    metrics.observe("context.tokens", used)
+    metrics.observe("context.sections", expanded)
+    return blocks
@@ -0,0 +1,179 @@
+"""
+Micro-batching for embedding calls.
+
+Concurrent `embed_query` callers are collected for up to `window_ms` (or until
+`max_batch` texts are waiting) and sent to the provider as one
+`embed_documents` request; each caller gets its own vector back.
+
+`BatchedEmbeddings` wraps any embeddings object and depends only on the
+stdlib and the package's `metrics` module, not on the agent's clients or
+config. Metrics: `embed_batch.size` and `embed_batch.fill_ratio` (size / max_batch).
+"""
+from __future__ import annotations
+
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+from . import metrics
+
+Vector = List[float]
+
+
+def _record(size: int, max_batch: int) -> None:
+    metrics.incr("embed_batch.calls")
+    metrics.observe("embed_batch.size", size)
+    metrics.observe("embed_batch.fill_ratio", size / max_batch)
+
+
+class EmbeddingBatcher:
+    """Thread-safe batcher; a collector thread forms batches, a small pool sends them."""
+
+    def __init__(
+        self,
+        embed_many: Callable[[List[str]], List[Vector]],
+        window_ms: float = 5.0,
+        max_batch: int = 64,
+        max_in_flight: int = 4,
+    ):
+        self._embed_many = embed_many
+        self._window = window_ms / 1000.0
+        self._max_batch = max(1, max_batch)
+        self._queue: "queue.Queue[Optional[Tuple[str, Future]]]" = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="embed-batch")
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def embed(self, text: str) -> Vector:
+        future: Future = Future()
+        self._ensure_collector()
+        self._queue.put((text, future))
+        return future.result()
+
+    def _ensure_collector(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._collect, name="embed-batcher", daemon=True)
+                self._thread.start()
+
+    def _collect(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self._window
+            while len(batch) < self._max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._executor.submit(self._send, batch)
+                    return
+                batch.append(item)
+            self._executor.submit(self._send, batch)
+
+    def _send(self, batch: List[Tuple[str, Future]]) -> None:
+        _record(len(batch), self._max_batch)
+        try:
+            vectors = self._embed_many([text for text, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), vector in zip(batch, vectors):
+            future.set_result(vector)
+
+    def close(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=1.0)
+        self._executor.shutdown(wait=False)
+
+
+class AsyncEmbeddingBatcher:
+    """Event-loop batcher: the first caller arms a timer, a full batch flushes at once."""
+
+    def __init__(
+        self,
+        aembed_many: Callable[[List[str]], Awaitable[List[Vector]]],
+        window_ms: float = 5.0,
+        max_batch: int = 64,
+    ):
+        self._aembed_many = aembed_many
+        self._window = window_ms / 1000.0
+        self._max_batch = max(1, max_batch)
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: set = set()
+
+    async def embed(self, text: str) -> Vector:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # A new loop (tests, worker restart): anything pending belongs to a dead loop.
+            self._loop, self._pending, self._timer = loop, [], None
+        future = loop.create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= self._max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = self._loop.create_task(self._send(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        _record(len(batch), self._max_batch)
+        try:
+            vectors = await self._aembed_many([text for text, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
+
+
+class BatchedEmbeddings:
+    """Embeddings facade: single queries are micro-batched, document lists pass through."""
+
+    def __init__(self, inner: Any, window_ms: float = 5.0, max_batch: int = 64, max_in_flight: int = 4):
+        self.inner = inner
+        self._sync = EmbeddingBatcher(inner.embed_documents, window_ms, max_batch, max_in_flight)
+        self._async = AsyncEmbeddingBatcher(inner.aembed_documents, window_ms, max_batch) \
+            if hasattr(inner, "aembed_documents") else None
+
+    def embed_query(self, text: str) -> Vector:
+        return self._sync.embed(text)
+
+    def embed_documents(self, texts: List[str]) -> List[Vector]:
+        return self.inner.embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> Vector:
+        if self._async is None:
+            return await asyncio.to_thread(self._sync.embed, text)
+        return await self._async.embed(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[Vector]:
+        return await self.inner.aembed_documents(texts)
+
+    def close(self) -> None:
+        self._sync.close()
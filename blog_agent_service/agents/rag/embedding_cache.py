@@ -0,0 +1,188 @@
+"""
+Embedding cache keyed on (model, normalized text).
+
+`CachedEmbeddings` wraps any langchain `Embeddings`. Lookups go through an
+in-process LRU, then Redis (`emb:{sha1}` -> float16/float32 bytes), and only
+the remaining texts reach the provider, in one batched call. Repeated
+questions, and chunks we have embedded before, never hit the embedding API.
+
+Questions are normalized for case, whitespace and trailing punctuation only.
+The filler-word stripping used for the exact answer cache would merge
+different questions into one vector.
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from . import metrics
+
+KEY_PREFIX = "emb:"
+
+
+def normalize_query_text(text: str) -> str:
+    text = re.sub(r"\s+", " ", text.strip().lower())
+    return text.rstrip("?!. ")
+
+
+def normalize_document_text(text: str) -> str:
+    return re.sub(r"[ \t]+", " ", text.strip())
+
+
+class CachedEmbeddings(Embeddings):
+    def __init__(
+        self,
+        inner: Embeddings,
+        model: str,
+        redis_getter: Optional[Callable[[], Any]] = None,
+        async_redis_getter: Optional[Callable[[], Any]] = None,
+        dtype: str = "float16",
+        ttl: int = 30 * 24 * 3600,
+        lru_size: int = 4096,
+    ):
+        self.inner = inner
+        self.model = model
+        self._redis = redis_getter
+        self._aredis = async_redis_getter
+        self._dtype = np.dtype(dtype)
+        self._ttl = ttl
+        self._lru_size = lru_size
+        self._lru: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # -- keys / encoding --
+    def key(self, text: str, query: bool = False) -> str:
+        normalized = normalize_query_text(text) if query else normalize_document_text(text)
+        digest = hashlib.sha1(f"{self.model}\0{normalized}".encode("utf-8")).hexdigest()
+        return KEY_PREFIX + digest
+
+    def _encode(self, vector: List[float]) -> bytes:
+        return np.asarray(vector, dtype=self._dtype).tobytes()
+
+    def _decode(self, data: bytes) -> List[float]:
+        return np.frombuffer(data, dtype=self._dtype).astype(np.float32).tolist()
+
+    # -- in-process LRU --
+    def _from_lru(self, keys: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                vector = self._lru.get(key)
+                if vector is not None:
+                    self._lru.move_to_end(key)
+                    found[key] = vector
+        return found
+
+    def _remember(self, vectors: Dict[str, List[float]]) -> None:
+        with self._lock:
+            for key, vector in vectors.items():
+                self._lru[key] = vector
+                self._lru.move_to_end(key)
+            while len(self._lru) > self._lru_size:
+                self._lru.popitem(last=False)
+
+    # -- resolution --
+    def _plan(self, texts: List[str], query: bool):
+        keys = [self.key(t, query) for t in texts]
+        found = self._from_lru(keys)
+        metrics.incr("embedding_cache.lru.hit", sum(1 for k in keys if k in found))
+        return keys, found
+
+    def _pending(self, keys, texts, found) -> Dict[str, str]:
+        todo: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in todo:
+                todo[key] = text
+        return todo
+
+    def _embed(self, texts: List[str], query: bool) -> List[List[float]]:
+        keys, found = self._plan(texts, query)
+        missing = [k for k in dict.fromkeys(keys) if k not in found]
+        if missing and self._redis is not None:
+            try:
+                values = self._redis().mget(missing)
+                hits = {k: self._decode(v) for k, v in zip(missing, values) if v}
+                metrics.incr("embedding_cache.redis.hit", len(hits))
+                found.update(hits)
+                self._remember(hits)
+            except Exception as e:
+                print(f"Redis Embedding Cache Error: {e}")
+
+        todo = self._pending(keys, texts, found)
+        if todo:
+            metrics.incr("embedding_cache.miss", len(todo))
+            if query and len(todo) == 1:
+                vectors = [self.inner.embed_query(next(iter(todo.values())))]
+            else:
+                vectors = self.inner.embed_documents(list(todo.values()))
+            fresh = dict(zip(todo.keys(), vectors))
+            found.update(fresh)
+            self._remember(fresh)
+            if self._redis is not None:
+                try:
+                    pipe = self._redis().pipeline(transaction=False)
+                    for key, vector in fresh.items():
+                        pipe.set(key, self._encode(vector), ex=self._ttl)
+                    pipe.execute()
+                except Exception as e:
+                    print(f"Redis Embedding Cache Error: {e}")
+        return [found[k] for k in keys]
+
+    async def _aembed(self, texts: List[str], query: bool) -> List[List[float]]:
+        keys, found = self._plan(texts, query)
+        missing = [k for k in dict.fromkeys(keys) if k not in found]
+        if missing and self._aredis is not None:
+            try:
+                values = await self._aredis().mget(missing)
+                hits = {k: self._decode(v) for k, v in zip(missing, values) if v}
+                metrics.incr("embedding_cache.redis.hit", len(hits))
+                found.update(hits)
+                self._remember(hits)
+            except Exception as e:
+                print(f"Redis Embedding Cache Error: {e}")
+
+        todo = self._pending(keys, texts, found)
+        if todo:
+            metrics.incr("embedding_cache.miss", len(todo))
+            if query and len(todo) == 1:
+                vectors = [await self.inner.aembed_query(next(iter(todo.values())))]
+            else:
+                vectors = await self.inner.aembed_documents(list(todo.values()))
+            fresh = dict(zip(todo.keys(), vectors))
+            found.update(fresh)
+            self._remember(fresh)
+            if self._aredis is not None:
+                try:
+                    pipe = self._aredis().pipeline(transaction=False)
+                    for key, vector in fresh.items():
+                        pipe.set(key, self._encode(vector), ex=self._ttl)
+                    await pipe.execute()
+                except Exception as e:
+                    print(f"Redis Embedding Cache Error: {e}")
+        return [found[k] for k in keys]
+
+    # -- langchain Embeddings API --
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(list(texts), query=False)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text], query=True)[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self._aembed(list(texts), query=False)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self._aembed([text], query=True))[0]
+
+    # -- many questions at once (batch query path) --
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(list(texts), query=True)
+
+    async def aembed_queries(self, texts: List[str]) -> List[List[float]]:
+        return await self._aembed(list(texts), query=True)
@@ -0,0 +1,189 @@
+"""
+Persistent, content-addressed store of chunk embeddings.
+
+Vectors live in a local SQLite file keyed by (model, sha256(chunk text)) and
+are stored as float16 blobs. Every indexing path (agent `/index`,
+`rag_service.py index`, `migrate_to_qdrant.py`) looks here before calling the
+provider, so re-indexing after a crash, rebuilding Qdrant or moving to a new
+collection costs no embedding calls for text we have embedded before.
+
+Only depends on the stdlib and NumPy so the backend scripts can import it.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import metrics
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    model     TEXT NOT NULL,
+    hash      TEXT NOT NULL,
+    dim       INTEGER NOT NULL,
+    vector    BLOB NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (model, hash)
+) WITHOUT ROWID
+"""
+
+# SQLite caps bound parameters per statement; stay well below it.
+_CHUNK = 500
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    def __init__(self, path: str, dtype: str = "float16"):
+        self.path = path
+        self._dtype = np.dtype(dtype)
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(SCHEMA)
+        self._db.commit()
+
+    def get_many(self, model: str, hashes: Sequence[str]) -> Dict[str, List[float]]:
+        """Vectors for the hashes we have; missing ones are simply absent."""
+        unique = list(dict.fromkeys(hashes))
+        found: Dict[str, List[float]] = {}
+        now = time.time()
+        with self._lock:
+            for start in range(0, len(unique), _CHUNK):
+                part = unique[start:start + _CHUNK]
+                marks = ",".join("?" * len(part))
+                rows = self._db.execute(
+                    f"SELECT hash, vector FROM embeddings WHERE model = ? AND hash IN ({marks})",
+                    [model, *part],
+                ).fetchall()
+                for digest, blob in rows:
+                    found[digest] = np.frombuffer(blob, dtype=self._dtype).astype(np.float32).tolist()
+                if rows:
+                    self._db.execute(
+                        f"UPDATE embeddings SET last_used = ? WHERE model = ? AND hash IN ({','.join('?' * len(rows))})",
+                        [now, model, *(digest for digest, _ in rows)],
+                    )
+            self._db.commit()
+        metrics.incr("embedding_store.hit", len(found))
+        metrics.incr("embedding_store.miss", len(unique) - len(found))
+        return found
+
+    def put_many(self, model: str, items: Iterable[Tuple[str, Sequence[float]]]) -> int:
+        now = time.time()
+        rows = []
+        for digest, vector in items:
+            v = np.asarray(vector, dtype=self._dtype)
+            rows.append((model, digest, int(v.shape[0]), v.tobytes(), now))
+        if not rows:
+            return 0
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, hash, dim, vector, last_used) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._db.commit()
+        return len(rows)
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT model, COUNT(*), SUM(LENGTH(vector)), MIN(last_used), MAX(last_used) "
+                "FROM embeddings GROUP BY model"
+            ).fetchall()
+        models = {
+            model: {"entries": count, "vector_bytes": size or 0, "oldest_use": oldest, "newest_use": newest}
+            for model, count, size, oldest, newest in rows
+        }
+        file_bytes = sum(
+            os.path.getsize(p) for p in (self.path, self.path + "-wal") if os.path.exists(p)
+        )
+        return {
+            "path": self.path,
+            "entries": sum(m["entries"] for m in models.values()),
+            "file_bytes": file_bytes,
+            "models": models,
+        }
+
+    def compact(self, max_age_days: Optional[float] = None, keep_models: Optional[Sequence[str]] = None) -> int:
+        """Drop vectors unused for `max_age_days` and/or of models not in `keep_models`, then VACUUM."""
+        removed = 0
+        with self._lock:
+            if max_age_days is not None:
+                cutoff = time.time() - max_age_days * 86400
+                removed += self._db.execute("DELETE FROM embeddings WHERE last_used < ?", (cutoff,)).rowcount
+            if keep_models:
+                marks = ",".join("?" * len(keep_models))
+                removed += self._db.execute(
+                    f"DELETE FROM embeddings WHERE model NOT IN ({marks})", list(keep_models)
+                ).rowcount
+            self._db.commit()
+            self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._db.execute("VACUUM")
+        return removed
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class StoredEmbeddings:
+    """Embeddings facade: `embed_documents` is served from the store first; queries pass through."""
+
+    def __init__(self, inner: Any, store: EmbeddingStore, model: str):
+        self.inner = inner
+        self.store = store
+        self.model = model
+
+    def _split(self, texts: List[str]):
+        hashes = [text_hash(t) for t in texts]
+        try:
+            found = self.store.get_many(self.model, hashes)
+        except Exception as e:
+            print(f"DEBUG: Embedding store read failed: {e}")
+            found = {}
+        todo: Dict[str, str] = {}
+        for digest, text in zip(hashes, texts):
+            if digest not in found:
+                todo.setdefault(digest, text)
+        return hashes, found, todo
+
+    def _save(self, found, fresh) -> None:
+        found.update(fresh)
+        try:
+            self.store.put_many(self.model, fresh.items())
+        except Exception as e:
+            print(f"DEBUG: Embedding store write failed: {e}")
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes, found, todo = self._split(list(texts))
+        if todo:
+            vectors = self.inner.embed_documents(list(todo.values()))
+            self._save(found, dict(zip(todo.keys(), vectors)))
+        return [found[h] for h in hashes]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes, found, todo = self._split(list(texts))
+        if todo:
+            vectors = await self.inner.aembed_documents(list(todo.values()))
+            self._save(found, dict(zip(todo.keys(), vectors)))
+        return [found[h] for h in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.inner.embed_query(text)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self.inner.aembed_query(text)
+
+    def close(self) -> None:
+        self.store.close()
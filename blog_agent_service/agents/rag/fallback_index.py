@@ -0,0 +1,105 @@
+"""
+Vectorized fallback search over the legacy MongoDB `rag_data`.
+
+The first fallback for a blog stacks its chunk embeddings into a float32
+matrix with unit rows; later fallbacks score it with one matrix-vector product
+and an `argpartition` top-k. Matrices are kept in an LRU keyed by blog id and
+rebuilt when the blog's `rag_data` fingerprint changes or the blog is
+re-indexed.
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import metrics
+from .vectors import top_k, truncate, unit, unit_rows
+
+
+def fingerprint(rag_data: Sequence[dict]) -> str:
+    """
+    Constant-time identity of a rag_data list, computed on every fallback query:
+    its count plus the length and head of the first, middle and last chunk and
+    of their embeddings (a re-embed changes those). Edits that keep all three
+    are caught by the blog's cache invalidation instead.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(len(rag_data)).encode())
+    sampled = sorted({0, len(rag_data) // 2, len(rag_data) - 1}) if rag_data else []
+    for i in sampled:
+        item = rag_data[i]
+        text = item.get("text") or ""
+        embedding = item.get("embedding")
+        head = list(embedding[:4]) if embedding is not None else None
+        size = len(embedding) if embedding is not None else 0
+        h.update(f"{i}:{len(text)}:{text[:32]}:{size}:{head}".encode("utf-8", "ignore"))
+    return h.hexdigest()
+
+
+class _BlogMatrix:
+    def __init__(self, rag_data: Sequence[dict], dimensions: Optional[int] = None):
+        rows, texts = [], []
+        dim = None
+        for item in rag_data:
+            embedding = item.get("embedding")
+            if not embedding:
+                continue
+            if dim is None:
+                dim = len(embedding)
+            if len(embedding) != dim:
+                continue
+            rows.append(truncate(embedding, dimensions) if dimensions else embedding)
+            texts.append(item["text"])
+        self.texts = texts
+        self.matrix = unit_rows(rows) if rows else np.zeros((0, 0), dtype=np.float32)
+
+
+class FallbackIndex:
+    def __init__(self, max_blogs: int = 128, dimensions: Optional[int] = None):
+        self.max_blogs = max_blogs
+        self.dimensions = dimensions  # legacy 1536-d rag_data is shortened to the query size
+        self._lock = threading.Lock()
+        self._blogs: "OrderedDict[str, Tuple[str, _BlogMatrix]]" = OrderedDict()
+
+    def _matrix(self, blog_id: str, rag_data: Sequence[dict]) -> _BlogMatrix:
+        fp = fingerprint(rag_data)
+        with self._lock:
+            entry = self._blogs.get(blog_id)
+            if entry is not None and entry[0] == fp:
+                self._blogs.move_to_end(blog_id)
+                metrics.incr("fallback_index.hit")
+                return entry[1]
+        metrics.incr("fallback_index.build")
+        built = _BlogMatrix(rag_data, self.dimensions)
+        with self._lock:
+            self._blogs[blog_id] = (fp, built)
+            self._blogs.move_to_end(blog_id)
+            while len(self._blogs) > self.max_blogs:
+                self._blogs.popitem(last=False)
+        return built
+
+    def search(
+        self, blog_id: str, rag_data: Sequence[dict], query_vector: Sequence[float], k: int = 8, with_vectors: bool = False
+    ) -> list:
+        """
+        Texts of the `k` chunks most cosine-similar to `query_vector`, best
+        first. `with_vectors` returns (text, score, unit vector) hits instead.
+        """
+        if not rag_data:
+            return []
+        blog = self._matrix(blog_id, rag_data)
+        q = unit(query_vector)
+        if blog.matrix.shape[0] == 0 or blog.matrix.shape[1] != q.shape[0]:
+            return []
+        scores = blog.matrix @ q
+        if with_vectors:
+            return [(blog.texts[i], float(scores[i]), blog.matrix[i]) for i in top_k(scores, k)]
+        return [blog.texts[i] for i in top_k(scores, k)]
+
+    def invalidate_blog(self, blog_id: str) -> None:
+        with self._lock:
+            self._blogs.pop(blog_id, None)
@@ -0,0 +1,196 @@
+"""
+In-process retrieval tier for the most-queried blogs.
+
+Every retrieval bumps the blog's popularity: a query count that halves every
+`half_life` seconds. Once a blog passes `min_queries` and is hotter than the
+coldest resident, a background thread pulls its chunk vectors and text from
+Qdrant (scroll) into a unit-row float32 matrix, evicting the coldest blog when
+full. Hot blogs are then answered with an exact cosine search in-process, and
+Qdrant drops out of the request path.
+
+`refresh(blog_id)` (wired to the invalidation bus) drops a re-indexed blog and
+reloads it in the background.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from . import metrics
+from .vectors import dense_of, top_k, unit, unit_rows
+
+Loader = Callable[[str], Tuple[List[str], List[Sequence[float]]]]
+
+
+def qdrant_loader(
+    client_getter: Callable[[], Any],
+    collection: str,
+    page_size: int = 256,
+    filter_fn: Optional[Callable[[str], Any]] = None,
+) -> Loader:
+    """
+    Loader that scrolls every chunk (text + vector) of one blog out of Qdrant.
+    `filter_fn(blog_id)` picks the points to load (default: all of the blog's).
+    """
+    def load(blog_id: str):
+        client = client_getter()
+        if filter_fn is not None:
+            blog_filter = filter_fn(blog_id)
+        else:
+            from qdrant_client.models import FieldCondition, Filter, MatchValue
+            blog_filter = Filter(must=[FieldCondition(key="blog_id", match=MatchValue(value=blog_id))])
+        texts, vectors, offset = [], [], None
+        while True:
+            points, offset = client.scroll(
+                collection_name=collection,
+                scroll_filter=blog_filter,
+                limit=page_size,
+                offset=offset,
+                with_payload=["text"],
+                with_vectors=True,
+            )
+            for point in points:
+                texts.append(point.payload["text"])
+                vectors.append(dense_of(point.vector))
+            if offset is None:
+                return texts, vectors
+    return load
+
+
+class _HotBlog:
+    __slots__ = ("matrix", "texts")
+
+    def __init__(self, texts: List[str], vectors: List[Sequence[float]]):
+        self.texts = texts
+        self.matrix = unit_rows(vectors)
+
+
+class HotBlogTier:
+    def __init__(
+        self,
+        loader: Loader,
+        max_blogs: int = 32,
+        min_queries: float = 5.0,
+        half_life: float = 600.0,
+        max_chunks: int = 500,
+    ):
+        self._loader = loader
+        self.max_blogs = max_blogs
+        self.min_queries = min_queries
+        self.half_life = half_life
+        self.max_chunks = max_chunks
+        self._lock = threading.Lock()
+        self._blogs: Dict[str, _HotBlog] = {}
+        self._scores: Dict[str, Tuple[float, float]] = {}
+        self._generation: Dict[str, int] = {}
+        self._loading: set = set()
+        self._skip_until: Dict[str, float] = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hot-tier")
+
+    # -- popularity --
+    def _decayed(self, blog_id: str, now: float) -> float:
+        score, at = self._scores.get(blog_id, (0.0, now))
+        return score * 0.5 ** ((now - at) / self.half_life)
+
+    def _bump(self, blog_id: str, now: float) -> float:
+        score = self._decayed(blog_id, now) + 1.0
+        self._scores[blog_id] = (score, now)
+        if len(self._scores) > 50 * self.max_blogs:
+            # Forget the long tail; residents always keep their score
+            ranked = sorted(self._scores, key=lambda b: self._decayed(b, now), reverse=True)
+            for cold in ranked[25 * self.max_blogs:]:
+                if cold not in self._blogs:
+                    del self._scores[cold]
+        return score
+
+    def _coldest(self, now: float) -> Tuple[Optional[str], float]:
+        if not self._blogs:
+            return None, 0.0
+        blog_id = min(self._blogs, key=lambda b: self._decayed(b, now))
+        return blog_id, self._decayed(blog_id, now)
+
+    def _wants(self, blog_id: str, score: float, now: float) -> bool:
+        # Earlier hits have decayed a hair by the time the next lands, so N quick
+        # queries score just under N; don't let that miss a whole-number threshold
+        if score < self.min_queries - 0.01 or blog_id in self._loading:
+            return False
+        if self._skip_until.get(blog_id, 0.0) > now:
+            return False
+        if len(self._blogs) < self.max_blogs:
+            return True
+        return score > self._coldest(now)[1]
+
+    # -- lookup --
+    def search(self, blog_id: str, query_vector: Sequence[float], k: int = 8, with_vectors: bool = False) -> Optional[list]:
+        """
+        Top-k chunk texts for a resident blog, or None when the caller must ask
+        Qdrant. `with_vectors` returns (text, score, unit vector) hits instead.
+        """
+        now = time.monotonic()
+        with self._lock:
+            score = self._bump(blog_id, now)
+            blog = self._blogs.get(blog_id)
+            promote = blog is None and self._wants(blog_id, score, now)
+            if promote:
+                self._loading.add(blog_id)
+        if promote:
+            self._executor.submit(self._load, blog_id, self._generation.get(blog_id, 0))
+
+        q = unit(query_vector)
+        if blog is None or blog.matrix.shape[1] != q.shape[0]:
+            metrics.incr("hot_tier.miss")
+            return None
+        metrics.incr("hot_tier.hit")
+        scores = blog.matrix @ q
+        if with_vectors:
+            return [(blog.texts[i], float(scores[i]), blog.matrix[i]) for i in top_k(scores, k)]
+        return [blog.texts[i] for i in top_k(scores, k)]
+
+    # -- loading --
+    def _load(self, blog_id: str, generation: int) -> None:
+        try:
+            texts, vectors = self._loader(blog_id)
+        except Exception as e:
+            print(f"DEBUG: Hot tier load failed for {blog_id}: {e}")
+            texts, vectors = [], []
+        now = time.monotonic()
+        with self._lock:
+            self._loading.discard(blog_id)
+            if self._generation.get(blog_id, 0) != generation:
+                reload = True  # re-indexed while we were reading; try again
+            elif not texts or len(texts) > self.max_chunks:
+                self._skip_until[blog_id] = now + self.half_life
+                return
+            else:
+                reload = False
+                self._blogs[blog_id] = _HotBlog(texts, vectors)
+                metrics.incr("hot_tier.promote")
+                while len(self._blogs) > self.max_blogs:
+                    coldest, _ = self._coldest(now)
+                    del self._blogs[coldest]
+                    metrics.incr("hot_tier.evict")
+            if reload:
+                self._loading.add(blog_id)
+        if reload:
+            self._executor.submit(self._load, blog_id, self._generation.get(blog_id, 0))
+
+    def refresh(self, blog_id: str) -> None:
+        """A blog was re-indexed: drop its stale copy and reload it if it was hot."""
+        with self._lock:
+            self._generation[blog_id] = self._generation.get(blog_id, 0) + 1
+            self._skip_until.pop(blog_id, None)
+            was_hot = self._blogs.pop(blog_id, None) is not None
+            reload = was_hot and blog_id not in self._loading
+            if reload:
+                self._loading.add(blog_id)
+        if reload:
+            self._executor.submit(self._load, blog_id, self._generation[blog_id])
+
+    def resident(self) -> Dict[str, int]:
+        with self._lock:
+            return {blog_id: len(blog.texts) for blog_id, blog in self._blogs.items()}
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
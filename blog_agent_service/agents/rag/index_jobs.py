@@ -0,0 +1,133 @@
+"""
+Background indexing queue for `/index`.
+
+`submit` returns a job right away; a bounded pool of worker threads runs
+them. At most one job per blog runs at a time, and a job that is still queued
+absorbs later submissions for the same blog (last write wins), so a burst of
+draft saves costs one index of the final text. When a job that any of its
+submissions asked to be notified about finishes, `notify(job)` is called with
+the outcome (the webhook to the configured callback URL).
+"""
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+
+class IndexJobQueue:
+    def __init__(
+        self,
+        run: Callable[[str, str], Any],
+        notify: Optional[Callable[[dict], None]] = None,
+        workers: int = 2,
+        max_jobs_kept: int = 1000,
+    ):
+        self._run = run
+        self._notify = notify
+        self._workers = max(1, workers)
+        self._max_jobs_kept = max_jobs_kept
+        self._cond = threading.Condition()
+        self._jobs: "OrderedDict[str, dict]" = OrderedDict()
+        self._pending: "OrderedDict[str, str]" = OrderedDict()  # blog_id -> queued job id
+        self._texts: Dict[str, str] = {}  # job id -> text, dropped once the job starts
+        self._notify_jobs: set = set()
+        self._running: set = set()
+        self._threads: List[threading.Thread] = []
+        self._closed = False
+
+    def submit(self, blog_id: str, text: str, notify: bool = False) -> dict:
+        with self._cond:
+            self._ensure_workers()
+            job_id = self._pending.get(blog_id)
+            if job_id is not None:
+                job = self._jobs[job_id]
+                job["collapsed"] += 1
+            else:
+                job_id = uuid.uuid4().hex
+                job = {
+                    "job_id": job_id, "blog_id": blog_id, "status": QUEUED, "collapsed": 0,
+                    "submitted_at": time.time(), "started_at": None, "finished_at": None,
+                    "result": None, "error": None,
+                }
+                self._jobs[job_id] = job
+                self._pending[blog_id] = job_id
+                self._trim()
+            self._texts[job_id] = text
+            if notify:
+                self._notify_jobs.add(job_id)
+            self._cond.notify()
+            return dict(job)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._cond:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def stats(self) -> dict:
+        with self._cond:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+            return {"workers": self._workers, "queued": len(self._pending), "running": len(self._running), "jobs": counts}
+
+    def _trim(self) -> None:
+        finished = [jid for jid, job in self._jobs.items() if job["status"] in (SUCCEEDED, FAILED)]
+        for jid in finished[: max(0, len(self._jobs) - self._max_jobs_kept)]:
+            del self._jobs[jid]
+
+    def _ensure_workers(self) -> None:
+        self._threads = [t for t in self._threads if t.is_alive()]
+        while len(self._threads) < self._workers:
+            thread = threading.Thread(target=self._work, name=f"index-worker-{len(self._threads)}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _next(self) -> Optional[str]:
+        for blog_id, job_id in self._pending.items():
+            if blog_id not in self._running:
+                del self._pending[blog_id]
+                self._running.add(blog_id)
+                return job_id
+        return None
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                job_id = self._next()
+                while job_id is None:
+                    if self._closed:
+                        return
+                    self._cond.wait()
+                    job_id = self._next()
+                job = self._jobs[job_id]
+                text = self._texts.pop(job_id)
+                job.update(status=RUNNING, started_at=time.time())
+
+            try:
+                result, error, status = self._run(job["blog_id"], text), None, SUCCEEDED
+            except Exception as e:
+                print(f"DEBUG: Index job {job_id} for blog {job['blog_id']} failed: {e}")
+                result, error, status = None, str(e), FAILED
+
+            with self._cond:
+                job.update(status=status, result=result, error=error, finished_at=time.time())
+                self._running.discard(job["blog_id"])
+                wanted = job_id in self._notify_jobs
+                self._notify_jobs.discard(job_id)
+                snapshot = dict(job)
+                self._cond.notify_all()
+            if self._notify is not None and wanted:
+                try:
+                    self._notify(snapshot)
+                except Exception as e:
+                    print(f"DEBUG: Index webhook for job {job_id} failed: {e}")
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
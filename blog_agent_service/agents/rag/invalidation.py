@@ -0,0 +1,120 @@
+"""
+Cross-worker "this blog changed" notifications over Redis pub/sub.
+
+`index_content` publishes the blog id on `rag:invalidate` after re-indexing;
+every agent worker runs one listener thread that hands the id to the local
+callbacks (L1 cache, hot-blog tier, ...). Callbacks must be idempotent: the
+publishing worker runs them directly and then again when its own message
+comes back.
+
+If the listener dies (Redis restart, dropped connection) it is restarted with
+exponential backoff; messages missed meanwhile are covered by the version
+cache TTL.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, List
+
+CHANNEL = "rag:invalidate"
+RESTART_MIN_DELAY = 1.0
+RESTART_MAX_DELAY = 30.0
+
+
+class InvalidationBus:
+    def __init__(self, redis_getter: Callable[[], Any], restart_delay: float = RESTART_MIN_DELAY):
+        self._redis = redis_getter
+        self._restart_delay = restart_delay
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[str], None]] = []
+        self._pubsub = None
+        self._thread = None
+        self._restart = None
+        self._backoff = restart_delay
+        self._closed = False
+
+    def subscribe(self, callback: Callable[[str], None]) -> None:
+        with self._lock:
+            self._callbacks.append(callback)
+        self._ensure_listener()
+
+    def publish(self, blog_id: str) -> None:
+        self._ensure_listener()
+        self._dispatch(blog_id)
+        try:
+            self._redis().publish(CHANNEL, blog_id)
+        except Exception as e:
+            print(f"Redis Invalidation Publish Error: {e}")
+
+    def _dispatch(self, blog_id: str) -> None:
+        with self._lock:
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            try:
+                callback(blog_id)
+            except Exception as e:
+                print(f"DEBUG: Invalidation callback failed for {blog_id}: {e}")
+
+    def _on_message(self, message) -> None:
+        data = message.get("data")
+        self._dispatch(data.decode("utf-8") if isinstance(data, bytes) else data)
+
+    def _on_listener_error(self, error, pubsub, thread) -> None:
+        print(f"Redis Invalidation Listener Error: {error}")
+        thread.stop()
+        try:
+            pubsub.close()
+        except Exception:
+            pass
+        self._restart_later()
+
+    def _restart_later(self) -> None:
+        with self._lock:
+            if self._closed or self._restart is not None:
+                return
+            delay = self._backoff
+            self._backoff = min(self._backoff * 2, RESTART_MAX_DELAY)
+            self._restart = threading.Timer(delay, self._restart_listener)
+            self._restart.daemon = True
+            self._restart.start()
+
+    def _restart_listener(self) -> None:
+        with self._lock:
+            self._restart = None
+            self._thread = None
+        self._ensure_listener()
+
+    def _ensure_listener(self) -> None:
+        with self._lock:
+            if self._closed or self._restart is not None:
+                return
+            if self._thread is not None and self._thread.is_alive():
+                return
+            try:
+                pubsub = self._redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(**{CHANNEL: self._on_message})
+                self._thread = pubsub.run_in_thread(
+                    sleep_time=1.0, daemon=True, exception_handler=self._on_listener_error
+                )
+                self._pubsub = pubsub
+                self._backoff = self._restart_delay
+                return
+            except Exception as e:
+                print(f"Redis Invalidation Listener Error: {e}")
+        self._restart_later()
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            if self._restart is not None:
+                self._restart.cancel()
+                self._restart = None
+        if self._thread is not None:
+            self._thread.stop()
+            self._thread = None
+        if self._pubsub is not None:
+            try:
+                self._pubsub.close()
+            except Exception:
+                pass
+            self._pubsub = None
@@ -0,0 +1,128 @@
+"""
+Per-worker L1 answer cache in front of Redis.
+
+Two tiers, both bounded and TTL'd like their Redis counterparts:
+
+- exact: LRU of (blog_id, normalized question) -> answer
+- semantic: for each recently active blog, a small matrix of recent question
+  embeddings; a query vector close enough (cosine) to one of them returns its
+  answer without the RediSearch KNN round trip.
+
+Entries for a blog are dropped when it is re-indexed (see `InvalidationBus`).
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import metrics
+from .vectors import unit
+
+
+class _BlogVectors:
+    """Fixed-size ring of (unit question vector, answer, expiry) for one blog."""
+
+    def __init__(self, capacity: int, dim: int):
+        self.matrix = np.zeros((capacity, dim), dtype=np.float32)
+        self.expires = np.zeros(capacity, dtype=np.float64)
+        self.answers = [None] * capacity
+        self.next = 0
+
+    def add(self, vector: np.ndarray, answer: str, expires_at: float) -> None:
+        slot = self.next
+        self.matrix[slot] = vector
+        self.expires[slot] = expires_at
+        self.answers[slot] = answer
+        self.next = (slot + 1) % len(self.answers)
+
+    def nearest(self, vector: np.ndarray, now: float) -> Tuple[float, Optional[str]]:
+        scores = self.matrix @ vector
+        scores[self.expires <= now] = -np.inf
+        best = int(np.argmax(scores))
+        if not np.isfinite(scores[best]):
+            return -1.0, None
+        return float(scores[best]), self.answers[best]
+
+
+class L1AnswerCache:
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        ttl: float = 300.0,
+        max_blogs: int = 64,
+        vectors_per_blog: int = 64,
+        max_distance: float = 0.2,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_blogs = max_blogs
+        self.vectors_per_blog = vectors_per_blog
+        self.max_distance = max_distance
+        self._lock = threading.Lock()
+        self._answers: "OrderedDict[Tuple[str, str], Tuple[str, float]]" = OrderedDict()
+        self._vectors: "OrderedDict[str, _BlogVectors]" = OrderedDict()
+
+    def get(self, blog_id: str, question_norm: str) -> Optional[str]:
+        key = (blog_id, question_norm)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._answers.get(key)
+            if entry is not None and entry[1] > now:
+                self._answers.move_to_end(key)
+                answer = entry[0]
+            else:
+                if entry is not None:
+                    del self._answers[key]
+                answer = None
+        metrics.incr("cache.l1_exact.hit" if answer is not None else "cache.l1_exact.miss")
+        return answer
+
+    def get_similar(self, blog_id: str, vector: Sequence[float]) -> Optional[str]:
+        q = unit(vector)
+        with self._lock:
+            store = self._vectors.get(blog_id)
+            if store is None or store.matrix.shape[1] != q.shape[0]:
+                score, answer = -1.0, None
+            else:
+                self._vectors.move_to_end(blog_id)
+                score, answer = store.nearest(q, time.monotonic())
+        if answer is not None and 1.0 - score < self.max_distance:
+            metrics.incr("cache.l1_semantic.hit")
+            return answer
+        metrics.incr("cache.l1_semantic.miss")
+        return None
+
+    def put(self, blog_id: str, question_norm: str, answer: str, vector: Optional[Sequence[float]] = None) -> None:
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            key = (blog_id, question_norm)
+            self._answers[key] = (answer, expires_at)
+            self._answers.move_to_end(key)
+            while len(self._answers) > self.max_entries:
+                self._answers.popitem(last=False)
+
+            if vector is None:
+                return
+            q = unit(vector)
+            store = self._vectors.get(blog_id)
+            if store is None or store.matrix.shape[1] != q.shape[0]:
+                store = self._vectors[blog_id] = _BlogVectors(self.vectors_per_blog, q.shape[0])
+            self._vectors.move_to_end(blog_id)
+            store.add(q, answer, expires_at)
+            while len(self._vectors) > self.max_blogs:
+                self._vectors.popitem(last=False)
+
+    def invalidate_blog(self, blog_id: str) -> None:
+        with self._lock:
+            for key in [k for k in self._answers if k[0] == blog_id]:
+                del self._answers[key]
+            self._vectors.pop(blog_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._answers.clear()
+            self._vectors.clear()
@@ -0,0 +1,46 @@
+"""
+In-process counters and timing summaries for the RAG pipeline.
+
+Counters are plain integers (`cache.l1_exact.hit`); observations keep count,
+sum and max (`llm.ttft_ms`). `snapshot()` is served by the agent's /metrics.
+"""
+from __future__ import annotations
+
+import threading
+from collections import defaultdict
+from typing import Dict
+
+_lock = threading.Lock()
+_counters: Dict[str, int] = defaultdict(int)
+_observations: Dict[str, Dict[str, float]] = {}
+
+
+def incr(name: str, value: int = 1) -> None:
+    with _lock:
+        _counters[name] += value
+
+
+def observe(name: str, value: float) -> None:
+    with _lock:
+        stat = _observations.get(name)
+        if stat is None:
+            stat = _observations[name] = {"count": 0, "sum": 0.0, "max": value}
+        stat["count"] += 1
+        stat["sum"] += value
+        stat["max"] = max(stat["max"], value)
+
+
+def snapshot() -> dict:
+    with _lock:
+        counters = dict(_counters)
+        observations = {
+            name: {**stat, "avg": stat["sum"] / stat["count"] if stat["count"] else 0.0}
+            for name, stat in _observations.items()
+        }
+    return {"counters": counters, "observations": observations}
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
+        _observations.clear()
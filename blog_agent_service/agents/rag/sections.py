@@ -0,0 +1,84 @@
+"""
+Parent-section records for small-to-big retrieval.
+
+Search runs over small child chunks in the main collection. Each blog's
+section-sized parents live in a separate, vector-less collection
+(`blog_sections`) with the same `blog_id` / `index_versions` payload, so they
+flip to a new index version together with their children.
+
+`SectionCache` keeps the active sections of recently queried blogs in
+process (a blog has a handful of them). Entries are dropped through the
+invalidation bus when a blog is re-indexed.
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, List, Optional
+
+from . import metrics
+
+SectionLoader = Callable[[str], List[str]]
+
+
+def qdrant_section_loader(
+    client_getter: Callable[[], Any],
+    collection: str,
+    filter_fn: Callable[[str], Any],
+    page_size: int = 256,
+) -> SectionLoader:
+    """Loader that scrolls a blog's section texts, in document order."""
+    def load(blog_id: str) -> List[str]:
+        client = client_getter()
+        rows, offset = [], None
+        while True:
+            points, offset = client.scroll(
+                collection_name=collection,
+                scroll_filter=filter_fn(blog_id),
+                limit=page_size,
+                offset=offset,
+                with_payload=["text", "char_start"],
+                with_vectors=False,
+            )
+            rows.extend((p.payload.get("char_start", 0), p.payload["text"]) for p in points)
+            if offset is None:
+                return [text for _, text in sorted(rows)]
+    return load
+
+
+class SectionCache:
+    def __init__(self, loader: SectionLoader, max_blogs: int = 256):
+        self._loader = loader
+        self.max_blogs = max_blogs
+        self._lock = threading.Lock()
+        self._blogs: "OrderedDict[str, List[str]]" = OrderedDict()
+
+    def cached(self, blog_id: str) -> Optional[List[str]]:
+        with self._lock:
+            sections = self._blogs.get(blog_id)
+            if sections is not None:
+                self._blogs.move_to_end(blog_id)
+            return sections
+
+    def get(self, blog_id: str) -> List[str]:
+        """The blog's sections; [] when it has none or they cannot be loaded right now."""
+        sections = self.cached(blog_id)
+        if sections is not None:
+            metrics.incr("sections.hit")
+            return sections
+        metrics.incr("sections.miss")
+        try:
+            sections = self._loader(blog_id)
+        except Exception as e:
+            # Not cached, so the next query retries
+            print(f"DEBUG: Section load failed for {blog_id}: {e}")
+            return []
+        with self._lock:
+            self._blogs[blog_id] = sections
+            while len(self._blogs) > self.max_blogs:
+                self._blogs.popitem(last=False)
+        return sections
+
+    def invalidate(self, blog_id: str) -> None:
+        with self._lock:
+            self._blogs.pop(blog_id, None)
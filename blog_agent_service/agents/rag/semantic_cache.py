@@ -0,0 +1,405 @@
+"""
+Shared RediSearch semantic cache.
+
+Every cached answer lives in one HNSW index (`semcache:idx`) as a hash
+`semcache:doc:{blog_id}:{question_hash}` with `blog_id` as a TAG field. Lookups
+are KNN queries pre-filtered on the blog's tag, so the number of RediSearch
+indexes no longer grows with the number of blogs.
+
+The cache is bounded:
+
+- every entry expires after `SEMANTIC_CACHE_TTL`, and each hit stretches the
+  TTL logarithmically with its hit count (capped at `SEMANTIC_CACHE_MAX_TTL`),
+- each blog keeps at most `SEMANTIC_CACHE_MAX_PER_BLOG` entries,
+- all entries together stay under `SEMANTIC_CACHE_MAX_BYTES` (estimated),
+
+and eviction picks the least-frequently hit entry (LFU) from a per-blog or
+global sorted set. Inserts, hits and evictions run as Lua scripts so the
+bookkeeping stays consistent with the documents. The scripts touch the
+evicted blog's keys dynamically, which is fine on a single Redis shard.
+
+Exact-match answers (`exact_cache:{blog_id}:{question_hash}`) are plain
+strings; each blog also keeps a sorted set of its exact keys scored by expiry
+time, so a flush deletes them directly instead of scanning the keyspace.
+
+Sync helpers take a `redis.Redis`; the `a*` helpers take a `redis.asyncio.Redis`.
+"""
+from __future__ import annotations
+
+import re
+import time
+from typing import Any, List, Optional, Sequence
+
+import numpy as np
+
+from . import config
+
+INDEX_NAME = "semcache:idx"
+KEY_PREFIX = "semcache:doc:"
+GLOBAL_LFU_KEY = "semcache:lfu"
+SIZES_KEY = "semcache:sizes"
+TOTAL_BYTES_KEY = "semcache:bytes"
+BLOGS_KEY = "semcache:blogs"
+
+# Rough per-entry overhead (hash fields, HNSW links, bookkeeping) on top of the payload.
+ENTRY_OVERHEAD_BYTES = 256
+
+_index_ready = False
+_aindex_ready = False
+
+
+def doc_key(blog_id: str, question_hash: str) -> str:
+    return f"{KEY_PREFIX}{blog_id}:{question_hash}"
+
+
+def exact_key(blog_id: str, question_hash: str) -> str:
+    return f"exact_cache:{blog_id}:{question_hash}"
+
+
+def exact_keys_key(blog_id: str) -> str:
+    return f"exact_cache_keys:{blog_id}"
+
+
+def blog_lfu_key(blog_id: str) -> str:
+    return f"semcache:lfu:{blog_id}"
+
+
+def blog_stats_key(blog_id: str) -> str:
+    return f"semcache:stats:{blog_id}"
+
+
+def to_bytes(vector: Sequence[float]) -> bytes:
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+
+def _escape_tag(value: str) -> str:
+    return re.sub(r"([^A-Za-z0-9_])", r"\\\1", value)
+
+
+# -----------------------------
+# Index definition
+# -----------------------------
+def _index_args(dim: int):
+    from redis.commands.search.field import TagField, TextField, VectorField
+    from redis.commands.search.indexDefinition import IndexDefinition, IndexType
+    fields = [
+        TagField("blog_id"),
+        TextField("question"),
+        VectorField("embedding", "HNSW", {
+            "TYPE": "FLOAT32",
+            "DIM": dim,
+            "DISTANCE_METRIC": "COSINE",
+        }),
+    ]
+    definition = IndexDefinition(prefix=[KEY_PREFIX], index_type=IndexType.HASH)
+    return fields, definition
+
+
+def _is_missing_index(error: Exception) -> bool:
+    message = str(error).lower()
+    return "unknown index" in message or "no such index" in message
+
+
+def ensure_index(r, dim: int) -> None:
+    """Create the shared index on first use."""
+    global _index_ready
+    if _index_ready:
+        return
+    from redis.exceptions import ResponseError
+    try:
+        r.ft(INDEX_NAME).info()
+    except ResponseError as e:
+        if not _is_missing_index(e):
+            raise
+        fields, definition = _index_args(dim)
+        r.ft(INDEX_NAME).create_index(fields, definition=definition)
+        print(f"DEBUG: Created semantic cache index '{INDEX_NAME}' (dim={dim})")
+    _index_ready = True
+
+
+async def aensure_index(r, dim: int) -> None:
+    global _aindex_ready
+    if _aindex_ready:
+        return
+    from redis.exceptions import ResponseError
+    try:
+        await r.ft(INDEX_NAME).info()
+    except ResponseError as e:
+        if not _is_missing_index(e):
+            raise
+        fields, definition = _index_args(dim)
+        await r.ft(INDEX_NAME).create_index(fields, definition=definition)
+        print(f"DEBUG: Created semantic cache index '{INDEX_NAME}' (dim={dim})")
+    _aindex_ready = True
+
+
+# -----------------------------
+# Bookkeeping scripts
+# -----------------------------
+_DROP_FN = """
+local function drop(victim)
+  local blog = string.match(victim, '^semcache:doc:(.*):[^:]+$') or ''
+  local size = tonumber(redis.call('HGET', 'semcache:sizes', victim) or '0')
+  redis.call('DEL', victim)
+  redis.call('HDEL', 'semcache:sizes', victim)
+  redis.call('ZREM', 'semcache:lfu', victim)
+  redis.call('ZREM', 'semcache:lfu:' .. blog, victim)
+  redis.call('DECRBY', 'semcache:bytes', size)
+  redis.call('HINCRBY', 'semcache:stats:' .. blog, 'bytes', -size)
+  return size
+end
+"""
+
+# KEYS: doc, blog lfu, blog stats
+# ARGV: blog_id, question, answer, embedding, ttl, size, max_per_blog, max_bytes
+STORE_SCRIPT = _DROP_FN + """
+local size = tonumber(ARGV[6])
+local old = tonumber(redis.call('HGET', 'semcache:sizes', KEYS[1]) or '0')
+local evicted = 0
+if old == 0 then
+  -- Make room before inserting so the newcomer is never its own victim
+  while redis.call('ZCARD', KEYS[2]) >= tonumber(ARGV[7]) do
+    local popped = redis.call('ZRANGE', KEYS[2], 0, 0)
+    if #popped == 0 then break end
+    drop(popped[1]); evicted = evicted + 1
+  end
+end
+while tonumber(redis.call('GET', 'semcache:bytes') or '0') - old + size > tonumber(ARGV[8]) do
+  local popped = redis.call('ZRANGE', 'semcache:lfu', 0, 0)
+  if #popped == 0 or popped[1] == KEYS[1] then break end
+  drop(popped[1]); evicted = evicted + 1
+end
+redis.call('HSET', KEYS[1], 'blog_id', ARGV[1], 'question', ARGV[2], 'answer', ARGV[3], 'embedding', ARGV[4])
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+redis.call('ZADD', KEYS[2], 'NX', 0, KEYS[1])
+redis.call('ZADD', 'semcache:lfu', 'NX', 0, KEYS[1])
+redis.call('HSET', 'semcache:sizes', KEYS[1], size)
+redis.call('INCRBY', 'semcache:bytes', size - old)
+redis.call('HINCRBY', KEYS[3], 'bytes', size - old)
+if evicted > 0 then redis.call('HINCRBY', KEYS[3], 'evictions', evicted) end
+redis.call('SADD', 'semcache:blogs', ARGV[1])
+return evicted
+"""
+
+# KEYS: doc, blog lfu, blog stats; ARGV: base ttl, max ttl
+HIT_SCRIPT = """
+local hits = redis.call('ZINCRBY', KEYS[2], 1, KEYS[1])
+redis.call('ZINCRBY', 'semcache:lfu', 1, KEYS[1])
+redis.call('HINCRBY', KEYS[3], 'hits', 1)
+local ttl = math.floor(tonumber(ARGV[1]) * (1 + math.log(1 + tonumber(hits)) / math.log(2)))
+ttl = math.min(ttl, tonumber(ARGV[2]))
+if redis.call('TTL', KEYS[1]) < ttl then redis.call('EXPIRE', KEYS[1], ttl) end
+return tonumber(hits)
+"""
+
+# KEYS: blog lfu. Drops bookkeeping for entries whose document already expired.
+SWEEP_SCRIPT = _DROP_FN + """
+local dropped = 0
+for _, member in ipairs(redis.call('ZRANGE', KEYS[1], 0, -1)) do
+  if redis.call('EXISTS', member) == 0 then drop(member); dropped = dropped + 1 end
+end
+return dropped
+"""
+
+# KEYS: blog's exact key set
+EXACT_FLUSH_SCRIPT = """
+local removed = 0
+for _, key in ipairs(redis.call('ZRANGE', KEYS[1], 0, -1)) do
+  removed = removed + redis.call('DEL', key)
+end
+redis.call('DEL', KEYS[1])
+return removed
+"""
+
+# KEYS: blog lfu, blog stats; ARGV: blog_id
+FLUSH_SCRIPT = _DROP_FN + """
+local members = redis.call('ZRANGE', KEYS[1], 0, -1)
+for _, member in ipairs(members) do drop(member) end
+redis.call('DEL', KEYS[1], KEYS[2])
+redis.call('SREM', 'semcache:blogs', ARGV[1])
+return #members
+"""
+
+
+def _entry_size(question: str, answer: str, embedding: bytes) -> int:
+    return len(question.encode()) + len(answer.encode()) + len(embedding) + ENTRY_OVERHEAD_BYTES
+
+
+def _store_args(blog_id, question_hash, question, answer, vector):
+    key = doc_key(blog_id, question_hash)
+    embedding = to_bytes(vector)
+    keys = [key, blog_lfu_key(blog_id), blog_stats_key(blog_id)]
+    args = [
+        blog_id, question, answer, embedding, config.SEMANTIC_CACHE_TTL,
+        _entry_size(question, answer, embedding),
+        config.SEMANTIC_CACHE_MAX_PER_BLOG, config.SEMANTIC_CACHE_MAX_BYTES,
+    ]
+    return key, keys, args
+
+
+def _hit_args(blog_id, key):
+    keys = [key, blog_lfu_key(blog_id), blog_stats_key(blog_id)]
+    return keys, [config.SEMANTIC_CACHE_TTL, config.SEMANTIC_CACHE_MAX_TTL]
+
+
+# -----------------------------
+# Lookup / store
+# -----------------------------
+def knn_query(blog_id: str, k: int = 1):
+    from redis.commands.search.query import Query
+    return (
+        Query(f"(@blog_id:{{{_escape_tag(blog_id)}}})=>[KNN {k} @embedding $vec AS distance]")
+        .sort_by("distance")
+        .return_fields("answer", "distance")
+        .paging(0, k)
+        .dialect(2)
+    )
+
+
+def _best(result, max_distance: float) -> Optional[Any]:
+    docs: List[Any] = getattr(result, "docs", [])
+    if not docs:
+        return None
+    doc = docs[0]
+    if float(doc.distance) >= max_distance:
+        return None
+    return doc
+
+
+def search(r, blog_id: str, vector: Sequence[float], max_distance: float) -> Optional[str]:
+    """Return the cached answer of the nearest question for this blog, if close enough."""
+    ensure_index(r, len(vector))
+    result = r.ft(INDEX_NAME).search(knn_query(blog_id), query_params={"vec": to_bytes(vector)})
+    doc = _best(result, max_distance)
+    if doc is None:
+        r.hincrby(blog_stats_key(blog_id), "misses", 1)
+        return None
+    keys, args = _hit_args(blog_id, doc.id)
+    r.register_script(HIT_SCRIPT)(keys=keys, args=args)
+    return _text(doc.answer)
+
+
+async def asearch(r, blog_id: str, vector: Sequence[float], max_distance: float) -> Optional[str]:
+    await aensure_index(r, len(vector))
+    result = await r.ft(INDEX_NAME).search(knn_query(blog_id), query_params={"vec": to_bytes(vector)})
+    doc = _best(result, max_distance)
+    if doc is None:
+        await r.hincrby(blog_stats_key(blog_id), "misses", 1)
+        return None
+    keys, args = _hit_args(blog_id, doc.id)
+    await r.register_script(HIT_SCRIPT)(keys=keys, args=args)
+    return _text(doc.answer)
+
+
+def store(r, blog_id: str, question_hash: str, question: str, answer: str, vector: Sequence[float]) -> str:
+    ensure_index(r, len(vector))
+    key, keys, args = _store_args(blog_id, question_hash, question, answer, vector)
+    r.register_script(STORE_SCRIPT)(keys=keys, args=args)
+    return key
+
+
+async def astore(r, blog_id: str, question_hash: str, question: str, answer: str, vector: Sequence[float]) -> str:
+    await aensure_index(r, len(vector))
+    key, keys, args = _store_args(blog_id, question_hash, question, answer, vector)
+    await r.register_script(STORE_SCRIPT)(keys=keys, args=args)
+    return key
+
+
+# -----------------------------
+# Admin
+# -----------------------------
+def _exact_commands(pipe, blog_id: str, question_hash: str, answer: str, ttl: int):
+    key, index, now = exact_key(blog_id, question_hash), exact_keys_key(blog_id), time.time()
+    pipe.setex(key, ttl, answer)
+    pipe.zadd(index, {key: now + ttl})
+    pipe.zremrangebyscore(index, "-inf", now)  # members whose answer already expired
+    pipe.expire(index, ttl)
+    return pipe
+
+
+def store_exact(r, blog_id: str, question_hash: str, answer: str, ttl: int) -> None:
+    """Cache an exact-match answer and record its key under the blog."""
+    _exact_commands(r.pipeline(), blog_id, question_hash, answer, ttl).execute()
+
+
+async def astore_exact(r, blog_id: str, question_hash: str, answer: str, ttl: int) -> None:
+    await _exact_commands(r.pipeline(), blog_id, question_hash, answer, ttl).execute()
+
+
+def _stats_row(blog_id: str, entries: int, raw: dict) -> dict:
+    fields = {_text(k): int(v) for k, v in (raw or {}).items()}
+    hits, misses = fields.get("hits", 0), fields.get("misses", 0)
+    lookups = hits + misses
+    return {
+        "blog_id": blog_id,
+        "entries": entries,
+        "bytes": max(fields.get("bytes", 0), 0),
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / lookups, 4) if lookups else None,
+        "evictions": fields.get("evictions", 0),
+    }
+
+
+def blog_stats(r, blog_id: str) -> dict:
+    """Entry count, hit rate and bytes for one blog, after dropping expired entries."""
+    r.register_script(SWEEP_SCRIPT)(keys=[blog_lfu_key(blog_id)])
+    pipe = r.pipeline(transaction=False)
+    pipe.zcard(blog_lfu_key(blog_id))
+    pipe.hgetall(blog_stats_key(blog_id))
+    entries, raw = pipe.execute()
+    return _stats_row(blog_id, entries, raw)
+
+
+def all_stats(r) -> dict:
+    """Per-blog rows plus global totals. Entry counts may include not-yet-swept expired docs."""
+    blogs = sorted(_text(b) for b in r.smembers(BLOGS_KEY))
+    pipe = r.pipeline(transaction=False)
+    for blog_id in blogs:
+        pipe.zcard(blog_lfu_key(blog_id))
+        pipe.hgetall(blog_stats_key(blog_id))
+    results = pipe.execute()
+    rows = [_stats_row(b, results[2 * i], results[2 * i + 1]) for i, b in enumerate(blogs)]
+    return {
+        "total_bytes": int(r.get(TOTAL_BYTES_KEY) or 0),
+        "max_bytes": config.SEMANTIC_CACHE_MAX_BYTES,
+        "max_entries_per_blog": config.SEMANTIC_CACHE_MAX_PER_BLOG,
+        "blogs": rows,
+    }
+
+
+def flush_blog(r, blog_id: str) -> int:
+    """Drop every semantic and exact cache entry of one blog. Returns entries removed."""
+    removed = r.register_script(FLUSH_SCRIPT)(
+        keys=[blog_lfu_key(blog_id), blog_stats_key(blog_id)], args=[blog_id]
+    )
+    exact_removed = r.register_script(EXACT_FLUSH_SCRIPT)(keys=[exact_keys_key(blog_id)])
+    return int(removed) + int(exact_removed)
+
+
+def reset(r) -> int:
+    """
+    Drop the index and every semantic cache key, e.g. after the embedding size
+    changed. The index is re-created at the new size on the next store by a
+    freshly started process. Exact-match answers are kept. Returns keys removed.
+    """
+    from redis.exceptions import ResponseError
+    try:
+        r.ft(INDEX_NAME).dropindex(delete_documents=False)
+    except ResponseError as e:
+        if not _is_missing_index(e):
+            raise
+    removed = 0
+    batch = []
+    for key in r.scan_iter(match="semcache:*", count=500):
+        batch.append(key)
+        if len(batch) >= 500:
+            removed += r.unlink(*batch)
+            batch = []
+    if batch:
+        removed += r.unlink(*batch)
+    return removed
+
+
+def _text(value: Any) -> Any:
+    return value.decode("utf-8") if isinstance(value, bytes) else value
@@ -0,0 +1,487 @@
+"""
+Single-flight request coalescing keyed on (blog_id, question_hash).
+
+Only one caller per key computes an answer; everyone else waits for it:
+
+- In-process followers wait on the leader's future.
+- Followers in other workers are woken over Redis pub/sub instead of polling.
+  Each worker subscribes to its own inbox channel only; a follower adds its
+  worker's inbox to the key's waiter set, and the leader publishes the result
+  to just those inboxes, so workers never receive answers nobody there asked for.
+- "Return the cached answer, become the leader or join the waiters" happens in
+  one atomic Lua script, so a follower never races the leader's cache write or
+  its publish.
+- When the leader fails, its error is published and re-raised in every
+  follower as `LeaderError`.
+
+If Redis is unavailable we degrade to in-process coalescing only.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from . import metrics
+
+# -----------------------------
+# Redis scripts
+# -----------------------------
+HIT, LEADER, FOLLOWER = 1, 2, 3
+
+# KEYS[1] = answer cache key, KEYS[2] = lock key, KEYS[3] = waiter set
+# ARGV[1] = token, ARGV[2] = lock ttl, ARGV[3] = this worker's inbox channel
+ACQUIRE_SCRIPT = """
+local cached = redis.call('GET', KEYS[1])
+if cached then return {1, cached} end
+if redis.call('SET', KEYS[2], ARGV[1], 'NX', 'EX', ARGV[2]) then return {2, ''} end
+redis.call('SADD', KEYS[3], ARGV[3])
+redis.call('EXPIRE', KEYS[3], ARGV[2])
+return {3, ''}
+"""
+
+# KEYS[1] = lock key, KEYS[2] = waiter set; ARGV[1] = token, ARGV[2] = message
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then redis.call('DEL', KEYS[1]) end
+for _, inbox in ipairs(redis.call('SMEMBERS', KEYS[2])) do
+  redis.call('PUBLISH', inbox, ARGV[2])
+end
+redis.call('DEL', KEYS[2])
+return 1
+"""
+
+
+class LeaderError(Exception):
+    """The leader computing this key failed; str() is the leader's error message."""
+
+
+def _encode(key: str, ok: bool, value: Any) -> str:
+    return json.dumps({"key": key, "ok": ok, "value": value})
+
+
+def _parse(data: Any) -> dict:
+    if isinstance(data, bytes):
+        data = data.decode("utf-8")
+    return json.loads(data)
+
+
+def _decode(message: dict) -> Any:
+    if not message.get("ok"):
+        raise LeaderError(message.get("value") or "Leader failed")
+    return message.get("value")
+
+
+def _as_text(value: Any) -> Any:
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+class _Keys:
+    def __init__(self, prefix: str, key: str):
+        self.lock = f"{prefix}:lock:{key}"
+        self.waiters = f"{prefix}:waiters:{key}"
+
+
+def _inbox(prefix: str) -> str:
+    return f"{prefix}:inbox:{uuid.uuid4().hex}"
+
+
+# -----------------------------
+# Threaded (sync) variant
+# -----------------------------
+class SingleFlight:
+    """Coalesce concurrent calls for the same key across threads and workers."""
+
+    def __init__(
+        self,
+        redis_getter: Callable[[], Any],
+        prefix: str = "sf",
+        lock_ttl: int = 60,
+        wait_timeout: float = 30.0,
+        poll_interval: float = 5.0,
+    ):
+        self._redis = redis_getter
+        self._prefix = prefix
+        self._lock_ttl = lock_ttl
+        self._wait_timeout = wait_timeout
+        self._poll_interval = poll_interval
+        self._inbox = _inbox(prefix)
+        self._mutex = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self._waiters: Dict[str, List[Future]] = {}
+        self._pubsub = None
+        self._thread = None
+        self._acquire = None
+        self._release = None
+
+    def do(self, key: str, cache_key: Optional[str], fn: Callable[[], Any]) -> Any:
+        with self._mutex:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = Future()
+                self._inflight[key] = call
+        if not leader:
+            try:
+                return call.result(timeout=self._wait_timeout)
+            except FutureTimeout:
+                print(f"DEBUG: Single-flight wait timed out for {key}, computing locally")
+                return fn()
+            except LeaderError:
+                raise
+            except Exception as e:
+                raise LeaderError(str(e)) from e
+
+        try:
+            result = self._do_distributed(key, cache_key, fn)
+        except BaseException as e:
+            call.set_exception(e if isinstance(e, Exception) else LeaderError("Leader cancelled"))
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            with self._mutex:
+                self._inflight.pop(key, None)
+
+    def _do_distributed(self, key, cache_key, fn):
+        keys = _Keys(self._prefix, key)
+        try:
+            r = self._redis()
+            self._ensure_listener(r)
+        except Exception as e:
+            print(f"Redis Single-Flight Error: {e}")
+            return fn()
+
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self._wait_timeout
+        while True:
+            waiter = self._register(key)
+            try:
+                status, value = self._acquire(
+                    keys=[cache_key or keys.lock + ":none", keys.lock, keys.waiters],
+                    args=[token, self._lock_ttl, self._inbox],
+                    client=r,
+                )
+            except Exception as e:
+                self._unregister(key, waiter)
+                print(f"Redis Single-Flight Error: {e}")
+                return fn()
+
+            if status == HIT:
+                self._unregister(key, waiter)
+                metrics.incr("cache.redis_exact.hit")
+                return _as_text(value)
+            if status == LEADER:
+                self._unregister(key, waiter)
+                metrics.incr("cache.redis_exact.miss")
+                break
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._unregister(key, waiter)
+                print(f"DEBUG: Single-flight wait timed out for {key}, computing locally")
+                return fn()
+            try:
+                return _decode(waiter.result(timeout=min(remaining, self._poll_interval)))
+            except FutureTimeout:
+                # Missed wake-up or a dead leader: re-check the cache / lock
+                continue
+            finally:
+                self._unregister(key, waiter)
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(r, keys, token, _encode(key, False, str(e) or type(e).__name__))
+            raise
+        self._finish(r, keys, token, _encode(key, True, result))
+        return result
+
+    def _finish(self, r, keys, token, message):
+        try:
+            self._release(keys=[keys.lock, keys.waiters], args=[token, message], client=r)
+        except Exception as e:
+            print(f"Redis Single-Flight Release Error: {e}")
+
+    # -- pub/sub plumbing --
+    def _register(self, key: str) -> Future:
+        waiter = Future()
+        with self._mutex:
+            self._waiters.setdefault(key, []).append(waiter)
+        return waiter
+
+    def _unregister(self, key: str, waiter: Future) -> None:
+        with self._mutex:
+            waiters = self._waiters.get(key)
+            if waiters and waiter in waiters:
+                waiters.remove(waiter)
+                if not waiters:
+                    del self._waiters[key]
+
+    def _on_message(self, message) -> None:
+        try:
+            result = _parse(message.get("data"))
+        except ValueError as e:
+            print(f"DEBUG: Bad single-flight message: {e}")
+            return
+        with self._mutex:
+            waiters = self._waiters.pop(result.get("key"), [])
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(result)
+
+    def _on_listener_error(self, error, pubsub, thread) -> None:
+        print(f"Redis Single-Flight Listener Error: {error}")
+        thread.stop()
+        try:
+            pubsub.close()
+        except Exception:
+            pass
+
+    def _ensure_listener(self, r) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._mutex:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            if self._acquire is None:
+                self._acquire = r.register_script(ACQUIRE_SCRIPT)
+                self._release = r.register_script(RELEASE_SCRIPT)
+            pubsub = r.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{self._inbox: self._on_message})
+            self._pubsub = pubsub
+            self._thread = pubsub.run_in_thread(
+                sleep_time=1.0, daemon=True, exception_handler=self._on_listener_error
+            )
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._thread.stop()
+            self._thread = None
+        if self._pubsub is not None:
+            try:
+                self._pubsub.close()
+            except Exception:
+                pass
+            self._pubsub = None
+
+
+# -----------------------------
+# asyncio variant
+# -----------------------------
+class Flight:
+    """Leadership of one key. Call `resolve` or `reject` exactly once."""
+
+    def __init__(self, owner: "AsyncSingleFlight", key: str, token: Optional[str], r: Any,
+                 detached: bool = False):
+        self._owner = owner
+        self.key = key
+        self._token = token
+        self._redis = r
+        self._detached = detached
+        self._done = False
+
+    async def resolve(self, value: Any) -> None:
+        await self._settle(True, value)
+
+    async def reject(self, error: BaseException) -> None:
+        await self._settle(False, str(error) or type(error).__name__)
+
+    async def _settle(self, ok: bool, value: Any) -> None:
+        if self._done:
+            return
+        self._done = True
+        if not self._detached:
+            self._owner._settle_local(self.key, ok, value)
+        if self._token is not None:
+            await self._owner._finish(self._redis, self.key, self._token, _encode(self.key, ok, value))
+
+
+class AsyncSingleFlight:
+    """asyncio flavour of `SingleFlight` for the async query path."""
+
+    def __init__(
+        self,
+        redis_getter: Callable[[], Any],
+        prefix: str = "sf",
+        lock_ttl: int = 60,
+        wait_timeout: float = 30.0,
+        poll_interval: float = 5.0,
+    ):
+        self._redis = redis_getter
+        self._prefix = prefix
+        self._lock_ttl = lock_ttl
+        self._wait_timeout = wait_timeout
+        self._poll_interval = poll_interval
+        self._inbox = _inbox(prefix)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._waiters: Dict[str, List[asyncio.Future]] = {}
+        self._listener: Optional[asyncio.Task] = None
+        self._ready: Optional[asyncio.Event] = None
+        self._acquire = None
+        self._release = None
+
+    async def do(self, key: str, cache_key: Optional[str], fn: Callable[[], Awaitable[Any]]) -> Any:
+        value, flight = await self.acquire(key, cache_key)
+        if flight is None:
+            return value
+        try:
+            result = await fn()
+        except BaseException as e:
+            await asyncio.shield(flight.reject(e))
+            raise
+        await flight.resolve(result)
+        return result
+
+    async def acquire(self, key: str, cache_key: Optional[str]) -> Tuple[Any, Optional[Flight]]:
+        """Return `(answer, None)` when one is available, else `(None, flight)` to lead."""
+        call = self._inflight.get(key)
+        if call is not None:
+            try:
+                return await asyncio.wait_for(asyncio.shield(call), self._wait_timeout), None
+            except asyncio.TimeoutError:
+                print(f"DEBUG: Single-flight wait timed out for {key}, computing locally")
+                return None, Flight(self, key, None, None, detached=True)
+
+        self._inflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            value, token, r = await self._acquire_distributed(key, cache_key)
+        except BaseException as e:
+            self._settle_local(key, False, str(e) or type(e).__name__)
+            raise
+        if token is None and value is not None:
+            self._settle_local(key, True, value)
+            return value, None
+        return None, Flight(self, key, token, r)
+
+    async def _acquire_distributed(self, key, cache_key):
+        keys = _Keys(self._prefix, key)
+        try:
+            r = self._redis()
+            await self._ensure_listener(r)
+        except Exception as e:
+            print(f"Redis Single-Flight Error: {e}")
+            return None, None, None
+
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self._wait_timeout
+        while True:
+            waiter = self._register(key)
+            try:
+                status, value = await self._acquire(
+                    keys=[cache_key or keys.lock + ":none", keys.lock, keys.waiters],
+                    args=[token, self._lock_ttl, self._inbox],
+                    client=r,
+                )
+            except Exception as e:
+                self._unregister(key, waiter)
+                print(f"Redis Single-Flight Error: {e}")
+                return None, None, None
+
+            if status == HIT:
+                self._unregister(key, waiter)
+                metrics.incr("cache.redis_exact.hit")
+                return _as_text(value), None, None
+            if status == LEADER:
+                self._unregister(key, waiter)
+                metrics.incr("cache.redis_exact.miss")
+                return None, token, r
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._unregister(key, waiter)
+                print(f"DEBUG: Single-flight wait timed out for {key}, computing locally")
+                return None, None, None
+            try:
+                data = await asyncio.wait_for(waiter, min(remaining, self._poll_interval))
+                return _decode(data), None, None
+            except asyncio.TimeoutError:
+                continue
+            finally:
+                self._unregister(key, waiter)
+
+    def _settle_local(self, key: str, ok: bool, value: Any) -> None:
+        call = self._inflight.pop(key, None)
+        if call is None or call.done():
+            return
+        if ok:
+            call.set_result(value)
+        else:
+            call.set_exception(LeaderError(value))
+            # Nobody may be awaiting it; don't log "exception was never retrieved"
+            call.exception()
+
+    async def _finish(self, r, key, token, message):
+        keys = _Keys(self._prefix, key)
+        try:
+            await self._release(keys=[keys.lock, keys.waiters], args=[token, message], client=r)
+        except Exception as e:
+            print(f"Redis Single-Flight Release Error: {e}")
+
+    # -- pub/sub plumbing --
+    def _register(self, key: str) -> asyncio.Future:
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(key, []).append(waiter)
+        return waiter
+
+    def _unregister(self, key: str, waiter: asyncio.Future) -> None:
+        waiters = self._waiters.get(key)
+        if waiters and waiter in waiters:
+            waiters.remove(waiter)
+            if not waiters:
+                del self._waiters[key]
+
+    async def _ensure_listener(self, r) -> None:
+        if self._acquire is None:
+            self._acquire = r.register_script(ACQUIRE_SCRIPT)
+            self._release = r.register_script(RELEASE_SCRIPT)
+        if self._listener is None or self._listener.done():
+            self._ready = asyncio.Event()
+            self._listener = asyncio.create_task(self._listen())
+        if not self._ready.is_set():
+            try:
+                await asyncio.wait_for(self._ready.wait(), 1.0)
+            except asyncio.TimeoutError:
+                pass  # the poll interval covers a late subscription
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = None
+            try:
+                pubsub = self._redis().pubsub(ignore_subscribe_messages=True)
+                await pubsub.subscribe(self._inbox)
+                self._ready.set()
+                async for message in pubsub.listen():
+                    try:
+                        result = _parse(message.get("data"))
+                    except ValueError as e:
+                        print(f"DEBUG: Bad single-flight message: {e}")
+                        continue
+                    for waiter in self._waiters.pop(result.get("key"), []):
+                        if not waiter.done():
+                            waiter.set_result(result)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Redis Single-Flight Listener Error: {e}")
+                self._ready.clear()
+                await asyncio.sleep(1.0)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.reset()
+                    except Exception:
+                        pass
+
+    async def aclose(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._listener = None
@@ -0,0 +1,312 @@
+"""
+Local, memory-mapped snapshot of the Qdrant chunk collection.
+
+Layout of a snapshot directory, per generation `N`:
+
+- `vectors.N.f32`    raw float32 matrix (count x dim), unit rows, grouped by blog
+- `payloads.N.jsonl` one {"id", "blog_id", "chunk_index", "text"} line per row
+- `manifest.json`    generation, file names, collection, dim, count, and per
+                     blog its row range, byte offset into the payloads file
+                     and a content fingerprint
+
+`export_snapshot` writes or incrementally refreshes a directory: blogs whose
+fingerprint did not change are copied from the previous snapshot and only
+changed blogs have their vectors pulled from Qdrant. Given the blogs' active
+index versions, only live chunks are exported. A refresh writes a new
+generation of data files next to the current one and then swaps the manifest
+with `os.replace`, so a manifest only ever points at complete files that
+match its offsets. Files older than the previous generation are removed.
+
+`SnapshotStore` serves filtered top-k from a snapshot. Opening it reads the
+manifest and opens that generation's files together (a memmap for the
+vectors, a handle for the payloads), so a refresh that lands between checks
+cannot mix new payloads with old offsets. Vectors are paged in by the OS as
+blogs are searched.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import metrics
+from .vectors import dense_of, top_k, unit, unit_rows
+from .versions import VERSION_FIELD, blog_filter
+
+VECTORS_FILE = "vectors.f32"  # generation-less names written by older exports
+PAYLOADS_FILE = "payloads.jsonl"
+MANIFEST_FILE = "manifest.json"
+
+
+def _data_files(manifest: dict) -> Tuple[str, str]:
+    return manifest.get("vectors_file", VECTORS_FILE), manifest.get("payloads_file", PAYLOADS_FILE)
+
+
+def _text_hash(payload: dict) -> str:
+    return payload.get("content_hash") or hashlib.sha1((payload.get("text") or "").encode("utf-8")).hexdigest()
+
+
+def _fingerprint(entries: List[Tuple[str, str]]) -> str:
+    h = hashlib.sha1()
+    for point_id, content in sorted(entries):
+        h.update(f"{point_id}:{content};".encode())
+    return h.hexdigest()
+
+
+def load_manifest(path: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(path, MANIFEST_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+# -----------------------------
+# Export / refresh
+# -----------------------------
+def _scan_collection(
+    client, collection: str, page_size: int,
+    active_version: Optional[Callable[[str], Optional[int]]] = None,
+) -> Tuple[Dict[str, List[Tuple[str, str]]], Dict[str, Optional[int]]]:
+    """
+    blog_id -> [(point id, content hash)] without downloading vectors, limited
+    to each blog's active index version when `active_version` is given; also
+    returns the version used per blog.
+    """
+    blogs: Dict[str, List[Tuple[str, str]]] = {}
+    point_versions: Dict[str, List[Optional[list]]] = {}
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection,
+            limit=page_size,
+            offset=offset,
+            with_payload=["blog_id", "text", "content_hash", VERSION_FIELD],
+            with_vectors=False,
+        )
+        for point in points:
+            blog_id = point.payload.get("blog_id")
+            if blog_id:
+                blogs.setdefault(blog_id, []).append((str(point.id), _text_hash(point.payload)))
+                point_versions.setdefault(blog_id, []).append(point.payload.get(VERSION_FIELD))
+        if offset is None:
+            break
+
+    versions: Dict[str, Optional[int]] = {}
+    for blog_id in list(blogs):
+        version = active_version(blog_id) if active_version is not None else None
+        versions[blog_id] = version
+        if version is not None:
+            # Skip superseded and still-building versions
+            blogs[blog_id] = [
+                entry for entry, tags in zip(blogs[blog_id], point_versions[blog_id]) if tags and version in tags
+            ]
+            if not blogs[blog_id]:
+                del blogs[blog_id]
+    return blogs, versions
+
+
+def _fetch_blog(client, collection: str, blog_id: str, page_size: int, version: Optional[int] = None):
+    rows, offset = [], None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection,
+            scroll_filter=blog_filter(blog_id, version),
+            limit=page_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True,
+        )
+        rows.extend(points)
+        if offset is None:
+            break
+    rows.sort(key=lambda p: p.payload.get("chunk_index", 0))
+    payloads = [
+        {"id": str(p.id), "blog_id": blog_id, "chunk_index": p.payload.get("chunk_index"), "text": p.payload.get("text", "")}
+        for p in rows
+    ]
+    return payloads, [dense_of(p.vector) for p in rows]
+
+
+def _read_payload_block(f, offset: int, count: int) -> List[dict]:
+    f.seek(offset)
+    return [json.loads(f.readline()) for _ in range(count)]
+
+
+def _remove_stale_files(path: str, keep: set) -> None:
+    for name in os.listdir(path):
+        stale = (name.startswith("vectors.") and name.endswith(".f32")) or (
+            name.startswith("payloads.") and name.endswith(".jsonl")
+        )
+        if stale and name not in keep:
+            try:
+                os.remove(os.path.join(path, name))
+            except OSError as e:
+                print(f"DEBUG: Could not remove old snapshot file {name}: {e}")
+
+
+def export_snapshot(
+    client, collection: str, path: str, dim: int, full: bool = False, page_size: int = 256,
+    active_version: Optional[Callable[[str], Optional[int]]] = None,
+) -> dict:
+    """
+    Write or refresh the snapshot at `path`; returns counts of reused / fetched / dropped blogs.
+    `active_version(blog_id)` restricts each blog to its live index version.
+    """
+    os.makedirs(path, exist_ok=True)
+    live = load_manifest(path)
+    generation = (live or {}).get("generation", 0) + 1
+    previous = None if full else live
+    if previous is not None and previous.get("dim") != dim:
+        previous = None
+    old_vectors = old_payloads = None
+    if previous is not None and previous["count"]:
+        old_vectors_file, old_payloads_file = _data_files(previous)
+        old_vectors = np.memmap(os.path.join(path, old_vectors_file), dtype=np.float32, mode="r",
+                                shape=(previous["count"], dim))
+        old_payloads = open(os.path.join(path, old_payloads_file), "rb")
+
+    current, versions = _scan_collection(client, collection, page_size, active_version)
+    stats = {"blogs": len(current), "reused": 0, "fetched": 0, "dropped": 0, "points": 0}
+    if previous is not None:
+        stats["dropped"] = len(set(previous["blogs"]) - set(current))
+
+    vectors_file, payloads_file = f"vectors.{generation}.f32", f"payloads.{generation}.jsonl"
+    blogs, row = {}, 0
+    with open(os.path.join(path, vectors_file), "wb") as vf, open(os.path.join(path, payloads_file), "wb") as pf:
+        for blog_id in sorted(current):
+            fingerprint = _fingerprint(current[blog_id])
+            old = previous["blogs"].get(blog_id) if previous is not None else None
+            if old is not None and old["fingerprint"] == fingerprint:
+                vectors = np.asarray(old_vectors[old["start"]:old["end"]])
+                payloads = _read_payload_block(old_payloads, old["offset"], old["end"] - old["start"])
+                stats["reused"] += 1
+            else:
+                payloads, raw = _fetch_blog(client, collection, blog_id, page_size, versions.get(blog_id))
+                vectors = unit_rows(raw) if raw else np.zeros((0, dim), dtype=np.float32)
+                stats["fetched"] += 1
+            if vectors.shape[0] and vectors.shape[1] != dim:
+                print(f"DEBUG: Skipping blog {blog_id}: vector dim {vectors.shape[1]} != {dim}")
+                continue
+            offset = pf.tell()
+            for payload in payloads:
+                pf.write(json.dumps(payload, ensure_ascii=False).encode("utf-8") + b"\n")
+            vf.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+            blogs[blog_id] = {"start": row, "end": row + len(payloads), "offset": offset, "fingerprint": fingerprint}
+            row += len(payloads)
+
+    manifest = {
+        "generation": generation, "vectors_file": vectors_file, "payloads_file": payloads_file,
+        "collection": collection, "dim": dim, "count": row, "created_at": time.time(), "blogs": blogs,
+    }
+    del old_vectors
+    if old_payloads is not None:
+        old_payloads.close()
+    tmp_manifest = os.path.join(path, MANIFEST_FILE + ".tmp")
+    with open(tmp_manifest, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_manifest, os.path.join(path, MANIFEST_FILE))
+    # Readers that opened the previous manifest a moment ago may still be opening its files
+    keep = {vectors_file, payloads_file}
+    if live is not None:
+        keep.update(_data_files(live))
+    _remove_stale_files(path, keep)
+    stats["points"] = row
+    return stats
+
+
+# -----------------------------
+# Retrieval backend
+# -----------------------------
+class SnapshotStore:
+    """Filtered exact top-k over a memory-mapped snapshot; reopens itself when the snapshot is refreshed."""
+
+    def __init__(self, path: str, payload_cache_blogs: int = 256, check_interval: float = 30.0):
+        self.path = path
+        self.payload_cache_blogs = payload_cache_blogs
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._manifest: Optional[dict] = None
+        self._vectors: Optional[np.memmap] = None
+        self._payload_file = None
+        self._mtime = 0.0
+        self._checked = 0.0
+        self._payloads: "OrderedDict[str, List[dict]]" = OrderedDict()
+
+    def _open(self) -> None:
+        now = time.monotonic()
+        if self._checked and now - self._checked < self.check_interval:
+            return
+        self._checked = now
+        try:
+            mtime = os.path.getmtime(os.path.join(self.path, MANIFEST_FILE))
+        except OSError:
+            return
+        if mtime == self._mtime:
+            return
+        manifest = load_manifest(self.path)
+        vectors = payload_file = None
+        if manifest and manifest["count"]:
+            vectors_file, payloads_file = _data_files(manifest)
+            try:
+                vectors = np.memmap(os.path.join(self.path, vectors_file), dtype=np.float32, mode="r",
+                                    shape=(manifest["count"], manifest["dim"]))
+                payload_file = open(os.path.join(self.path, payloads_file), "rb")
+            except OSError as e:
+                # Superseded while we were opening it; the next check picks up the new manifest
+                print(f"DEBUG: Snapshot at {self.path} changed while opening: {e}")
+                self._checked = 0.0
+                return
+        if self._payload_file is not None:
+            self._payload_file.close()
+        self._manifest, self._vectors, self._payload_file, self._mtime = manifest, vectors, payload_file, mtime
+        self._payloads.clear()
+        print(f"DEBUG: Opened Qdrant snapshot at {self.path} ({manifest['count'] if manifest else 0} points)")
+
+    def available(self) -> bool:
+        with self._lock:
+            self._open()
+            return self._manifest is not None
+
+    def _texts(self, blog_id: str, entry: dict) -> List[str]:
+        payloads = self._payloads.get(blog_id)
+        if payloads is None:
+            payloads = _read_payload_block(self._payload_file, entry["offset"], entry["end"] - entry["start"])
+            self._payloads[blog_id] = payloads
+            while len(self._payloads) > self.payload_cache_blogs:
+                self._payloads.popitem(last=False)
+        else:
+            self._payloads.move_to_end(blog_id)
+        return [p["text"] for p in payloads]
+
+    def search(self, blog_id: str, query_vector: Sequence[float], k: int = 8, with_vectors: bool = False) -> Optional[list]:
+        """
+        Top-k chunk texts for a blog; None when there is no snapshot to search.
+        `with_vectors` returns (text, score, unit vector) hits instead.
+        """
+        with self._lock:
+            self._open()
+            if self._manifest is None:
+                return None
+            entry = self._manifest["blogs"].get(blog_id)
+            if entry is None or entry["end"] == entry["start"]:
+                metrics.incr("snapshot.empty")
+                return []
+            q = unit(query_vector)
+            if q.shape[0] != self._manifest["dim"]:
+                return []
+            rows = self._vectors[entry["start"]:entry["end"]]
+            scores = rows @ q
+            texts = self._texts(blog_id, entry)
+            if with_vectors:
+                hits = [(texts[i], float(scores[i]), np.array(rows[i])) for i in top_k(scores, k)]
+        metrics.incr("snapshot.search")
+        if with_vectors:
+            return hits
+        return [texts[i] for i in top_k(scores, k)]
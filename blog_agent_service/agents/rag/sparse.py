@@ -0,0 +1,78 @@
+"""
+Local BM25-style sparse vectors for hybrid retrieval.
+
+Dense `text-embedding-3-small` vectors are weak on exact names, version
+numbers and code identifiers. Every chunk therefore also gets a sparse vector
+in the named `bm25` slot of `blog_embeddings`, computed here without any API
+call:
+
+- terms are lower-cased words, plus identifiers kept whole (`v1.2.3`,
+  `max_tokens`, `query_points`) and their dotted/dashed parts
+- each term maps to a stable 31-bit index (crc32, so every process agrees;
+  Python's `hash()` is salted per process)
+- document weights are BM25's saturated term frequency with length
+  normalisation against a fixed average chunk length, so a chunk's vector
+  never depends on the rest of the corpus and kept chunks stay valid across
+  re-indexes
+- query weights are 1 per distinct term; Qdrant applies IDF at query time
+  (`Modifier.IDF` on the sparse vector config)
+
+Only depends on the stdlib; `rag_logic` wraps the (indices, values) pairs in
+`qdrant_client.models.SparseVector`.
+"""
+from __future__ import annotations
+
+import re
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+Sparse = Tuple[List[int], List[float]]  # (indices, values), indices ascending
+
+_TOKEN = re.compile(r"[a-z0-9_]+(?:[.\-][a-z0-9_]+)*")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from how in is it of on or that the this to was what when where which who why with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Terms of `text`; compound identifiers yield themselves and their parts."""
+    terms = []
+    for token in _TOKEN.findall(text.lower()):
+        if token in _STOPWORDS:
+            continue
+        terms.append(token)
+        if "." in token or "-" in token:
+            terms.extend(part for part in re.split(r"[.\-]", token) if part and part not in _STOPWORDS)
+    return terms
+
+
+def term_index(term: str) -> int:
+    return zlib.crc32(term.encode("utf-8")) & 0x7FFFFFFF
+
+
+def _to_sparse(weights: Dict[int, float]) -> Sparse:
+    indices = sorted(weights)
+    return indices, [weights[i] for i in indices]
+
+
+def _hashed(counts: Iterable[Tuple[str, float]]) -> Dict[int, float]:
+    weights: Dict[int, float] = {}
+    for term, weight in counts:
+        index = term_index(term)
+        weights[index] = weights.get(index, 0.0) + weight  # collisions add up
+    return weights
+
+
+def encode_document(text: str, k1: float = 1.2, b: float = 0.75, avg_len: float = 100.0) -> Sparse:
+    """BM25 term weights of one chunk (without IDF)."""
+    terms = tokenize(text)
+    if not terms:
+        return [], []
+    norm = k1 * (1 - b + b * len(terms) / avg_len)
+    return _to_sparse(_hashed((term, tf * (k1 + 1) / (tf + norm)) for term, tf in Counter(terms).items()))
+
+
+def encode_query(text: str) -> Sparse:
+    """One unit weight per distinct query term."""
+    return _to_sparse(_hashed((term, 1.0) for term in set(tokenize(text))))
@@ -0,0 +1,45 @@
+"""Small NumPy helpers for exact cosine search over in-memory matrices."""
+from __future__ import annotations
+
+from typing import Sequence
+
+import numpy as np
+
+
+def dense_of(vector):
+    """The unnamed dense vector of a Qdrant point; points with a BM25 slot come back as a dict."""
+    return vector.get("") if isinstance(vector, dict) else vector
+
+
+def unit(vector: Sequence[float]) -> np.ndarray:
+    """float32 copy of `vector` scaled to unit length (zeros stay zeros)."""
+    v = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(v)
+    return v / norm if norm > 0 else v
+
+
+def unit_rows(matrix) -> np.ndarray:
+    """float32 matrix with every row scaled to unit length."""
+    m = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(m, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return m / norms
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the `k` highest scores, best first, without a full sort."""
+    n = scores.shape[0]
+    if n == 0 or k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k >= n:
+        return np.argsort(-scores)
+    idx = np.argpartition(-scores, k - 1)[:k]
+    return idx[np.argsort(-scores[idx])]
+
+
+def truncate(vector: Sequence[float], dimensions: int) -> np.ndarray:
+    """
+    First `dimensions` components, renormalised. text-embedding-3 vectors keep
+    their meaning when shortened this way, as with the API's `dimensions` option.
+    """
+    return unit(np.asarray(vector, dtype=np.float32)[:dimensions])
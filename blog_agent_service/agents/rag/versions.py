@@ -0,0 +1,133 @@
+"""
+Versioned blog indexes: atomic re-index without an empty or mixed window.
+
+Each chunk point carries `index_versions`, the list of blog index versions it
+belongs to. A re-index writes new chunks under a fresh version, adds that
+version to the chunks it keeps, and then flips the blog's active version in
+Redis (`rag:active_version:{blog_id}`) with one compare-and-set that only
+ever raises it, so a slow re-index that finishes after a newer one cannot
+roll the blog back. Queries filter on `blog_id` plus the active version, so
+they see either the whole old index or the whole new one. Points that are in neither the active version nor a newer
+in-progress one are garbage-collected a little later, once in-flight queries
+on the old version have drained.
+
+Blogs indexed before versioning have no active version and are filtered on
+`blog_id` alone until their first re-index.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+VERSION_FIELD = "index_versions"
+
+# KEYS[1] = active version key; ARGV[1] = candidate version. Returns the active version.
+ACTIVATE_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]))
+local candidate = tonumber(ARGV[1])
+if current and current >= candidate then return current end
+redis.call('SET', KEYS[1], candidate)
+return candidate
+"""
+
+
+def active_key(blog_id: str) -> str:
+    return f"rag:active_version:{blog_id}"
+
+
+def sequence_key(blog_id: str) -> str:
+    return f"rag:index_version_seq:{blog_id}"
+
+
+def blog_filter(blog_id: str, version: Optional[int] = None):
+    from qdrant_client.models import FieldCondition, Filter, MatchValue
+    must = [FieldCondition(key="blog_id", match=MatchValue(value=blog_id))]
+    if version is not None:
+        must.append(FieldCondition(key=VERSION_FIELD, match=MatchValue(value=version)))
+    return Filter(must=must)
+
+
+def garbage_filter(blog_id: str, active: int):
+    """Points of the blog outside the active version and outside any newer, still-building one."""
+    from qdrant_client.models import FieldCondition, Filter, MatchValue, Range
+    return Filter(
+        must=[FieldCondition(key="blog_id", match=MatchValue(value=blog_id))],
+        must_not=[
+            FieldCondition(key=VERSION_FIELD, match=MatchValue(value=active)),
+            FieldCondition(key=VERSION_FIELD, range=Range(gt=active)),
+        ],
+    )
+
+
+class IndexVersions:
+    """Active-version lookups with a short in-process cache, dropped via the invalidation bus."""
+
+    def __init__(self, redis_getter: Callable[[], Any], ttl: float = 60.0, gc_delay: float = 30.0):
+        self._redis = redis_getter
+        self.ttl = ttl
+        self.gc_delay = gc_delay
+        self._lock = threading.Lock()
+        self._cache: Dict[str, Tuple[Optional[int], float]] = {}
+        self._activate = None
+
+    def active(self, blog_id: str, fresh: bool = False) -> Optional[int]:
+        now = time.monotonic()
+        if not fresh:
+            with self._lock:
+                entry = self._cache.get(blog_id)
+            if entry is not None and entry[1] > now:
+                return entry[0]
+        try:
+            value = self._redis().get(active_key(blog_id))
+        except Exception as e:
+            print(f"Redis Index Version Error: {e}")
+            with self._lock:
+                entry = self._cache.get(blog_id)
+            return entry[0] if entry is not None else None
+        version = int(value) if value is not None else None
+        with self._lock:
+            self._cache[blog_id] = (version, now + self.ttl)
+        return version
+
+    def is_cached(self, blog_id: str) -> bool:
+        """Whether `active(blog_id)` would answer from the process cache, without Redis."""
+        with self._lock:
+            entry = self._cache.get(blog_id)
+        return entry is not None and entry[1] > time.monotonic()
+
+    def next_version(self, blog_id: str) -> int:
+        return int(self._redis().incr(sequence_key(blog_id)))
+
+    def activate(self, blog_id: str, version: int) -> int:
+        """Make `version` active unless a newer one already is; returns the active version."""
+        r = self._redis()
+        if self._activate is None:
+            self._activate = r.register_script(ACTIVATE_SCRIPT)
+        active = int(self._activate(keys=[active_key(blog_id)], args=[version]))
+        with self._lock:
+            self._cache[blog_id] = (active, time.monotonic() + self.ttl)
+        return active
+
+    def invalidate(self, blog_id: str) -> None:
+        with self._lock:
+            self._cache.pop(blog_id, None)
+
+    def schedule_gc(self, client_getter: Callable[[], Any], collection: str, *blog_ids: str) -> threading.Timer:
+        def collect():
+            for blog_id in blog_ids:
+                self.collect_garbage(client_getter, collection, blog_id)
+        timer = threading.Timer(self.gc_delay, collect)
+        timer.daemon = True
+        timer.start()
+        return timer
+
+    def collect_garbage(self, client_getter: Callable[[], Any], collection: str, blog_id: str) -> None:
+        active = self.active(blog_id, fresh=True)
+        if active is None:
+            return
+        try:
+            client_getter().delete(collection_name=collection, points_selector=garbage_filter(blog_id, active))
+            print(f"DEBUG: Collected old index versions of blog {blog_id} (active {active})")
+        except Exception as e:
+            print(f"DEBUG: Index version GC failed for {blog_id}: {e}")
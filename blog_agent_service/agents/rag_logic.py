@@ -1,63 +1,73 @@
-import os
-import json
+import asyncio
 import hashlib
-import time
 import re
-import uuid
-import numpy as np
-import redis
+import time
 from dotenv import load_dotenv
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.messages import SystemMessage, HumanMessage
-from qdrant_client import QdrantClient
 from qdrant_client.models import (
-    VectorParams, Distance, PointStruct,
-    Filter, FieldCondition, MatchValue
+    PointStruct,
+    QueryRequest, SetPayload, SetPayloadOperation,
+    SparseVectorParams, SparseVector, Modifier, Prefetch, FusionQuery, Fusion,
 )
 
 # Load env
 load_dotenv()
 
-QDRANT_COLLECTION = "blog_embeddings"
-VECTOR_SIZE = 1536  # text-embedding-3-small dimension
-
-def get_embeddings():
-    key = os.getenv("OPENROUTER_API_KEY")
-    if not key:
-        print("CRITICAL: OPENROUTER_API_KEY is missing!")
-    return OpenAIEmbeddings(
-        model="openai/text-embedding-3-small",
-        openai_api_key=key,
-        openai_api_base="https://openrouter.ai/api/v1"
-    )
-
-def get_llm():
-    return ChatOpenAI(
-        model="openai/gpt-4o-mini",
-        openai_api_key=os.getenv("OPENROUTER_API_KEY"),
-        openai_api_base="https://openrouter.ai/api/v1",
-        temperature=0,
-        max_tokens=1000
-    )
+from .rag.config import (
+    QDRANT_COLLECTION, VECTOR_SIZE, SEMANTIC_CACHE_MAX_DISTANCE, EXACT_CACHE_TTL,
+    BATCH_QUERY_CONCURRENCY, HOT_TIER_ENABLED, RETRIEVAL_BACKEND,
+    BULK_EMBED_BATCH, BULK_UPLOAD_BATCH, BULK_UPLOAD_PARALLEL, BULK_WINDOW_CHUNKS,
+    CHUNKER, CHUNK_MAX_TOKENS, SECTIONS_ENABLED, QDRANT_SECTIONS_COLLECTION, SECTION_MAX_TOKENS,
+    CONTEXT_MAX_TOKENS, CONTEXT_CANDIDATES, CONTEXT_MAX_CHUNKS, CONTEXT_MIN_CHUNKS, CONTEXT_SCORE_GAP,
+    CONTEXT_MMR_LAMBDA, HYBRID_ENABLED, SPARSE_VECTOR_NAME, HYBRID_PREFETCH, BM25_K1, BM25_B, BM25_AVG_TOKENS,
+    QDRANT_QUANTIZATION, QDRANT_ON_DISK, QDRANT_HNSW_M, QDRANT_HNSW_EF_CONSTRUCT, QDRANT_HNSW_EF,
+    QDRANT_RESCORE_OVERSAMPLING,
+)
+from .rag.clients import (
+    get_embeddings, get_llm, get_qdrant_client, get_redis_client,
+    get_async_qdrant_client, get_async_redis_client,
+    get_single_flight, get_async_single_flight, get_l1_cache, get_invalidation_bus,
+    get_fallback_index, get_hot_tier, get_snapshot_store, get_index_versions, get_bulk_embeddings,
+    get_section_cache,
+)
+from .rag import metrics, semantic_cache
+from .rag.singleflight import LeaderError
+from .rag.bulk_index import BulkIndexer
+from .rag.chunk_diff import chunk_ids, plan_reindex
+from .rag.chunker import Chunk, chunk_markdown, chunk_sections, token_counter
+from .rag.collection import collection_config, resolve, search_params
+from .rag.context import expand_to_sections, select_chunks, strip_overlap
+from .rag.sparse import encode_document, encode_query
+from .rag.vectors import dense_of, unit
+from .rag.versions import VERSION_FIELD, blog_filter
 
-def get_qdrant_client():
-    """Get a Qdrant Cloud client."""
-    return QdrantClient(
-        url=os.getenv("QDRANT_URL"),
-        api_key=os.getenv("QDRANT_API_KEY"),
-    )
+_collection_ready = False
+_sparse_ready = None  # None until the collection's sparse config has been checked
+_collection_info = None
+# A failed collection probe is retried after a growing delay, not on every request
+_COLLECTION_RETRY_MIN, _COLLECTION_RETRY_MAX = 5.0, 300.0
+_collection_retry_at = 0.0
+_collection_retry_delay = _COLLECTION_RETRY_MIN
+_count_tokens = token_counter()
+_search_params = search_params(QDRANT_HNSW_EF, QDRANT_RESCORE_OVERSAMPLING)
 
 def ensure_collection():
     """Create the Qdrant collection if it doesn't exist."""
+    global _collection_ready
     client = get_qdrant_client()
+    if _collection_ready:
+        return client
     collections = [c.name for c in client.get_collections().collections]
-    if QDRANT_COLLECTION not in collections:
+    if resolve(client, QDRANT_COLLECTION) is None:
         client.create_collection(
             collection_name=QDRANT_COLLECTION,
-            vectors_config=VectorParams(size=VECTOR_SIZE, distance=Distance.COSINE)
+            **collection_config(
+                VECTOR_SIZE, QDRANT_QUANTIZATION, QDRANT_ON_DISK, QDRANT_HNSW_M, QDRANT_HNSW_EF_CONSTRUCT,
+                sparse_name=SPARSE_VECTOR_NAME if HYBRID_ENABLED else None,
+            ),
         )
-        print(f"DEBUG: Created Qdrant collection '{QDRANT_COLLECTION}'")
+        print(f"DEBUG: Created Qdrant collection '{QDRANT_COLLECTION}' ({VECTOR_SIZE}-d, quantization={QDRANT_QUANTIZATION})")
         
         # Ensure payload index for filtering
         try:
@@ -70,13 +80,96 @@ def ensure_collection():
             print(f"DEBUG: Created payload index for 'blog_id'")
         except Exception as e:
             print(f"DEBUG: Failed to create payload index: {e}")
+    try:
+        from qdrant_client.models import PayloadSchemaType
+        client.create_payload_index(
+            collection_name=QDRANT_COLLECTION,
+            field_name=VERSION_FIELD,
+            field_schema=PayloadSchemaType.INTEGER,
+        )
+    except Exception as e:
+        print(f"DEBUG: Failed to create payload index for '{VERSION_FIELD}': {e}")
+    if SECTIONS_ENABLED:
+        _ensure_sections_collection(client, collections)
+    if HYBRID_ENABLED:
+        _ensure_sparse_vectors(client)
+    _collection_ready = True
     return client
 
-def get_redis_client():
-    url = os.getenv("REDIS_URL", "redis://localhost:6379")
-    log_url = re.sub(r':([^:@]+)@', ':****@', url)
-    print(f"DEBUG: Connecting to Redis at {log_url}")
-    return redis.from_url(url)
+def _sparse_config():
+    # IDF is applied by Qdrant at query time, over the whole collection
+    return {SPARSE_VECTOR_NAME: SparseVectorParams(modifier=Modifier.IDF)}
+
+def _ensure_sparse_vectors(client):
+    """Add the BM25 slot to a collection created before hybrid retrieval, if Qdrant allows it."""
+    global _sparse_ready
+    if _has_sparse_vectors(client):
+        return
+    try:
+        client.update_collection(collection_name=QDRANT_COLLECTION, sparse_vectors_config=_sparse_config())
+        _sparse_ready = True
+        print(f"DEBUG: Added sparse vector '{SPARSE_VECTOR_NAME}' to '{QDRANT_COLLECTION}'")
+    except Exception as e:
+        _sparse_ready = False
+        print(f"DEBUG: Cannot add sparse vector '{SPARSE_VECTOR_NAME}' ({e}); dense-only until the collection is rebuilt")
+
+def _live_collection(client):
+    """Info of the collection behind `blog_embeddings`, fetched once per process (None while unavailable)."""
+    global _collection_info, _collection_retry_at, _collection_retry_delay
+    if _collection_info is None:
+        if time.monotonic() < _collection_retry_at:
+            return None
+        try:
+            info = client.get_collection(QDRANT_COLLECTION)
+        except Exception as e:
+            print(f"DEBUG: Collection info unavailable, retrying in {_collection_retry_delay:.0f}s: {e}")
+            _collection_retry_at = time.monotonic() + _collection_retry_delay
+            _collection_retry_delay = min(_collection_retry_delay * 2, _COLLECTION_RETRY_MAX)
+            return None
+        _collection_retry_delay = _COLLECTION_RETRY_MIN
+        size = getattr(info.config.params.vectors, "size", None)
+        if size is not None and size != VECTOR_SIZE:
+            print(f"CRITICAL: '{QDRANT_COLLECTION}' holds {size}-d vectors but RAG_EMBEDDING_DIMENSIONS is {VECTOR_SIZE}")
+        _collection_info = info
+    return _collection_info
+
+def _has_sparse_vectors(client):
+    """Whether `blog_embeddings` has the BM25 slot; checked once per process."""
+    global _sparse_ready
+    if _sparse_ready is None:
+        info = _live_collection(client)
+        if info is None:
+            return False
+        _sparse_ready = SPARSE_VECTOR_NAME in (info.config.params.sparse_vectors or {})
+    return _sparse_ready
+
+def _hybrid():
+    return HYBRID_ENABLED and _has_sparse_vectors(get_qdrant_client())
+
+async def _aprobe_collection():
+    """Run a due collection probe in a thread, so `_hybrid()` on the event loop only reads cached state."""
+    if HYBRID_ENABLED and _sparse_ready is None and time.monotonic() >= _collection_retry_at:
+        await asyncio.to_thread(_hybrid)
+
+def _point_vector(dense, text):
+    """Dense vector, plus the chunk's BM25 vector when the collection has the slot."""
+    if not _hybrid():
+        return dense
+    indices, values = encode_document(text, BM25_K1, BM25_B, BM25_AVG_TOKENS)
+    return {"": dense, SPARSE_VECTOR_NAME: SparseVector(indices=indices, values=values)}
+
+def _ensure_sections_collection(client, collections):
+    """Parent sections for small-to-big retrieval: payload only, no vectors."""
+    if QDRANT_SECTIONS_COLLECTION in collections:
+        return
+    from qdrant_client.models import PayloadSchemaType
+    client.create_collection(collection_name=QDRANT_SECTIONS_COLLECTION, vectors_config={})
+    print(f"DEBUG: Created Qdrant collection '{QDRANT_SECTIONS_COLLECTION}'")
+    for field, schema in (("blog_id", PayloadSchemaType.KEYWORD), (VERSION_FIELD, PayloadSchemaType.INTEGER)):
+        try:
+            client.create_payload_index(collection_name=QDRANT_SECTIONS_COLLECTION, field_name=field, field_schema=schema)
+        except Exception as e:
+            print(f"DEBUG: Failed to create payload index for '{field}' on sections: {e}")
 
 def normalize_question(q):
     """Normalize question to handle common variations and filler phrases."""
@@ -92,26 +185,21 @@ def normalize_question(q):
     q = re.sub(r'\s+', ' ', q).strip()
     return q
 
-def search_semantic_cache(blog_id, query_vector, threshold=0.9):
+def search_semantic_cache(blog_id, query_vector, max_distance=SEMANTIC_CACHE_MAX_DISTANCE):
     """Search Redis for a similar question already answered for this blog."""
     try:
-        from langchain_redis import RedisVectorStore
-        embeddings = get_embeddings()
-        vector_store = RedisVectorStore(
-            embeddings,
-            redis_url=os.getenv("REDIS_URL", "redis://localhost:6379"),
-            index_name=f"cache:{blog_id}"
-        )
-        
-        results = vector_store.similarity_search_with_score_by_vector(
-            query_vector,
-            k=1
-        )
-        
-        if results:
-            doc, score = results[0]
-            if score < 0.2: 
-                return doc.metadata.get("answer")
+        answer = semantic_cache.search(get_redis_client(), blog_id, query_vector, max_distance)
+        metrics.incr("cache.redis_semantic.hit" if answer else "cache.redis_semantic.miss")
+        return answer
+    except Exception as e:
+        print(f"Redis Semantic Cache Error: {e}")
+    return None
+
+async def asearch_semantic_cache(blog_id, query_vector, max_distance=SEMANTIC_CACHE_MAX_DISTANCE):
+    try:
+        answer = await semantic_cache.asearch(get_async_redis_client(), blog_id, query_vector, max_distance)
+        metrics.incr("cache.redis_semantic.hit" if answer else "cache.redis_semantic.miss")
+        return answer
     except Exception as e:
         print(f"Redis Semantic Cache Error: {e}")
     return None
@@ -122,74 +210,264 @@ def update_semantic_cache(blog_id, question, answer, embedding):
         r = get_redis_client()
         question_norm = normalize_question(question)
         question_hash = hashlib.md5(question_norm.encode()).hexdigest()
-        kv_cache_key = f"exact_cache:{blog_id}:{question_hash}"
-        r.setex(kv_cache_key, 7200, answer)
+        semantic_cache.store_exact(r, blog_id, question_hash, answer, EXACT_CACHE_TTL)
+        semantic_cache.store(r, blog_id, question_hash, question, answer, embedding)
+        print(f"DEBUG: Saved to Redis Cache for blog {blog_id}: {question_norm}")
+    except Exception as e:
+        print(f"Redis Cache Update Error: {e}")
 
-        from langchain_redis import RedisVectorStore
-        from langchain_core.documents import Document
-        
-        embeddings = get_embeddings()
-        vector_store = RedisVectorStore(
-            embeddings,
-            redis_url=os.getenv("REDIS_URL", "redis://localhost:6379"),
-            index_name=f"cache:{blog_id}"
-        )
-        
-        doc = Document(
-            page_content=question,
-            metadata={"answer": answer, "blog_id": blog_id}
-        )
-        vector_store.add_documents([doc])
+async def aupdate_semantic_cache(blog_id, question, answer, embedding):
+    try:
+        r = get_async_redis_client()
+        question_norm = normalize_question(question)
+        question_hash = hashlib.md5(question_norm.encode()).hexdigest()
+        await semantic_cache.astore_exact(r, blog_id, question_hash, answer, EXACT_CACHE_TTL)
+        await semantic_cache.astore(r, blog_id, question_hash, question, answer, embedding)
         print(f"DEBUG: Saved to Redis Cache for blog {blog_id}: {question_norm}")
     except Exception as e:
         print(f"Redis Cache Update Error: {e}")
 
-def index_content(text, blog_id):
-    """Split text into chunks, embed them, and upsert into Qdrant."""
+def invalidate_blog_caches(blog_id):
+    """Drop cached answers for a blog whose content changed, in Redis and in every worker's L1."""
+    try:
+        semantic_cache.flush_blog(get_redis_client(), blog_id)
+    except Exception as e:
+        print(f"Redis Cache Flush Error: {e}")
+    get_invalidation_bus().publish(blog_id)
+
+def split_blog(text):
+    """(parent sections, child chunks) with section titles and character offsets (see rag/chunker.py)."""
+    if CHUNKER != "recursive":
+        if SECTIONS_ENABLED:
+            return chunk_sections(text, SECTION_MAX_TOKENS, CHUNK_MAX_TOKENS, _count_tokens)
+        return [], chunk_markdown(text, max_tokens=CHUNK_MAX_TOKENS, count=_count_tokens)
+    # Previous character splitter, kept for comparison / rollback
+    chunks, start = [], 0
+    for body in RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=150).split_text(text):
+        found = text.find(body, start)
+        start = found if found >= 0 else start
+        chunks.append(Chunk(body, "", start, start + len(body), _count_tokens(body)))
+    return [], chunks
+
+def _write_sections(client, blog_id, sections, active, version):
+    """
+    Upsert a blog's parent sections for `version`. Sections the active version
+    already has (same content-addressed id) keep the active tag until the flip;
+    new or changed ones are `[version]` only, so old-version queries never
+    expand to new text.
+    """
+    if not sections:
+        return
+    ids = chunk_ids(blog_id, [section.text for section in sections])
+    unchanged = set()
+    if active is not None:
+        existing = client.retrieve(
+            collection_name=QDRANT_SECTIONS_COLLECTION, ids=[point_id for point_id, _ in ids],
+            with_payload=[VERSION_FIELD], with_vectors=False,
+        )
+        unchanged = {str(p.id) for p in existing if active in (p.payload.get(VERSION_FIELD) or [])}
+    client.upsert(
+        collection_name=QDRANT_SECTIONS_COLLECTION,
+        points=[
+            PointStruct(
+                id=point_id,
+                vector={},
+                payload={
+                    "blog_id": blog_id, "text": section.text, **section.payload(),
+                    VERSION_FIELD: [active, version] if point_id in unchanged else [version],
+                },
+            )
+            for (point_id, _), section in zip(ids, sections)
+        ],
+    )
+
+def _stored_chunks(client, blog_id, version):
+    """(point id, chunk_index) of the blog's points in `version`; legacy points have no content_hash."""
+    stored, offset = [], None
+    while True:
+        points, offset = client.scroll(
+            collection_name=QDRANT_COLLECTION,
+            scroll_filter=blog_filter(blog_id, version),
+            limit=256,
+            offset=offset,
+            with_payload=["chunk_index", "content_hash"],
+            with_vectors=False,
+        )
+        for point in points:
+            # Pre-hash points get a fresh content-addressed id on their first re-index
+            index = point.payload.get("chunk_index") if point.payload.get("content_hash") else None
+            stored.append((str(point.id), index))
+        if offset is None:
+            return stored
+
+def index_blog(text, blog_id):
+    """
+    Incrementally (re-)index a blog as a new index version: only chunks whose
+    text is new get embedded, kept chunks join the new version, and queries
+    switch to it in one atomic flip. Vanished chunks are only dropped from the
+    new version (`dropped`); version GC deletes them once the flip has settled.
+    Returns counts plus the lightweight rag_data.
+    """
+    result = {"chunks": 0, "embedded": 0, "reused": 0, "moved": 0, "dropped": 0, "version": None, "rag_data": []}
     if not text.strip():
-        return []
-    
-    splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=150)
-    chunks = splitter.split_text(text)
-    
+        return result
+
+    sections, chunks = split_blog(text)
     if not chunks:
-        return []
+        return result
 
-    embeddings_model = get_embeddings()
-    embeddings = embeddings_model.embed_documents(chunks)
-    
-    # Upsert to Qdrant
     client = ensure_collection()
-    
-    # Delete old vectors for this blog first (in case of re-indexing)
-    try:
-        client.delete(
-            collection_name=QDRANT_COLLECTION,
-            points_selector=Filter(
-                must=[FieldCondition(key="blog_id", match=MatchValue(value=blog_id))]
+    versions = get_index_versions()
+    active = versions.active(blog_id, fresh=True)
+    texts = [chunk.text for chunk in chunks]
+    plan = plan_reindex(blog_id, texts, _stored_chunks(client, blog_id, active))
+    result.update(
+        chunks=len(chunks), embedded=len(plan.new), reused=plan.reused,
+        moved=len(plan.moved), dropped=len(plan.delete), version=active,
+        rag_data=[{"text": chunk.text} for chunk in chunks],
+    )
+
+    if not plan.changed:
+        # Same text, at most re-ordered: renumber in place, no new version needed
+        if plan.moved:
+            client.batch_update_points(
+                collection_name=QDRANT_COLLECTION,
+                update_operations=[
+                    SetPayloadOperation(set_payload=SetPayload(
+                        payload={"chunk_index": i, **chunks[i].payload()}, points=[point_id]
+                    ))
+                    for point_id, i in plan.moved
+                ],
             )
+        print(f"DEBUG: Blog {blog_id} unchanged ({plan.reused} chunks), kept index version {active}")
+        return result
+
+    version = versions.next_version(blog_id)
+    if plan.new:
+        embeddings = get_embeddings().embed_documents([chunk for _, _, chunk, _ in plan.new])
+        points = [
+            PointStruct(
+                id=point_id,
+                vector=_point_vector(embeddings[n], chunk),
+                payload={
+                    "blog_id": blog_id,
+                    "text": chunk,
+                    "chunk_index": i,
+                    "content_hash": digest,
+                    **chunks[i].payload(),
+                    VERSION_FIELD: [version],
+                }
+            )
+            for n, (point_id, i, chunk, digest) in enumerate(plan.new)
+        ]
+        client.upsert(collection_name=QDRANT_COLLECTION, points=points)
+
+    # Kept chunks join the new version (and keep the active one until the flip)
+    kept_versions = [active, version] if active is not None else [version]
+    new_ids = {point_id for point_id, _, _, _ in plan.new}
+    positions = {point_id: i for i, (point_id, _) in enumerate(chunk_ids(blog_id, texts))}
+    kept = [(point_id, i) for point_id, i in positions.items() if point_id not in new_ids]
+    if kept:
+        client.batch_update_points(
+            collection_name=QDRANT_COLLECTION,
+            update_operations=[
+                SetPayloadOperation(set_payload=SetPayload(
+                    payload={"chunk_index": i, **chunks[i].payload(), VERSION_FIELD: kept_versions}, points=[point_id]
+                ))
+                for point_id, i in kept
+            ],
         )
-    except Exception:
-        pass  # Collection might not have old data
-    
-    points = []
-    for i, chunk in enumerate(chunks):
-        point_id = str(uuid.uuid5(uuid.NAMESPACE_DNS, f"{blog_id}_{i}"))
-        points.append(PointStruct(
-            id=point_id,
-            vector=embeddings[i],
-            payload={
-                "blog_id": blog_id,
-                "text": chunk,
-                "chunk_index": i
-            }
-        ))
-    
-    client.upsert(collection_name=QDRANT_COLLECTION, points=points)
-    print(f"DEBUG: Indexed {len(points)} chunks to Qdrant for blog {blog_id}")
-    
+
+    _write_sections(client, blog_id, sections, active, version)
+    if versions.activate(blog_id, version) != version:
+        # A newer re-index already went live; ours is left for GC
+        print(f"DEBUG: Version {version} of blog {blog_id} superseded before activation")
+    result["version"] = version
+    print(
+        f"DEBUG: Indexed blog {blog_id} as version {version}: {len(chunks)} chunks "
+        f"({plan.reused} reused, {len(plan.new)} embedded, {len(plan.delete)} dropped)"
+    )
+    invalidate_blog_caches(blog_id)
+    versions.schedule_gc(get_qdrant_client, QDRANT_COLLECTION, blog_id)
+    if sections:
+        versions.schedule_gc(get_qdrant_client, QDRANT_SECTIONS_COLLECTION, blog_id)
+    return result
+
+def bulk_index(source, records_for, checkpoint_path=None, resume=True, embed_batch=None,
+               upload_batch=None, parallel=None, window_chunks=None, drain_gc=False):
+    """
+    Index many blogs in one run (see rag/bulk_index.py). `records_for(after_key)`
+    opens the source, resuming after `after_key` when a checkpoint exists.
+    Each committed blog gets a new index version, like `index_blog`.
+    """
+    client = ensure_collection()
+    versions = get_index_versions()
+    embeddings = get_bulk_embeddings()
+    building = {}  # blog_id -> (active version, version being written, ids already in the active version)
+    blog_sections = {}  # blog_id -> parent sections, written at commit
+    gc_timers = []
+
+    def split(blog_id, text):
+        sections, chunks = split_blog(text)
+        if sections:
+            blog_sections[blog_id] = sections
+        return chunks
+
+    def version_tags(blog_id, point_id=None):
+        """New points belong to the building version only; points the active version already has keep it too."""
+        if blog_id not in building:
+            active = versions.active(blog_id, fresh=True)
+            stored = {pid for pid, _ in _stored_chunks(client, blog_id, active)} if active is not None else set()
+            building[blog_id] = (active, versions.next_version(blog_id), stored)
+        active, version, stored = building[blog_id]
+        return [active, version] if active is not None and point_id in stored else [version]
+
+    def write(items):
+        client.upload_points(
+            collection_name=QDRANT_COLLECTION,
+            points=[
+                PointStruct(
+                    id=point_id, vector=_point_vector(vector, payload["text"]),
+                    payload={**payload, VERSION_FIELD: version_tags(payload["blog_id"], point_id)},
+                )
+                for point_id, vector, payload in items
+            ],
+            batch_size=upload_batch or BULK_UPLOAD_BATCH,
+            parallel=parallel or BULK_UPLOAD_PARALLEL,
+            wait=True,
+        )
+
+    def commit(blog_ids):
+        for blog_id in blog_ids:
+            active, version, _ = building.pop(blog_id)
+            _write_sections(client, blog_id, blog_sections.pop(blog_id, []), active, version)
+            versions.activate(blog_id, version)
+            invalidate_blog_caches(blog_id)
+        gc_timers.append(versions.schedule_gc(get_qdrant_client, QDRANT_COLLECTION, *blog_ids))
+        if SECTIONS_ENABLED:
+            gc_timers.append(versions.schedule_gc(get_qdrant_client, QDRANT_SECTIONS_COLLECTION, *blog_ids))
+
+    indexer = BulkIndexer(
+        split, embeddings.embed_documents, write, commit,
+        embed_batch=embed_batch or BULK_EMBED_BATCH,
+        window_chunks=window_chunks or BULK_WINDOW_CHUNKS,
+        checkpoint_path=checkpoint_path,
+        source=source,
+    )
+    after = indexer.resume_key() if resume else None
+    if after is not None:
+        print(f"DEBUG: Resuming bulk index of {source} after {after}")
+    report = indexer.run(records_for(after))
+    if drain_gc:
+        # Scripts exit right after; let old versions be collected first
+        for timer in gc_timers:
+            timer.join()
+    return report
+
+def index_content(text, blog_id):
+    """Split text into chunks, embed the changed ones, and sync them into Qdrant."""
     # Return lightweight rag_data (text only, no embeddings) for backward compat
-    return [{"text": chunk} for chunk in chunks]
+    return index_blog(text, blog_id)["rag_data"]
 
 def get_basic_response(question):
     """Return hardcoded formal responses for basic greetings/questions."""
@@ -207,6 +485,168 @@ def get_basic_response(question):
     
     return responses.get(q)
 
+NO_INFO_ANSWER = "No specific information found for this blog."
+RAG_SYSTEM = "You are a helpful AI assistant. Answer based on the provided blog context."
+
+def _blog_filter(blog_id):
+    """Chunks of the blog's active index version."""
+    return blog_filter(blog_id, get_index_versions().active(blog_id))
+
+async def _ablog_filter(blog_id):
+    # The active version is usually cached; only a Redis round trip goes to a thread
+    if get_index_versions().is_cached(blog_id):
+        return _blog_filter(blog_id)
+    return await asyncio.to_thread(_blog_filter, blog_id)
+
+# Retrieval helpers return (text, score, vector) hits, best first, so the
+# context builder can cut, diversify and dedupe before packing the prompt.
+
+def _qdrant_hits(points, fused_query=None):
+    """
+    Hits with Qdrant's score. RRF scores (hybrid search) are rank-based and have
+    no relevance gap to cut at, so fused hits pass `fused_query` and are scored
+    by dense cosine to it instead, the score the dense prefetch ranked them by.
+    """
+    if fused_query is None:
+        return [(hit.payload["text"], hit.score, dense_of(hit.vector)) for hit in points]
+    q = unit(fused_query)
+    hits = []
+    for hit in points:
+        vector = dense_of(hit.vector)
+        score = float(unit(vector) @ q) if vector is not None else None
+        hits.append((hit.payload["text"], score, vector))
+    return hits
+
+def _hybrid_prefetch(query_filter, query_vector, question):
+    """Dense and BM25 candidate lists to fuse with RRF, or None for a dense-only search."""
+    if not question or not _hybrid():
+        return None
+    indices, values = encode_query(question)
+    if not indices:
+        return None
+    return [
+        Prefetch(query=query_vector, filter=query_filter, params=_search_params, limit=HYBRID_PREFETCH),
+        Prefetch(
+            query=SparseVector(indices=indices, values=values), using=SPARSE_VECTOR_NAME,
+            filter=query_filter, limit=HYBRID_PREFETCH,
+        ),
+    ]
+
+def _fallback_chunks(blog_id, rag_data, query_vector, k=CONTEXT_CANDIDATES):
+    """Cosine-rank legacy MongoDB rag_data items against the query vector."""
+    return get_fallback_index().search(blog_id, rag_data, query_vector, k, with_vectors=True)
+
+def _hot_chunks(blog_id, query_vector, k=CONTEXT_CANDIDATES):
+    """Top chunks from the in-process hot-blog tier, or None when Qdrant has to answer."""
+    if not HOT_TIER_ENABLED:
+        return None
+    try:
+        return get_hot_tier().search(blog_id, query_vector, k, with_vectors=True)
+    except Exception as e:
+        print(f"Hot Tier Error: {e}")
+        return None
+
+def _snapshot_chunks(blog_id, query_vector, k=CONTEXT_CANDIDATES):
+    """Top chunks from the local Qdrant snapshot ([] when there is none)."""
+    try:
+        return get_snapshot_store().search(blog_id, query_vector, k, with_vectors=True) or []
+    except Exception as e:
+        print(f"Snapshot Search Error: {e}")
+        return []
+
+def _search_chunks(blog_id, query_vector, k=CONTEXT_CANDIDATES, question=None):
+    """
+    Retrieve the top chunk hits for a blog, keeping Qdrant off the path when
+    possible. With `question`, Qdrant fuses dense and BM25 results (RRF).
+    """
+    if RETRIEVAL_BACKEND == "snapshot":
+        return _snapshot_chunks(blog_id, query_vector, k)
+    top_chunks = _hot_chunks(blog_id, query_vector, k)
+    if top_chunks is not None:
+        return top_chunks
+    try:
+        query_filter = _blog_filter(blog_id)
+        prefetch = _hybrid_prefetch(query_filter, query_vector, question)
+        search_results = get_qdrant_client().query_points(
+            collection_name=QDRANT_COLLECTION,
+            query=FusionQuery(fusion=Fusion.RRF) if prefetch else query_vector,
+            prefetch=prefetch,
+            query_filter=query_filter,
+            search_params=None if prefetch else _search_params,
+            limit=k,
+            with_vectors=True,
+        )
+        return _qdrant_hits(search_results.points, query_vector if prefetch else None)
+    except Exception as qe:
+        print(f"Qdrant Query Error: {qe}")
+        return _snapshot_chunks(blog_id, query_vector, k)
+
+async def _asearch_chunks(blog_id, query_vector, k=CONTEXT_CANDIDATES, question=None):
+    if RETRIEVAL_BACKEND == "snapshot":
+        return _snapshot_chunks(blog_id, query_vector, k)
+    top_chunks = _hot_chunks(blog_id, query_vector, k)
+    if top_chunks is not None:
+        return top_chunks
+    try:
+        query_filter = await _ablog_filter(blog_id)
+        await _aprobe_collection()
+        prefetch = _hybrid_prefetch(query_filter, query_vector, question)
+        search_results = await get_async_qdrant_client().query_points(
+            collection_name=QDRANT_COLLECTION,
+            query=FusionQuery(fusion=Fusion.RRF) if prefetch else query_vector,
+            prefetch=prefetch,
+            query_filter=query_filter,
+            search_params=None if prefetch else _search_params,
+            limit=k,
+            with_vectors=True,
+        )
+        return _qdrant_hits(search_results.points, query_vector if prefetch else None)
+    except Exception as qe:
+        print(f"Qdrant Query Error: {qe}")
+        return _snapshot_chunks(blog_id, query_vector, k)
+
+def _pack_chunks(query_vector, hits):
+    """Adaptive k + MMR over the candidates, then drop text repeated between them."""
+    texts = select_chunks(
+        query_vector, hits, CONTEXT_MAX_CHUNKS, CONTEXT_MIN_CHUNKS, CONTEXT_SCORE_GAP, CONTEXT_MMR_LAMBDA
+    )
+    return strip_overlap(texts)
+
+def _build_context(blog_id, query_vector, hits):
+    """Pick chunks, then small-to-big: swap them for their parent sections within the token budget."""
+    chunks = _pack_chunks(query_vector, hits)
+    sections = get_section_cache().get(blog_id) if SECTIONS_ENABLED else []
+    return "\n\n".join(expand_to_sections(chunks, sections, CONTEXT_MAX_TOKENS, _count_tokens))
+
+async def _abuild_context(blog_id, query_vector, hits):
+    if SECTIONS_ENABLED and get_section_cache().cached(blog_id) is None:
+        return await asyncio.to_thread(_build_context, blog_id, query_vector, hits)
+    return _build_context(blog_id, query_vector, hits)
+
+def retrieve_context(blog_id, query_vector, question=None):
+    """
+    Context for a question from the blog's active index (hybrid when `question`
+    is given and the collection has BM25 vectors), or None when nothing matches.
+    """
+    hits = _search_chunks(blog_id, query_vector, question=question)
+    if not hits:
+        return None
+    return _build_context(blog_id, query_vector, hits)
+
+def _rag_messages(context, question):
+    return [
+        SystemMessage(content=RAG_SYSTEM),
+        HumanMessage(content=f"Context:\n{context}\n\nQuestion: {question}")
+    ]
+
+class AnswerUnavailable(Exception):
+    """No answer could be produced; str() is the message returned to the user."""
+
+def _question_keys(blog_id, question):
+    """Return the single-flight key and exact-cache key for a question."""
+    question_hash = hashlib.md5(normalize_question(question).encode()).hexdigest()
+    return f"{blog_id}:{question_hash}", semantic_cache.exact_key(blog_id, question_hash)
+
 def query_content(blog_id, rag_data, question):
     """Query blog content using Qdrant vector search with fallback to MongoDB."""
     if not blog_id:
@@ -217,102 +657,366 @@ def query_content(blog_id, rag_data, question):
     if basic_ans:
         print(f"DEBUG: Basic response triggered: {question}")
         return basic_ans
-        
+
+    # 1. In-process L1, then Redis exact cache or coalesce with whoever is already answering
+    question_clean = normalize_question(question)
+    l1 = get_l1_cache()
+    cached_answer = l1.get(blog_id, question_clean)
+    if cached_answer:
+        return cached_answer
+
+    flight_key, kv_cache_key = _question_keys(blog_id, question)
+    try:
+        answer = get_single_flight().do(
+            flight_key, kv_cache_key,
+            lambda: _generate_answer(blog_id, rag_data, question)
+        )
+    except (AnswerUnavailable, LeaderError) as e:
+        return str(e)
+    if answer != NO_INFO_ANSWER:
+        l1.put(blog_id, question_clean, answer)
+    return answer
+
+def _generate_answer(blog_id, rag_data, question):
+    """Semantic cache → Qdrant → LLM. Runs only in the single-flight leader."""
     embeddings_model = get_embeddings()
+
+    # 2. Check Semantic Cache
+    query_vector = None
+    try:
+        query_vector = embeddings_model.embed_query(question)
+        cached_answer = get_l1_cache().get_similar(blog_id, query_vector)
+        if cached_answer:
+            return cached_answer
+        cached_answer = search_semantic_cache(blog_id, query_vector)
+        if cached_answer:
+            get_l1_cache().put(blog_id, normalize_question(question), cached_answer, query_vector)
+            return cached_answer
+    except Exception as e:
+        print(f"Embedding/Semantic Cache Error: {e}")
+        if query_vector is None:
+            raise AnswerUnavailable("AI service is currently experiencing high latency.")
+
+    # 3. Hot-blog tier / Qdrant / local snapshot
+    top_chunks = _search_chunks(blog_id, query_vector, question=question)
+
+    # Fallback to rag_data (MongoDB)
+    if not top_chunks and rag_data:
+        print("Fallback to MongoDB rag_data")
+        top_chunks = _fallback_chunks(blog_id, rag_data, query_vector)
+
+    if not top_chunks:
+        return NO_INFO_ANSWER
+
+    context = _build_context(blog_id, query_vector, top_chunks)
+    llm = get_llm()
+    try:
+        response = llm.invoke(_rag_messages(context, question))
+    except Exception as le:
+        print(f"LLM Error: {le}")
+        raise AnswerUnavailable(f"AI failed to generate response. {str(le)[:50]}")
+
+    # Cache before the leader publishes, so late arrivals hit the exact cache
+    answer = response.content
+    update_semantic_cache(blog_id, question, answer, query_vector)
+    get_l1_cache().put(blog_id, normalize_question(question), answer, query_vector)
+    return answer
+
+async def aquery_content(blog_id, rag_data, question):
+    """Async twin of `query_content` built on the async Redis, Qdrant, embeddings and LLM clients."""
+    if not blog_id:
+        return "No information available for this blog."
+
+    # 0. Check for Basic Greetings
+    basic_ans = get_basic_response(question)
+    if basic_ans:
+        print(f"DEBUG: Basic response triggered: {question}")
+        return basic_ans
+
+    # 1. In-process L1, then Redis exact cache or coalesce with whoever is already answering
     question_clean = normalize_question(question)
-    question_hash = hashlib.md5(question_clean.encode()).hexdigest()
-    
-    # 1. Check Exact Match Cache
+    l1 = get_l1_cache()
+    cached_answer = l1.get(blog_id, question_clean)
+    if cached_answer:
+        return cached_answer
+
+    flight_key, kv_cache_key = _question_keys(blog_id, question)
     try:
-        r = get_redis_client()
-        kv_cache_key = f"exact_cache:{blog_id}:{question_hash}"
-        cached_answer = r.get(kv_cache_key)
+        answer = await get_async_single_flight().do(
+            flight_key, kv_cache_key,
+            lambda: _agenerate_answer(blog_id, rag_data, question)
+        )
+    except (AnswerUnavailable, LeaderError) as e:
+        return str(e)
+    if answer != NO_INFO_ANSWER:
+        l1.put(blog_id, question_clean, answer)
+    return answer
+
+async def _agenerate_answer(blog_id, rag_data, question):
+    """Async `_generate_answer`."""
+    answer, context, query_vector = await _aretrieve(blog_id, rag_data, question)
+    if answer is not None:
+        return answer
+
+    llm = get_llm()
+    try:
+        response = await llm.ainvoke(_rag_messages(context, question))
+    except Exception as le:
+        print(f"LLM Error: {le}")
+        raise AnswerUnavailable(f"AI failed to generate response. {str(le)[:50]}")
+
+    answer = response.content
+    await aupdate_semantic_cache(blog_id, question, answer, query_vector)
+    get_l1_cache().put(blog_id, normalize_question(question), answer, query_vector)
+    return answer
+
+async def _aretrieve(blog_id, rag_data, question):
+    """Semantic cache → Qdrant. Returns (answer, None, vector) on a cache hit or no context, else (None, context, vector)."""
+    embeddings_model = get_embeddings()
+
+    # 2. Check Semantic Cache
+    query_vector = None
+    try:
+        query_vector = await embeddings_model.aembed_query(question)
+        cached_answer = get_l1_cache().get_similar(blog_id, query_vector)
+        if cached_answer:
+            return cached_answer, None, query_vector
+        cached_answer = await asearch_semantic_cache(blog_id, query_vector)
         if cached_answer:
-            return cached_answer.decode('utf-8')
+            get_l1_cache().put(blog_id, normalize_question(question), cached_answer, query_vector)
+            return cached_answer, None, query_vector
     except Exception as e:
-        print(f"Redis Exact Cache Error: {e}")
+        print(f"Embedding/Semantic Cache Error: {e}")
+        if query_vector is None:
+            raise AnswerUnavailable("AI service is currently experiencing high latency.")
+
+    # 3. Hot-blog tier / Qdrant / local snapshot
+    top_chunks = await _asearch_chunks(blog_id, query_vector, question=question)
+
+    # Fallback to rag_data (MongoDB)
+    if not top_chunks and rag_data:
+        print("Fallback to MongoDB rag_data")
+        top_chunks = _fallback_chunks(blog_id, rag_data, query_vector)
+
+    if not top_chunks:
+        return NO_INFO_ANSWER, None, query_vector
+    return None, await _abuild_context(blog_id, query_vector, top_chunks), query_vector
+
+async def astream_query(blog_id, rag_data, question):
+    """
+    Streaming `aquery_content`: yields {"type": "token"} events as the LLM
+    produces them, a single {"type": "answer"} event for cached answers, then
+    {"type": "done"} (or {"type": "error"}). The answer is written to the
+    caches, and single-flight followers are released, only once the stream
+    has completed.
+    """
+    if not blog_id:
+        yield {"type": "answer", "text": "No information available for this blog.", "cached": False}
+        return
+
+    basic_ans = get_basic_response(question)
+    if basic_ans:
+        yield {"type": "answer", "text": basic_ans, "cached": False}
+        return
+
+    question_clean = normalize_question(question)
+    l1 = get_l1_cache()
+    cached_answer = l1.get(blog_id, question_clean)
+    if cached_answer:
+        yield {"type": "answer", "text": cached_answer, "cached": True}
+        return
 
-    # 2. Concurrency Lock
-    lock_key = f"lock:{blog_id}:{question_hash}"
-    r = None
+    flight_key, kv_cache_key = _question_keys(blog_id, question)
     try:
-        r = get_redis_client()
-        for attempt in range(2):
-            if r.exists(lock_key):
-                for _ in range(20): 
-                    time.sleep(0.5)
-                    ans = r.get(kv_cache_key)
-                    if ans: return ans.decode('utf-8')
-                    if not r.exists(lock_key): break
-            
-            if r.set(lock_key, "processing", ex=60, nx=True):
-                break
-            time.sleep(0.5)
-    except Exception as re:
-        print(f"Redis Lock Error: {re}")
+        cached_answer, flight = await get_async_single_flight().acquire(flight_key, kv_cache_key)
+    except LeaderError as e:
+        yield {"type": "error", "message": str(e)}
+        return
+    if flight is None:
+        if cached_answer != NO_INFO_ANSWER:
+            l1.put(blog_id, question_clean, cached_answer)
+        yield {"type": "answer", "text": cached_answer, "cached": True}
+        return
 
     try:
-        # 3. Check Semantic Cache
-        query_vector = None
-        try:
-            query_vector = embeddings_model.embed_query(question)
-            cached_answer = search_semantic_cache(blog_id, query_vector)
-            if cached_answer:
-                return cached_answer
-        except Exception as e:
-            print(f"Embedding/Semantic Cache Error: {e}")
-            if query_vector is None:
-                return "AI service is currently experiencing high latency."
+        answer, context, query_vector = await _aretrieve(blog_id, rag_data, question)
+        if answer is not None:
+            await flight.resolve(answer)
+            yield {"type": "answer", "text": answer, "cached": answer != NO_INFO_ANSWER}
+            return
 
-        # 4. Search Qdrant
-        top_chunks = []
-        try:
-            client = get_qdrant_client()
-            search_results = client.query_points(
-                collection_name=QDRANT_COLLECTION,
-                query=query_vector,
-                query_filter=Filter(must=[FieldCondition(key="blog_id", match=MatchValue(value=blog_id))]),
-                limit=8
-            )
-            top_chunks = [hit.payload["text"] for hit in search_results.points]
-        except Exception as qe:
-            print(f"Qdrant Query Error: {qe}")
-        
-        # Fallback to rag_data (MongoDB)
-        if not top_chunks and rag_data:
-            print("Fallback to MongoDB rag_data")
-            results = []
-            for item in rag_data:
-                if 'embedding' not in item or not item['embedding']: continue
-                doc_vector = np.array(item['embedding'])
-                q_vector = np.array(query_vector)
-                if doc_vector.shape != q_vector.shape: continue
-                similarity = np.dot(doc_vector, q_vector) / (np.linalg.norm(doc_vector) * np.linalg.norm(q_vector))
-                results.append((item['text'], similarity))
-            results.sort(key=lambda x: x[1], reverse=True)
-            top_chunks = [res[0] for res in results[:8]]
-        
-        if not top_chunks:
-            return "No specific information found for this blog."
-        
-        context = "\n\n".join(top_chunks)
-        llm = get_llm()
-        RAG_SYSTEM = "You are a helpful AI assistant. Answer based on the provided blog context."
-        
+        parts = []
+        started = time.perf_counter()
         try:
-            response = llm.invoke([
-                SystemMessage(content=RAG_SYSTEM),
-                HumanMessage(content=f"Context:\n{context}\n\nQuestion: {question}")
-            ])
-            answer = response.content
-            if blog_id:
-                update_semantic_cache(blog_id, question, answer, query_vector)
-            return answer
+            async for chunk in get_llm().astream(_rag_messages(context, question)):
+                if not chunk.content:
+                    continue
+                if not parts:
+                    metrics.observe("llm.ttft_ms", (time.perf_counter() - started) * 1000)
+                parts.append(chunk.content)
+                yield {"type": "token", "text": chunk.content}
         except Exception as le:
             print(f"LLM Error: {le}")
-            return f"AI failed to generate response. {str(le)[:50]}"
-            
+            raise AnswerUnavailable(f"AI failed to generate response. {str(le)[:50]}")
+        metrics.observe("llm.stream_ms", (time.perf_counter() - started) * 1000)
+
+        answer = "".join(parts)
+        await aupdate_semantic_cache(blog_id, question, answer, query_vector)
+        l1.put(blog_id, question_clean, answer, query_vector)
+        await flight.resolve(answer)
+        yield {"type": "done", "text": answer}
+    except AnswerUnavailable as e:
+        await flight.reject(e)
+        yield {"type": "error", "message": str(e)}
+    except BaseException as e:
+        # Client went away mid-stream: release the followers, cache nothing
+        await asyncio.shield(flight.reject(e))
+        raise
+
+async def abatch_query(items, concurrency=BATCH_QUERY_CONCURRENCY):
+    """
+    Answer many (blog_id, question) pairs at once; yields one result dict per
+    item, in input order, as soon as it and everything before it are ready.
+
+    Exact cache is one MGET, misses are embedded in one call and searched with
+    one `query_batch_points`; only the LLM calls fan out, `concurrency` at a time.
+    Duplicate questions within the batch are answered once.
+    """
+    loop = asyncio.get_running_loop()
+    futures = [loop.create_future() for _ in items]
+    jobs = {}
+    l1 = get_l1_cache()
+
+    for i, (blog_id, question) in enumerate(items):
+        if not blog_id:
+            futures[i].set_result(("No information available for this blog.", "none"))
+            continue
+        basic_ans = get_basic_response(question)
+        if basic_ans:
+            futures[i].set_result((basic_ans, "basic"))
+            continue
+        cached_answer = l1.get(blog_id, normalize_question(question))
+        if cached_answer:
+            futures[i].set_result((cached_answer, "l1"))
+            continue
+        flight_key, kv_cache_key = _question_keys(blog_id, question)
+        job = jobs.setdefault(flight_key, {
+            "blog_id": blog_id, "question": question, "kv_key": kv_cache_key, "indexes": [],
+        })
+        job["indexes"].append(i)
+
+    resolver = loop.create_task(_aresolve_batch(list(jobs.values()), futures, concurrency))
+    try:
+        for i, (blog_id, question) in enumerate(items):
+            answer, source = await futures[i]
+            yield {"index": i, "blog_id": blog_id, "question": question, "answer": answer, "source": source}
     finally:
-        if r and lock_key:
-            try: r.delete(lock_key)
-            except: pass
+        if not resolver.done():
+            resolver.cancel()
+
+async def _aresolve_batch(jobs, futures, concurrency):
+    l1 = get_l1_cache()
+
+    def finish(job, answer, source, vector=None):
+        if source in ("exact", "semantic", "llm") and answer != NO_INFO_ANSWER:
+            l1.put(job["blog_id"], normalize_question(job["question"]), answer, vector)
+        for i in job["indexes"]:
+            if not futures[i].done():
+                futures[i].set_result((answer, source))
+
+    if not jobs:
+        return
+    try:
+        # 1. Exact cache: one round trip for the whole batch
+        try:
+            values = await get_async_redis_client().mget([job["kv_key"] for job in jobs])
+        except Exception as e:
+            print(f"Redis Batch Exact Cache Error: {e}")
+            values = [None] * len(jobs)
+        misses = []
+        for job, value in zip(jobs, values):
+            if value:
+                metrics.incr("cache.redis_exact.hit")
+                finish(job, value.decode("utf-8") if isinstance(value, bytes) else value, "exact")
+            else:
+                metrics.incr("cache.redis_exact.miss")
+                misses.append(job)
+        if not misses:
+            return
+
+        # 2. Embed every miss in one call
+        embeddings_model = get_embeddings()
+        embed_many = getattr(embeddings_model, "aembed_queries", embeddings_model.aembed_documents)
+        try:
+            vectors = await embed_many([job["question"] for job in misses])
+        except Exception as e:
+            print(f"Batch Embedding Error: {e}")
+            for job in misses:
+                finish(job, "AI service is currently experiencing high latency.", "error")
+            return
+
+        # 3. Semantic cache, then one Qdrant batch search for what is left
+        hits = await asyncio.gather(*(
+            asearch_semantic_cache(job["blog_id"], vector) for job, vector in zip(misses, vectors)
+        ))
+        todo = []
+        for job, vector, hit in zip(misses, vectors, hits):
+            if hit:
+                finish(job, hit, "semantic", vector)
+            else:
+                todo.append((job, vector))
+        if not todo:
+            return
+
+        if RETRIEVAL_BACKEND == "snapshot":
+            chunk_lists = [_snapshot_chunks(job["blog_id"], vector) for job, vector in todo]
+        else:
+            chunk_lists = [_hot_chunks(job["blog_id"], vector) for job, vector in todo]
+        remote = [i for i, chunks in enumerate(chunk_lists) if chunks is None]
+        if remote:
+            try:
+                await _aprobe_collection()
+                requests = []
+                for i in remote:
+                    job, vector = todo[i]
+                    query_filter = await _ablog_filter(job["blog_id"])
+                    prefetch = _hybrid_prefetch(query_filter, vector, job["question"])
+                    requests.append(QueryRequest(
+                        query=FusionQuery(fusion=Fusion.RRF) if prefetch else vector, prefetch=prefetch,
+                        filter=query_filter, params=None if prefetch else _search_params,
+                        limit=CONTEXT_CANDIDATES, with_payload=True, with_vector=True,
+                    ))
+                responses = await get_async_qdrant_client().query_batch_points(
+                    collection_name=QDRANT_COLLECTION, requests=requests,
+                )
+                for i, request, response in zip(remote, requests, responses):
+                    chunk_lists[i] = _qdrant_hits(response.points, todo[i][1] if request.prefetch else None)
+            except Exception as qe:
+                print(f"Qdrant Batch Query Error: {qe}")
+                for i in remote:
+                    chunk_lists[i] = _snapshot_chunks(todo[i][0]["blog_id"], todo[i][1])
+
+        # 4. LLM calls, bounded
+        llm = get_llm()
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def answer_one(job, vector, top_chunks):
+            if not top_chunks:
+                finish(job, NO_INFO_ANSWER, "none")
+                return
+            async with semaphore:
+                try:
+                    context = await _abuild_context(job["blog_id"], vector, top_chunks)
+                    result = await llm.ainvoke(_rag_messages(context, job["question"]))
+                except Exception as le:
+                    print(f"LLM Error: {le}")
+                    finish(job, f"AI failed to generate response. {str(le)[:50]}", "error")
+                    return
+            await aupdate_semantic_cache(job["blog_id"], job["question"], result.content, vector)
+            finish(job, result.content, "llm", vector)
+
+        await asyncio.gather(*(answer_one(job, vector, chunks) for (job, vector), chunks in zip(todo, chunk_lists)))
+    except Exception as e:
+        print(f"Batch Query Error: {e}")
+        for job in jobs:
+            finish(job, f"Batch query failed. {str(e)[:50]}", "error")
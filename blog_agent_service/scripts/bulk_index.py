@@ -0,0 +1,74 @@
+"""
+Maintenance Script: Bulk (re-)index many blogs into Qdrant in one run.
+
+Chunks from many blogs share embedding requests and points are written with
+parallel `upload_points`. Progress is checkpointed after every window, so an
+interrupted run picks up where it stopped (pass --restart to start over).
+
+Usage:
+    python scripts/bulk_index.py --jsonl blogs.jsonl
+    python scripts/bulk_index.py --mongo [--mongo-db test] [--mongo-collection blogs]
+    python scripts/bulk_index.py --mongo --embed-batch 512 --upload-batch 256 --parallel 8 --restart
+"""
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+SERVICE_DIR = Path(__file__).resolve().parent.parent
+if str(SERVICE_DIR) not in sys.path:
+    sys.path.insert(0, str(SERVICE_DIR))
+
+from agents.rag import config
+from agents.rag.bulk_index import iter_jsonl, iter_mongo
+from agents.rag_logic import bulk_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--jsonl", help='file with one {"blog_id", "text"} object per line')
+    source.add_argument("--mongo", action="store_true", help="read blogs from MONGO_URI")
+    parser.add_argument("--mongo-db", default="test")
+    parser.add_argument("--mongo-collection", default="blogs")
+    parser.add_argument("--checkpoint", default=config.BULK_CHECKPOINT_PATH)
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    parser.add_argument("--embed-batch", type=int, default=config.BULK_EMBED_BATCH, help="texts per embedding request")
+    parser.add_argument("--upload-batch", type=int, default=config.BULK_UPLOAD_BATCH, help="points per upload request")
+    parser.add_argument("--parallel", type=int, default=config.BULK_UPLOAD_PARALLEL, help="parallel upload workers")
+    parser.add_argument("--window", type=int, default=config.BULK_WINDOW_CHUNKS, help="chunks per commit / checkpoint")
+    args = parser.parse_args()
+
+    if args.jsonl:
+        path = os.path.abspath(args.jsonl)
+        source_name = f"jsonl:{path}"
+        records_for = lambda after: iter_jsonl(path, after)
+    else:
+        mongo_uri = os.getenv("MONGO_URI")
+        if not mongo_uri:
+            print("ERROR: MONGO_URI not set in .env")
+            sys.exit(1)
+        source_name = f"mongo:{args.mongo_db}.{args.mongo_collection}"
+        records_for = lambda after: iter_mongo(mongo_uri, args.mongo_db, args.mongo_collection, after)
+
+    report = bulk_index(
+        source_name, records_for,
+        checkpoint_path=args.checkpoint,
+        resume=not args.restart,
+        embed_batch=args.embed_batch,
+        upload_batch=args.upload_batch,
+        parallel=args.parallel,
+        window_chunks=args.window,
+        drain_gc=True,
+    )
+    print(json.dumps(report, indent=2))
+    print(
+        f"✅ Indexed {report['blogs']} blogs / {report['chunks']} chunks in {report['elapsed_s']:.1f}s: "
+        f"{report['chunks_per_s']:.0f} chunks/s, {report['tokens_per_s']:.0f} tokens/s "
+        f"(embedding {report['embed_s']:.1f}s, upload {report['upload_s']:.1f}s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
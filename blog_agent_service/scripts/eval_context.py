@@ -0,0 +1,100 @@
+"""
+Eval Script: Compare the old "join the top 8 chunks" prompt context with the
+token-budgeted builder (adaptive k + MMR + overlap dedupe + sections) on an
+offline question set.
+
+The question set is JSONL, one question per line:
+
+    {"blog_id": "...", "question": "...", "expected": ["fact the answer needs", ...]}
+
+For each strategy it reports prompt tokens, context recall (share of
+`expected` strings present in the context) and, with --llm, LLM latency and
+answer recall. Both strategies answer from the same retrieval results.
+
+Usage:
+    python scripts/eval_context.py questions.jsonl [--llm] [--limit N]
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+SERVICE_DIR = Path(__file__).resolve().parent.parent
+if str(SERVICE_DIR) not in sys.path:
+    sys.path.insert(0, str(SERVICE_DIR))
+
+from agents import rag_logic
+from agents.rag.clients import get_embeddings, get_llm
+
+
+def old_context(blog_id, query_vector, hits):
+    return "\n\n".join(text for text, _, _ in hits[:8])
+
+
+STRATEGIES = [("top-8 join", old_context), ("budgeted", rag_logic._build_context)]
+
+
+def recall(expected, text):
+    if not expected:
+        return 1.0
+    text = text.lower()
+    return sum(e.lower() in text for e in expected) / len(expected)
+
+
+def load_questions(path, limit):
+    with open(path, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return rows[:limit] if limit else rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("questions")
+    parser.add_argument("--llm", action="store_true", help="also time LLM answers and score them")
+    parser.add_argument("--limit", type=int, default=0)
+    args = parser.parse_args()
+
+    rows = load_questions(args.questions, args.limit)
+    embeddings = get_embeddings()
+    results = {name: {"tokens": [], "recall": [], "build_ms": [], "llm_s": [], "answer_recall": []} for name, _ in STRATEGIES}
+    for row in rows:
+        query_vector = embeddings.embed_query(row["question"])
+        hits = rag_logic._search_chunks(row["blog_id"], query_vector)
+        if not hits:
+            print(f"DEBUG: No chunks for {row['blog_id']}: {row['question'][:60]}")
+            continue
+        for name, build in STRATEGIES:
+            start = time.perf_counter()
+            context = build(row["blog_id"], query_vector, hits)
+            stats = results[name]
+            stats["build_ms"].append((time.perf_counter() - start) * 1000)
+            stats["tokens"].append(rag_logic._count_tokens(context))
+            stats["recall"].append(recall(row.get("expected", []), context))
+            if args.llm:
+                start = time.perf_counter()
+                answer = get_llm().invoke(rag_logic._rag_messages(context, row["question"])).content
+                stats["llm_s"].append(time.perf_counter() - start)
+                stats["answer_recall"].append(recall(row.get("expected", []), answer))
+
+    print(f"{len(rows)} questions\n")
+    header = f"{'strategy':>12} {'ctx tok':>8} {'p95 tok':>8} {'recall':>7} {'build ms':>9}"
+    if args.llm:
+        header += f" {'llm s':>7} {'answer':>7}"
+    print(header)
+    for name, stats in results.items():
+        if not stats["tokens"]:
+            continue
+        tokens = sorted(stats["tokens"])
+        line = (
+            f"{name:>12} {statistics.mean(tokens):>8.0f} {tokens[int(0.95 * (len(tokens) - 1))]:>8} "
+            f"{statistics.mean(stats['recall']):>6.1%} {statistics.mean(stats['build_ms']):>9.1f}"
+        )
+        if args.llm:
+            line += f" {statistics.mean(stats['llm_s']):>7.2f} {statistics.mean(stats['answer_recall']):>6.1%}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
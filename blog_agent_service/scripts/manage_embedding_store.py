@@ -0,0 +1,41 @@
+"""
+Maintenance Script: Inspect and compact the local chunk embedding store.
+
+Usage:
+    python scripts/manage_embedding_store.py stats
+    python scripts/manage_embedding_store.py compact [--max-age-days 90] [--keep-model MODEL ...]
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+SERVICE_DIR = Path(__file__).resolve().parent.parent
+if str(SERVICE_DIR) not in sys.path:
+    sys.path.insert(0, str(SERVICE_DIR))
+
+from agents.rag import config
+from agents.rag.embedding_store import EmbeddingStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["stats", "compact"])
+    parser.add_argument("--path", default=config.EMBEDDING_STORE_PATH)
+    parser.add_argument("--max-age-days", type=float, default=None, help="drop vectors unused for this long")
+    parser.add_argument("--keep-model", action="append", default=None, help="drop vectors of every other model")
+    args = parser.parse_args()
+
+    store = EmbeddingStore(args.path)
+    if args.command == "stats":
+        print(json.dumps(store.stats(), indent=2))
+        return
+
+    before = store.stats()["file_bytes"]
+    removed = store.compact(max_age_days=args.max_age_days, keep_models=args.keep_model)
+    after = store.stats()["file_bytes"]
+    print(f"✅ Removed {removed} vectors, file {before / 1e6:.1f}MB -> {after / 1e6:.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
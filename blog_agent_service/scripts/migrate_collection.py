@@ -0,0 +1,322 @@
+"""
+Maintenance Script: Move `blog_embeddings` to a new vector layout without downtime.
+
+Shorter `text-embedding-3-small` vectors, int8 scalar quantization and tuned
+HNSW settings can only be chosen when a collection is created, so this script
+builds the new collection next to the live one and then re-points the
+`blog_embeddings` alias at it.
+
+1. build    creates the target collection and copies every point into it.
+            Payloads (including `index_versions`) are kept. Vectors are the
+            live 1536-d ones shortened and renormalised, or re-embedded at the
+            new size with --reembed. BM25 vectors are recomputed locally.
+            Progress is checkpointed per page. Points deleted from the live
+            collection meanwhile are pruned at the end. Run it again right
+            before `switch` to pick up blogs indexed in the meantime.
+2. compare  measures recall@k and latency of the target against exact search
+            on the live collection, plus memory per vector.
+3. switch   re-points the alias. Deploy the agent with the new
+            RAG_EMBEDDING_DIMENSIONS at the same time; query vectors must
+            match the collection.
+
+The first switch has to replace the real `blog_embeddings` collection with an
+alias (--drop-old). Until the alias exists, queries fall back to the local
+snapshot. Later switches are atomic and can be rolled back by switching back.
+
+Usage:
+    python scripts/migrate_collection.py build --dimensions 512 --quantization int8 --on-disk [--m 16] [--ef-construct 100]
+    python scripts/migrate_collection.py compare --target blog_embeddings_512d_int8 [--sample 200] [--k 8]
+    python scripts/migrate_collection.py switch --target blog_embeddings_512d_int8 [--drop-old] [--reset-semantic-cache]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+SERVICE_DIR = Path(__file__).resolve().parent.parent
+if str(SERVICE_DIR) not in sys.path:
+    sys.path.insert(0, str(SERVICE_DIR))
+
+from qdrant_client import models
+
+from agents.rag import config, semantic_cache
+from agents.rag.clients import embeddings_for, get_qdrant_client, get_redis_client
+from agents.rag.collection import collection_config, resolve, search_params, vector_bytes
+from agents.rag.sparse import encode_document
+from agents.rag.vectors import dense_of, truncate
+from agents.rag.versions import VERSION_FIELD
+
+DEFAULT_CHECKPOINT = str(SERVICE_DIR / "data" / "migrate_collection.checkpoint.json")
+
+
+def default_target(dimensions, quantization):
+    suffix = f"_{quantization}" if quantization != "none" else ""
+    return f"{config.QDRANT_COLLECTION}_{dimensions}d{suffix}"
+
+
+def live_collection(client):
+    source = resolve(client, config.QDRANT_COLLECTION)
+    if source is None:
+        print(f"ERROR: '{config.QDRANT_COLLECTION}' does not exist")
+        sys.exit(1)
+    return source
+
+
+def layout(client, name):
+    """(dimensions, quantization, on_disk, points) of a collection."""
+    info = client.get_collection(name)
+    vectors = info.config.params.vectors
+    quantization = "int8" if info.config.quantization_config is not None else "none"
+    return vectors.size, quantization, bool(vectors.on_disk), info.points_count or 0
+
+
+# -----------------------------
+# build
+# -----------------------------
+def create_target(client, target, args):
+    if resolve(client, target) is not None:
+        print(f"ℹ️  Target '{target}' already exists, continuing the copy into it")
+        return
+    client.create_collection(
+        collection_name=target,
+        **collection_config(
+            args.dimensions, args.quantization, args.on_disk, args.m, args.ef_construct,
+            sparse_name=config.SPARSE_VECTOR_NAME if config.HYBRID_ENABLED else None,
+        ),
+    )
+    for field, schema in (("blog_id", models.PayloadSchemaType.KEYWORD), (VERSION_FIELD, models.PayloadSchemaType.INTEGER)):
+        client.create_payload_index(collection_name=target, field_name=field, field_schema=schema)
+    print(f"✅ Created '{target}': {args.dimensions}-d, quantization={args.quantization}, on_disk={args.on_disk}, "
+          f"m={args.m}, ef_construct={args.ef_construct}")
+
+
+def target_vector(dense, text):
+    if not config.HYBRID_ENABLED:
+        return dense
+    indices, values = encode_document(text, config.BM25_K1, config.BM25_B, config.BM25_AVG_TOKENS)
+    return {"": dense, config.SPARSE_VECTOR_NAME: models.SparseVector(indices=indices, values=values)}
+
+
+def load_checkpoint(path, source, target):
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        state = json.load(f)
+    if state.get("source") != source or state.get("target") != target:
+        return None
+    return state
+
+
+def save_checkpoint(path, state):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def prune(client, source, target, page):
+    """Delete target points that no longer exist in the live collection."""
+    removed, offset = 0, None
+    while True:
+        points, offset = client.scroll(
+            collection_name=target, limit=page, offset=offset, with_payload=False, with_vectors=False
+        )
+        ids = [p.id for p in points]
+        live = {p.id for p in client.retrieve(collection_name=source, ids=ids, with_payload=False, with_vectors=False)}
+        gone = [point_id for point_id in ids if point_id not in live]
+        if gone:
+            client.delete(collection_name=target, points_selector=models.PointIdsList(points=gone))
+            removed += len(gone)
+        if offset is None:
+            return removed
+
+
+def build(client, args):
+    source = live_collection(client)
+    target = args.target or default_target(args.dimensions, args.quantization)
+    source_dims = layout(client, source)[0]
+    reembed = args.reembed or source_dims < args.dimensions
+    create_target(client, target, args)
+    embeddings = embeddings_for(args.dimensions) if reembed else None
+
+    state = None if args.restart else load_checkpoint(args.checkpoint, source, target)
+    state = state or {"source": source, "target": target, "offset": None, "copied": 0}
+    if state["offset"] is not None:
+        print(f"ℹ️  Resuming after {state['copied']} points")
+
+    start = time.perf_counter()
+    while True:
+        points, offset = client.scroll(
+            collection_name=source, limit=args.page, offset=state["offset"], with_payload=True, with_vectors=True
+        )
+        texts = [p.payload.get("text", "") for p in points]
+        if reembed:
+            vectors = embeddings.embed_documents(texts) if texts else []
+        else:
+            vectors = [truncate(dense_of(p.vector), args.dimensions).tolist() for p in points]
+        if points:
+            client.upsert(
+                collection_name=target,
+                points=[
+                    models.PointStruct(id=p.id, vector=target_vector(vector, text), payload=p.payload)
+                    for p, vector, text in zip(points, vectors, texts)
+                ],
+            )
+        state["offset"], state["copied"] = offset, state["copied"] + len(points)
+        save_checkpoint(args.checkpoint, state)
+        print(f"  copied {state['copied']} points ({state['copied'] / (time.perf_counter() - start):.0f}/s)")
+        if offset is None:
+            break
+
+    removed = prune(client, source, target, args.page)
+    os.remove(args.checkpoint)
+    how = f"re-embedded at {args.dimensions}-d" if reembed else f"shortened {source_dims}-d -> {args.dimensions}-d"
+    print(f"✅ Copied {state['copied']} points from '{source}' to '{target}' ({how}), pruned {removed}")
+
+
+# -----------------------------
+# compare
+# -----------------------------
+def _ids(client, collection, vector, blog_id, k, params):
+    query_filter = None
+    if blog_id is not None:
+        query_filter = models.Filter(must=[models.FieldCondition(key="blog_id", match=models.MatchValue(value=blog_id))])
+    start = time.perf_counter()
+    points = client.query_points(
+        collection_name=collection, query=vector, query_filter=query_filter, search_params=params, limit=k,
+    ).points
+    return [p.id for p in points], (time.perf_counter() - start) * 1000
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[int(q * (len(values) - 1))]
+
+
+def compare(client, args):
+    source = live_collection(client)
+    target = args.target
+    source_dims = layout(client, source)[0]
+    target_dims = layout(client, target)[0]
+
+    # Queries: stored chunk vectors of a random sample of points (no API calls)
+    sample, offset = [], None
+    while True:
+        points, offset = client.scroll(
+            collection_name=source, limit=256, offset=offset, with_payload=["blog_id"], with_vectors=True
+        )
+        sample.extend(points)
+        if offset is None or len(sample) >= args.sample * 10:
+            break
+    random.Random(0).shuffle(sample)
+    sample = sample[:args.sample]
+
+    approx = search_params(config.QDRANT_HNSW_EF, config.QDRANT_RESCORE_OVERSAMPLING)
+    exact = search_params(exact=True)
+    results = {"live": ([], []), "target": ([], [])}
+    for point in sample:
+        vector = dense_of(point.vector)
+        blog_id = None if args.unfiltered else point.payload.get("blog_id")
+        truth, _ = _ids(client, source, vector, blog_id, args.k, exact)
+        for name, collection, query in (
+            ("live", source, vector),
+            ("target", target, truncate(vector, target_dims).tolist()),
+        ):
+            ids, ms = _ids(client, collection, query, blog_id, args.k, approx)
+            recalls, latencies = results[name]
+            recalls.append(len(set(ids) & set(truth)) / max(1, len(truth)))
+            latencies.append(ms)
+
+    scope = "whole collection" if args.unfiltered else "per-blog filter"
+    print(f"\n{len(sample)} sampled chunks as queries, k={args.k}, {scope}; truth = exact search on '{source}'\n")
+    print(f"{'collection':>28} {'dims':>5} {'quant':>6} {'RAM B/vec':>10} {'recall@k':>9} {'p50 ms':>7} {'p95 ms':>7}")
+    base_ram = None
+    for name, collection in (("live", source), ("target", target)):
+        dims, quantization, on_disk, _ = layout(client, collection)
+        ram = vector_bytes(dims, quantization, on_disk)["ram"]
+        base_ram = base_ram or ram
+        recalls, latencies = results[name]
+        print(
+            f"{collection:>28} {dims:>5} {quantization:>6} {ram:>10} {statistics.mean(recalls):>8.1%} "
+            f"{_percentile(latencies, 0.5):>7.1f} {_percentile(latencies, 0.95):>7.1f}"
+        )
+    target_ram = vector_bytes(*layout(client, target)[:3])["ram"]
+    print(f"\nVector RAM: {base_ram / target_ram:.1f}x smaller ({source_dims}-d -> {target_dims}-d)")
+
+
+# -----------------------------
+# switch
+# -----------------------------
+def switch(client, args):
+    alias = config.QDRANT_COLLECTION
+    target = args.target
+    if target not in {c.name for c in client.get_collections().collections}:
+        print(f"ERROR: Target collection '{target}' does not exist")
+        sys.exit(1)
+    aliases = {a.alias_name: a.collection_name for a in client.get_aliases().aliases}
+    operations = []
+    if alias in aliases:
+        previous = aliases[alias]
+        operations.append(models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name=alias)))
+    elif resolve(client, alias) is not None:
+        if not args.drop_old:
+            print(f"ERROR: '{alias}' is a collection, not an alias. Pass --drop-old to replace it with an alias "
+                  f"(queries use the local snapshot until the alias exists).")
+            sys.exit(1)
+        previous = None
+        client.delete_collection(alias)
+        print(f"⚠️  Dropped collection '{alias}'")
+    else:
+        previous = None
+    operations.append(models.CreateAliasOperation(
+        create_alias=models.CreateAlias(collection_name=target, alias_name=alias)
+    ))
+    client.update_collection_aliases(change_aliases_operations=operations)
+
+    dims = layout(client, target)[0]
+    print(f"✅ '{alias}' -> '{target}'" + (f" (was '{previous}'; switch back with --target {previous})" if previous else ""))
+    print(f"   Deploy the agent with RAG_EMBEDDING_DIMENSIONS={dims}")
+    if args.reset_semantic_cache:
+        removed = semantic_cache.reset(get_redis_client())
+        print(f"   Reset the semantic cache ({removed} keys); it is re-created at {dims}-d on restart")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("build", help="create the target collection and copy all points into it")
+    p.add_argument("--dimensions", type=int, default=config.EMBEDDING_DIMENSIONS)
+    p.add_argument("--quantization", choices=["none", "int8"], default=config.QDRANT_QUANTIZATION)
+    p.add_argument("--on-disk", action="store_true", default=config.QDRANT_ON_DISK, help="keep float32 originals on disk")
+    p.add_argument("--m", type=int, default=config.QDRANT_HNSW_M)
+    p.add_argument("--ef-construct", type=int, default=config.QDRANT_HNSW_EF_CONSTRUCT)
+    p.add_argument("--target", help="collection name (default: blog_embeddings_<dims>d[_int8])")
+    p.add_argument("--reembed", action="store_true", help="embed texts at the new size instead of shortening vectors")
+    p.add_argument("--page", type=int, default=256, help="points per scroll page / upsert")
+    p.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT)
+    p.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+
+    p = commands.add_parser("compare", help="recall and latency of the target against the live collection")
+    p.add_argument("--target", required=True)
+    p.add_argument("--sample", type=int, default=200)
+    p.add_argument("--k", type=int, default=8)
+    p.add_argument("--unfiltered", action="store_true", help="search the whole collection instead of one blog")
+
+    p = commands.add_parser("switch", help=f"point the '{config.QDRANT_COLLECTION}' alias at the target")
+    p.add_argument("--target", required=True)
+    p.add_argument("--drop-old", action="store_true", help=f"replace a real '{config.QDRANT_COLLECTION}' collection")
+    p.add_argument("--reset-semantic-cache", action="store_true", help="drop cached question vectors of the old size")
+
+    args = parser.parse_args()
+    client = get_qdrant_client()
+    {"build": build, "compare": compare, "switch": switch}[args.command](client, args)
+
+
+if __name__ == "__main__":
+    main()
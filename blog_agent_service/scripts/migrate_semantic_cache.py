@@ -0,0 +1,98 @@
+"""
+Migration Script: Fold the per-blog `cache:{blog_id}` RediSearch indexes into the
+shared `semcache:idx` semantic cache index.
+
+This script:
+1. Lists every legacy `cache:*` index created by langchain-redis
+2. Stores each cached question/answer/embedding through `semantic_cache.store`,
+   so migrated entries get the same TTL, LFU, per-blog cap and byte accounting
+   as new ones (entries of another embedding size are skipped)
+3. Drops the legacy index together with its documents (unless --keep-old)
+
+Usage:
+    python scripts/migrate_semantic_cache.py [--dry-run] [--keep-old] [--dim N]
+"""
+import argparse
+import hashlib
+import sys
+from pathlib import Path
+
+import numpy as np
+
+SERVICE_DIR = Path(__file__).resolve().parent.parent
+if str(SERVICE_DIR) not in sys.path:
+    sys.path.insert(0, str(SERVICE_DIR))
+
+from agents.rag_logic import normalize_question
+from agents.rag.clients import get_redis_client
+from agents.rag import config, semantic_cache
+
+LEGACY_PREFIX = "cache:"
+
+
+def _text(value):
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+def legacy_indexes(r):
+    names = [_text(n) for n in r.execute_command("FT._LIST")]
+    return sorted(n for n in names if n.startswith(LEGACY_PREFIX))
+
+
+def migrate_index(r, index_name, dim, dry_run=False, keep_old=False):
+    blog_id = index_name[len(LEGACY_PREFIX):]
+    copied = skipped = 0
+    for key in r.scan_iter(match=f"{index_name}:*", count=500):
+        doc = r.hgetall(key)
+        question = _text(doc.get(b"text"))
+        answer = _text(doc.get(b"answer"))
+        embedding = doc.get(b"embedding")
+        if not question or not answer or not embedding or len(embedding) != dim * 4:
+            skipped += 1
+            continue
+        question_hash = hashlib.md5(normalize_question(question).encode()).hexdigest()
+        if not dry_run:
+            vector = np.frombuffer(embedding, dtype=np.float32)  # langchain-redis stores float32 bytes
+            semantic_cache.store(r, blog_id, question_hash, question, answer, vector)
+        copied += 1
+    if not dry_run:
+        if not keep_old:
+            r.ft(index_name).dropindex(delete_documents=True)
+    return copied, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="Only count what would be migrated")
+    parser.add_argument("--keep-old", action="store_true", help="Leave the legacy indexes in place")
+    parser.add_argument("--dim", type=int, default=config.EMBEDDING_DIMENSIONS,
+                        help="Embedding dimension of the shared index (default: RAG_EMBEDDING_DIMENSIONS)")
+    args = parser.parse_args()
+
+    r = get_redis_client()
+    indexes = legacy_indexes(r)
+    print(f"\n📦 Found {len(indexes)} legacy semantic cache indexes\n")
+    if not indexes:
+        return
+
+    if not args.dry_run:
+        semantic_cache.ensure_index(r, args.dim)
+
+    total = 0
+    for name in indexes:
+        try:
+            copied, skipped = migrate_index(r, name, args.dim, dry_run=args.dry_run, keep_old=args.keep_old)
+        except Exception as e:
+            print(f"  ❌ [{name}] — {e}")
+            continue
+        total += copied
+        print(f"  ✅ [{name}] — {copied} entries" + (f" ({skipped} skipped)" if skipped else ""))
+
+    print(f"\n{'='*50}")
+    print(f"🎉 {'Dry run' if args.dry_run else 'Migration'} complete!")
+    print(f"   Legacy indexes: {len(indexes)}")
+    print(f"   Entries copied into '{semantic_cache.INDEX_NAME}': {total}")
+
+
+if __name__ == "__main__":
+    main()
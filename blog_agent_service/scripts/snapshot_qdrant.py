@@ -0,0 +1,59 @@
+"""
+Snapshot Script: Export the Qdrant `blog_embeddings` collection to a local,
+memory-mapped snapshot the agent can answer from during a Qdrant outage
+(or always, with RAG_RETRIEVAL_BACKEND=snapshot).
+
+This script:
+1. Scans the collection's payloads to fingerprint every blog (no vectors)
+2. Copies unchanged blogs from the previous snapshot, pulls vectors only for changed ones
+3. Writes a new generation of vector / payload files, then atomically swaps manifest.json
+
+Usage:
+    python scripts/snapshot_qdrant.py [--dir PATH] [--full] [--watch SECONDS]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+SERVICE_DIR = Path(__file__).resolve().parent.parent
+if str(SERVICE_DIR) not in sys.path:
+    sys.path.insert(0, str(SERVICE_DIR))
+
+from agents.rag import config
+from agents.rag.clients import get_index_versions, get_qdrant_client
+from agents.rag.snapshot import export_snapshot
+
+
+def run_once(path, full):
+    start = time.perf_counter()
+    versions = get_index_versions()
+    stats = export_snapshot(
+        get_qdrant_client(), config.QDRANT_COLLECTION, path, config.VECTOR_SIZE, full=full,
+        active_version=lambda blog_id: versions.active(blog_id, fresh=True),
+    )
+    print(
+        f"✅ Snapshot at {path}: {stats['points']} points / {stats['blogs']} blogs "
+        f"(reused {stats['reused']}, fetched {stats['fetched']}, dropped {stats['dropped']}) "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", default=config.SNAPSHOT_DIR, help="snapshot directory")
+    parser.add_argument("--full", action="store_true", help="ignore the previous snapshot and re-download everything")
+    parser.add_argument("--watch", type=float, default=0, help="keep refreshing every N seconds")
+    args = parser.parse_args()
+
+    run_once(args.dir, args.full)
+    while args.watch > 0:
+        time.sleep(args.watch)
+        try:
+            run_once(args.dir, False)
+        except Exception as e:
+            print(f"❌ Snapshot refresh failed: {e}")
+
+
+if __name__ == "__main__":
+    main()
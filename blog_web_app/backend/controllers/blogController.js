@@ -4,6 +4,7 @@ const User = require('../models/User');
 const { spawn } = require('child_process');
 const path = require('path');
 const axios = require('axios');
+const crypto = require('crypto');
 const redis = require('redis');
 const mongoose = require('mongoose');
 
@@ -438,16 +439,59 @@ const triggerRAGIndexing = async (blogId, text) => {
   console.log(`🧠 Requesting RAG indexing for blog ${blogId} from microservice...`);
 
   try {
-    const { data } = await axios.post(`${AGENT_SERVICE_URL}/index`, { blog_id: blogId, text });
-    if (data.success) {
-      await Blog.findByIdAndUpdate(blogId, { ragIndexed: true });
-      console.log(`✅ Blog ${blogId} indexed in Qdrant successfully.`);
-    }
+    const { data } = await axios.post(`${AGENT_SERVICE_URL}/index`, {
+      blog_id: blogId,
+      text,
+      // The agent posts the finished job to its configured RAG_INDEX_CALLBACK_URL
+      notify: true
+    });
+    console.log(`🧠 Index job ${data.job_id} for blog ${blogId} is ${data.status}`);
   } catch (err) {
     console.error('Failed to index blog via microservice:', err.message);
   }
 };
 
+// @desc    Index job finished (webhook from the agent microservice)
+// @route   POST /api/blogs/rag-index-callback
+// @access  Private (Agent Secret Key)
+// Signed as "sha256=" + HMAC-SHA256(AGENT_SECRET_KEY, "<timestamp>.<raw body>")
+const WEBHOOK_MAX_AGE_SECONDS = 300;
+
+const verifyAgentSignature = (req) => {
+  const secret = process.env.AGENT_SECRET_KEY;
+  const timestamp = req.headers['x-agent-timestamp'];
+  const signature = req.headers['x-agent-signature'];
+  if (!secret || !timestamp || !signature || !req.rawBody) return false;
+  if (Math.abs(Date.now() / 1000 - Number(timestamp)) > WEBHOOK_MAX_AGE_SECONDS) return false;
+
+  const expected = 'sha256=' + crypto.createHmac('sha256', secret)
+    .update(`${timestamp}.`)
+    .update(req.rawBody)
+    .digest('hex');
+  const a = Buffer.from(signature);
+  const b = Buffer.from(expected);
+  return a.length === b.length && crypto.timingSafeEqual(a, b);
+};
+
+const ragIndexCallback = async (req, res) => {
+  if (!verifyAgentSignature(req)) {
+    return res.status(401).json({ message: 'Unauthorized index callback' });
+  }
+
+  const { job_id, blog_id, status, result, error } = req.body;
+  if (!blog_id || !mongoose.Types.ObjectId.isValid(blog_id)) {
+    return res.status(400).json({ message: 'Invalid blog ID format' });
+  }
+
+  if (status === 'succeeded') {
+    await Blog.findByIdAndUpdate(blog_id, { ragIndexed: true });
+    console.log(`✅ Blog ${blog_id} indexed in Qdrant successfully (job ${job_id}, ${result?.embedded ?? '?'} chunks embedded, ${result?.reused ?? '?'} reused).`);
+  } else {
+    console.error(`❌ Index job ${job_id} for blog ${blog_id} ${status}: ${error}`);
+  }
+  res.json({ success: true });
+};
+
 const askQuestion = async (req, res) => {
   try {
     console.log(`DEBUG: askQuestion called with ID: ${req.params.id}`);
@@ -529,5 +573,6 @@ module.exports = {
   getComments,
   deleteBlog,
   askQuestion,
-  getUserActivity
+  getUserActivity,
+  ragIndexCallback
 };
@@ -573,4 +573,53 @@ router.delete('/:id', protect, blogController.deleteBlog);
  */
 router.post('/agent', blogController.createAgentBlog);
 
+
+/**
+ * @swagger
+ * /api/blogs/rag-index-callback:
+ *   post:
+ *     summary: RAG index job finished (Agent Internal)
+ *     description: Webhook the agent microservice calls when a queued index job completes. Marks the blog as ragIndexed on success. The body is signed with HMAC-SHA256 keyed by AGENT_SECRET_KEY over "<timestamp>.<raw body>".
+ *     tags: [AI Agent]
+ *     parameters:
+ *       - in: header
+ *         name: x-agent-timestamp
+ *         required: true
+ *         schema:
+ *           type: string
+ *         description: Unix time the webhook was signed; older than 5 minutes is rejected
+ *       - in: header
+ *         name: x-agent-signature
+ *         required: true
+ *         schema:
+ *           type: string
+ *         description: "sha256=" followed by the hex HMAC of the timestamp and body
+ *     requestBody:
+ *       required: true
+ *       content:
+ *         application/json:
+ *           schema:
+ *             type: object
+ *             properties:
+ *               job_id:
+ *                 type: string
+ *               blog_id:
+ *                 type: string
+ *               status:
+ *                 type: string
+ *                 enum: [succeeded, failed]
+ *               result:
+ *                 type: object
+ *               error:
+ *                 type: string
+ *     responses:
+ *       200:
+ *         description: Callback recorded
+ *       400:
+ *         description: Invalid blog ID
+ *       401:
+ *         description: Unauthorized
+ */
+router.post('/rag-index-callback', blogController.ragIndexCallback);
+
 module.exports = router;
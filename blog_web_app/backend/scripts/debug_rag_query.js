@@ -1,8 +1,8 @@
 const mongoose = require('mongoose');
-const { spawn } = require('child_process');
 const path = require('path');
 const dotenv = require('dotenv');
 const Blog = require('../models/Blog');
+const rag = require('./ragWorker');
 
 dotenv.config({ path: path.join(__dirname, '..', '.env') });
 
@@ -17,28 +17,13 @@ const test = async () => {
 
     console.log(`Testing blog: ${blog.title}`);
     const question = "What is this blog about?";
-    const pythonScript = path.join(__dirname, 'rag_service.py');
-    const condaEnv = process.env.CONDA_ENV_NAME || 'blogGenration';
+    const started = Date.now();
+    console.log(`Worker ping: ${JSON.stringify(await rag.ping())} (${Date.now() - started}ms incl. startup)`);
 
-    console.log(`Running Python: conda run -n ${condaEnv} python ${pythonScript} query`);
-    const py = spawn('conda', ['run', '-n', condaEnv, 'python', pythonScript, 'query']);
-
-    const payload = JSON.stringify({ rag_data: blog.ragData, question });
-    py.stdin.write(payload);
-    py.stdin.end();
-
-    py.stdout.on('data', (data) => {
-      console.log(`STDOUT: ${data.toString()}`);
-    });
-
-    py.stderr.on('data', (data) => {
-      console.error(`STDERR: ${data.toString()}`);
-    });
-
-    py.on('close', (code) => {
-      console.log(`Process exited with code ${code}`);
-      process.exit(0);
-    });
+    const { answer } = await rag.query(blog._id, question);
+    console.log(`ANSWER: ${answer}`);
+    rag.close();
+    process.exit(0);
   } catch (err) {
     console.error(err);
     process.exit(1);
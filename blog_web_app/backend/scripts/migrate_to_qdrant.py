@@ -2,130 +2,252 @@
 Migration Script: Move ragData embeddings from MongoDB to Qdrant Cloud.
 
 This script:
-1. Connects to MongoDB and reads all blogs with ragData
-2. Upserts the embeddings to Qdrant Cloud
-3. Sets ragIndexed=true and removes ragData from MongoDB
+1. Streams blogs with ragData from MongoDB through a batched, projected cursor
+2. Upserts each batch's embeddings to Qdrant Cloud on a small pool of workers
+3. Sets ragIndexed=true and removes ragData from MongoDB with bulk_write
+
+Only a few batches are in memory at a time, however large the collection.
+Every blog whose points reached Qdrant is appended to a checkpoint file, so
+a re-run skips the upload for them and only finishes their MongoDB update.
+Blogs the agent has already indexed (they have an active index version) keep
+that index; only their ragData is removed.
+
+Usage:
+    python migrate_to_qdrant.py [--batch-size 50] [--concurrency 4] [--checkpoint FILE] [--restart]
 """
+import argparse
 import os
 import sys
-import uuid
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from dotenv import load_dotenv
 
 # Load env
 load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
 
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
 from qdrant_client import QdrantClient
-from qdrant_client.models import (
-    VectorParams, Distance, PointStruct,
-    Filter, FieldCondition, MatchValue
+from qdrant_client.models import PointStruct
+
+# Ids, vectors and the shared embedding store come from the agent, so migrated points match indexed ones
+AGENT_SERVICE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'blog_agent_service')
+sys.path.insert(0, AGENT_SERVICE_DIR)
+from agents import rag_logic  # BM25 slot of the points, same as the agent writes them
+from agents.rag import config
+from agents.rag.chunk_diff import chunk_ids  # content-addressed ids let re-indexes reuse migrated vectors
+from agents.rag.clients import get_index_versions
+from agents.rag.collection import collection_config
+from agents.rag.embedding_store import EmbeddingStore, text_hash
+from agents.rag.vectors import dense_of, truncate  # shortens legacy 1536-d ragData to VECTOR_SIZE
+
+QDRANT_COLLECTION = "blog_embeddings"  # collection or alias
+NATIVE_DIMENSIONS = 1536  # text-embedding-3-small, as stored in ragData
+# Must match the agent's RAG_EMBEDDING_DIMENSIONS and the collection (see migrate_collection.py)
+VECTOR_SIZE = int(os.getenv("RAG_EMBEDDING_DIMENSIONS", str(NATIVE_DIMENSIONS)))
+EMBEDDING_MODEL = "openai/text-embedding-3-small"
+EMBEDDING_MODEL_KEY = EMBEDDING_MODEL if VECTOR_SIZE == NATIVE_DIMENSIONS else f"{EMBEDDING_MODEL}@{VECTOR_SIZE}"
+EMBEDDING_STORE_PATH = os.getenv(
+    "RAG_EMBEDDING_STORE_PATH", os.path.join(AGENT_SERVICE_DIR, 'data', 'embeddings.sqlite3')
 )
+DEFAULT_CHECKPOINT = os.path.join(os.path.dirname(__file__), '.migrate_to_qdrant.checkpoint')
+PENDING_QUERY = {"ragData": {"$exists": True, "$not": {"$size": 0}}}
+
+
+def load_checkpoint(path):
+    """_ids (as strings) whose points already reached Qdrant."""
+    if not os.path.exists(path):
+        return set()
+    with open(path, "r", encoding="utf-8") as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def shorten(embedding):
+    """A ragData embedding at VECTOR_SIZE (see agents.rag.vectors.truncate)."""
+    if len(embedding) == VECTOR_SIZE:
+        return embedding
+    return truncate(embedding, VECTOR_SIZE).tolist()
+
+
+def build_points(blog):
+    """Qdrant points for one blog's ragData, plus the count of unusable items."""
+    blog_id = str(blog["_id"])
+    items = [
+        (item.get("text", ""), item.get("embedding"))
+        for item in blog.get("ragData", [])
+    ]
+    valid = [(text, emb) for text, emb in items if emb and len(emb) in (VECTOR_SIZE, NATIVE_DIMENSIONS)]
+    ids = chunk_ids(blog_id, [text for text, _ in valid])
+
+    points = []
+    for n, ((text, embedding), (point_id, digest)) in enumerate(zip(valid, ids)):
+        # Position among the migrated chunks, so indices stay dense when items are skipped
+        payload = {"blog_id": blog_id, "text": text, "chunk_index": n, "content_hash": digest}
+        points.append(PointStruct(id=point_id, vector=rag_logic._point_vector(shorten(embedding), text), payload=payload))
+    return points, len(items) - len(valid)
+
+
+def upload_batch(qdrant, store, blogs):
+    """Upsert one batch of blogs; returns [(_id, title, points, skipped, indexed)] for reporting."""
+    results, points = [], []
+    versions = get_index_versions()
+    for blog in blogs:
+        title = blog.get("title", "Unknown")
+        if versions.active(str(blog["_id"]), fresh=True) is not None:
+            # Already (re-)indexed by the agent: untagged upserts over its content-addressed
+            # ids would drop them from the active version and let version GC delete them
+            results.append((blog["_id"], title, 0, 0, True))
+            continue
+        blog_points, skipped = build_points(blog)
+        results.append((blog["_id"], title, len(blog_points), skipped, False))
+        points.extend(blog_points)
+    if points:
+        qdrant.upsert(collection_name=QDRANT_COLLECTION, points=points)
+        store.put_many(EMBEDDING_MODEL_KEY, ((text_hash(p.payload["text"]), dense_of(p.vector)) for p in points))
+    return results
 
-QDRANT_COLLECTION = "blog_embeddings"
-VECTOR_SIZE = 1536  # text-embedding-3-small dimension
 
 def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=50, help="blogs per cursor batch / Qdrant upsert")
+    parser.add_argument("--concurrency", type=int, default=4, help="Qdrant upserts in flight")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT)
+    parser.add_argument("--restart", action="store_true", help="forget the checkpoint and upload everything again")
+    args = parser.parse_args()
+
     # Connect to MongoDB
     mongo_uri = os.getenv("MONGO_URI")
     if not mongo_uri:
         print("ERROR: MONGO_URI not set in .env")
         sys.exit(1)
-    
+
     mongo_client = MongoClient(mongo_uri)
     # The app uses 'test' database (default for Atlas connections without db path)
     db = mongo_client["test"]
     blogs_collection = db["blogs"]
-    
+
     # Connect to Qdrant
     qdrant_url = os.getenv("QDRANT_URL")
     qdrant_key = os.getenv("QDRANT_API_KEY")
     if not qdrant_url or not qdrant_key:
         print("ERROR: QDRANT_URL or QDRANT_API_KEY not set in .env")
         sys.exit(1)
-    
+
     qdrant = QdrantClient(url=qdrant_url, api_key=qdrant_key)
-    
-    # Create collection if needed
+
+    # Create collection if needed, with the agent's storage layout and BM25 slot
     collections = [c.name for c in qdrant.get_collections().collections]
+    collections += [a.alias_name for a in qdrant.get_aliases().aliases]
     if QDRANT_COLLECTION not in collections:
         qdrant.create_collection(
             collection_name=QDRANT_COLLECTION,
-            vectors_config=VectorParams(size=VECTOR_SIZE, distance=Distance.COSINE)
+            **collection_config(
+                VECTOR_SIZE, config.QDRANT_QUANTIZATION, config.QDRANT_ON_DISK,
+                config.QDRANT_HNSW_M, config.QDRANT_HNSW_EF_CONSTRUCT,
+                sparse_name=config.SPARSE_VECTOR_NAME if config.HYBRID_ENABLED else None,
+            ),
         )
         print(f"✅ Created Qdrant collection '{QDRANT_COLLECTION}'")
     else:
         print(f"ℹ️  Qdrant collection '{QDRANT_COLLECTION}' already exists")
-    
-    # Find all blogs with ragData
-    blogs = list(blogs_collection.find(
-        {"ragData": {"$exists": True, "$not": {"$size": 0}}},
-        {"_id": 1, "title": 1, "ragData": 1}
-    ))
-    
-    print(f"\n📦 Found {len(blogs)} blogs with ragData to migrate\n")
-    
-    if len(blogs) == 0:
+
+    store = EmbeddingStore(EMBEDDING_STORE_PATH)
+    print(f"ℹ️  Saving migrated vectors to embedding store {EMBEDDING_STORE_PATH}")
+
+    if args.restart and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    uploaded = load_checkpoint(args.checkpoint)
+    if uploaded:
+        print(f"ℹ️  Resuming: {len(uploaded)} blogs already in Qdrant ({args.checkpoint})")
+
+    total = blogs_collection.count_documents(PENDING_QUERY)
+    print(f"\n📦 Found {total} blogs with ragData to migrate\n")
+
+    if total == 0:
         print("Nothing to migrate. All blogs may have already been migrated.")
         return
-    
+
+    # _id order: the index walk is unaffected by our own $unset of ragData
+    cursor = (
+        blogs_collection.find(PENDING_QUERY, {"_id": 1, "title": 1, "ragData.text": 1, "ragData.embedding": 1})
+        .sort("_id", 1)
+        .batch_size(args.batch_size)
+    )
+
+    started = time.time()
     total_points = 0
     migrated = 0
-    
-    for blog in blogs:
-        blog_id = str(blog["_id"])
-        title = blog.get("title", "Unknown")
-        rag_data = blog.get("ragData", [])
-        
-        if not rag_data:
-            continue
-        
-        # Build Qdrant points
-        points = []
-        skipped = 0
-        for i, item in enumerate(rag_data):
-            embedding = item.get("embedding")
-            text = item.get("text", "")
-            
-            if not embedding or len(embedding) != VECTOR_SIZE:
-                skipped += 1
+    updates = []
+
+    def flush_updates(force=False):
+        nonlocal updates
+        if updates and (force or len(updates) >= args.batch_size):
+            blogs_collection.bulk_write(updates, ordered=False)
+            updates = []
+
+    def finish(future, checkpoint):
+        nonlocal total_points, migrated
+        for blog_id, title, count, skipped, indexed in future.result():
+            if indexed:
+                checkpoint.write(f"{blog_id}\n")
+                updates.append(UpdateOne({"_id": blog_id}, {"$set": {"ragIndexed": True}, "$unset": {"ragData": ""}}))
+                migrated += 1
+                print(f"  ⏭️  [{title}] — already indexed by the agent, kept its index")
                 continue
-            
-            point_id = str(uuid.uuid5(uuid.NAMESPACE_DNS, f"{blog_id}_{i}"))
-            points.append(PointStruct(
-                id=point_id,
-                vector=embedding,
-                payload={"blog_id": blog_id, "text": text, "chunk_index": i}
-            ))
-        
-        if not points:
-            print(f"  ⚠️  [{title}] — no valid embeddings (skipped {skipped})")
-            continue
-        
-        # Upsert to Qdrant
-        qdrant.upsert(collection_name=QDRANT_COLLECTION, points=points)
-        total_points += len(points)
-        migrated += 1
-        
-        # Update MongoDB: set ragIndexed=true, remove ragData
-        blogs_collection.update_one(
-            {"_id": blog["_id"]},
-            {
-                "$set": {"ragIndexed": True},
-                "$unset": {"ragData": ""}
-            }
-        )
-        
-        print(f"  ✅ [{title}] — {len(points)} chunks migrated" + (f" ({skipped} skipped)" if skipped else ""))
-    
+            if count == 0:
+                print(f"  ⚠️  [{title}] — no valid embeddings (skipped {skipped})")
+                continue
+            checkpoint.write(f"{blog_id}\n")
+            updates.append(UpdateOne({"_id": blog_id}, {"$set": {"ragIndexed": True}, "$unset": {"ragData": ""}}))
+            total_points += count
+            migrated += 1
+            print(f"  ✅ [{title}] — {count} chunks migrated" + (f" ({skipped} skipped)" if skipped else ""))
+        checkpoint.flush()
+        flush_updates()
+
+    with open(args.checkpoint, "a", encoding="utf-8") as checkpoint, \
+            ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        in_flight = set()
+        batch = []
+
+        def submit():
+            nonlocal batch, in_flight
+            # Bounded pipeline: wait for a slot before reading more of the cursor
+            while len(in_flight) >= args.concurrency:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    finish(future, checkpoint)
+            in_flight.add(pool.submit(upload_batch, qdrant, store, batch))
+            batch = []
+
+        for blog in cursor:
+            if str(blog["_id"]) in uploaded:
+                # Reached Qdrant in an earlier run; only the MongoDB update is missing
+                updates.append(UpdateOne({"_id": blog["_id"]}, {"$set": {"ragIndexed": True}, "$unset": {"ragData": ""}}))
+                migrated += 1
+                flush_updates()
+                continue
+            batch.append(blog)
+            if len(batch) >= args.batch_size:
+                submit()
+        if batch:
+            submit()
+        for future in in_flight:
+            finish(future, checkpoint)
+    flush_updates(force=True)
+
+    elapsed = time.time() - started
     print(f"\n{'='*50}")
-    print(f"🎉 Migration complete!")
-    print(f"   Blogs migrated: {migrated}/{len(blogs)}")
-    print(f"   Total vectors in Qdrant: {total_points}")
+    print("🎉 Migration complete!")
+    print(f"   Blogs migrated: {migrated}/{total}")
+    print(f"   Vectors upserted this run: {total_points} ({total_points / max(elapsed, 1e-9):.0f}/s)")
     print(f"   ragData removed from MongoDB: {migrated} documents")
-    
+
+    # Every blog reached Qdrant and MongoDB; the checkpoint is no longer needed
+    os.remove(args.checkpoint)
+
     # Verify
     collection_info = qdrant.get_collection(QDRANT_COLLECTION)
-    print(f"\n📊 Qdrant Collection Status:")
+    print("\n📊 Qdrant Collection Status:")
     print(f"   Total points: {collection_info.points_count}")
     print(f"   Vector size: {collection_info.config.params.vectors.size}")
 
@@ -0,0 +1,92 @@
+const { spawn } = require('child_process');
+const path = require('path');
+const readline = require('readline');
+
+/**
+ * Long-running `rag_service.py serve` process shared by every caller in this
+ * Node process. Python startup, imports and client construction are paid once;
+ * requests are multiplexed over stdin/stdout as newline-delimited JSON and
+ * matched to replies by id, so many can be in flight at once.
+ *
+ *   const rag = require('./ragWorker');
+ *   await rag.index(blogId, text);
+ *   const { answer } = await rag.query(blogId, question);
+ */
+const PYTHON_SCRIPT = path.join(__dirname, 'rag_service.py');
+const REQUEST_TIMEOUT_MS = parseInt(process.env.RAG_WORKER_TIMEOUT_MS || '120000', 10);
+
+let worker = null;
+let ready = null;
+let nextId = 1;
+const pending = new Map();
+
+const spawnWorker = () => {
+  // RAG_PYTHON points at an interpreter directly; otherwise go through conda without output capture
+  const condaEnv = process.env.CONDA_ENV_NAME || 'blogGenration';
+  const py = process.env.RAG_PYTHON
+    ? spawn(process.env.RAG_PYTHON, ['-u', PYTHON_SCRIPT, 'serve'])
+    : spawn('conda', ['run', '--no-capture-output', '-n', condaEnv, 'python', '-u', PYTHON_SCRIPT, 'serve']);
+
+  ready = new Promise((resolve, reject) => {
+    const lines = readline.createInterface({ input: py.stdout });
+    lines.on('line', (line) => {
+      let reply;
+      try {
+        reply = JSON.parse(line);
+      } catch (err) {
+        console.error(`RAG worker sent a non-JSON line: ${line}`);
+        return;
+      }
+      if (reply.id === null && reply.result && reply.result.ready) {
+        resolve();
+        return;
+      }
+      const request = pending.get(reply.id);
+      if (!request) return;
+      pending.delete(reply.id);
+      clearTimeout(request.timer);
+      if (reply.ok) request.resolve(reply.result);
+      else request.reject(new Error(reply.error));
+    });
+
+    py.on('exit', (code) => {
+      reject(new Error(`RAG worker exited with code ${code} before it was ready`));
+      for (const request of pending.values()) {
+        clearTimeout(request.timer);
+        request.reject(new Error(`RAG worker exited with code ${code}`));
+      }
+      pending.clear();
+      worker = null;
+    });
+  });
+
+  py.stderr.on('data', (data) => { console.error(`PY DEBUG: ${data}`); });
+  worker = py;
+};
+
+const call = async (op, params = {}) => {
+  if (!worker) spawnWorker();
+  await ready;
+  const id = nextId++;
+  return new Promise((resolve, reject) => {
+    const timer = setTimeout(() => {
+      pending.delete(id);
+      reject(new Error(`RAG worker request ${op} timed out after ${REQUEST_TIMEOUT_MS}ms`));
+    }, REQUEST_TIMEOUT_MS);
+    pending.set(id, { resolve, reject, timer });
+    worker.stdin.write(JSON.stringify({ id, op, ...params }) + '\n');
+  });
+};
+
+const index = (blogId, text) => call('index', { blog_id: String(blogId), text });
+const query = (blogId, question) => call('query', { blog_id: String(blogId), question });
+const ping = () => call('ping');
+
+const close = () => {
+  if (worker) {
+    worker.stdin.end();
+    worker = null;
+  }
+};
+
+module.exports = { index, query, ping, close };
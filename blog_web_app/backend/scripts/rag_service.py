@@ -1,102 +1,47 @@
+import io
 import os
 import sys
 import json
-import uuid
-import numpy as np
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-print("DEBUG: rag_service.py VERSION: 2026-02-19-V2 (query_points)", file=sys.stderr)
+print("DEBUG: rag_service.py VERSION: 2026-10-18-V3 (agent rag_logic)", file=sys.stderr)
 from dotenv import load_dotenv
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage
-import requests
-from qdrant_client import QdrantClient, models
-from qdrant_client.models import (
-    VectorParams, Distance, PointStruct,
-    Filter, FieldCondition, MatchValue
-)
 
 # Load env from parent backend folder
 load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
 
-QDRANT_COLLECTION = "blog_embeddings"
-VECTOR_SIZE = 1536
+# Index and search through the agent service's code so both write the same
+# versioned, content-addressed chunks (index_versions, content_hash, BM25
+# settings) and queries only see the blog's active index version.
+AGENT_SERVICE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'blog_agent_service')
+sys.path.insert(0, AGENT_SERVICE_DIR)
+from agents import rag_logic
+from agents.rag.clients import get_embeddings
 
-def get_embeddings():
-    return OpenAIEmbeddings(
-        model="openai/text-embedding-3-small",
-        openai_api_key=os.getenv("OPENROUTER_API_KEY"),
-        openai_api_base="https://openrouter.ai/api/v1"
-    )
+_llm = None
 
 def get_llm():
-    return ChatOpenAI(
-        model="openai/gpt-4o-mini",
-        openai_api_key=os.getenv("OPENROUTER_API_KEY"),
-        openai_api_base="https://openrouter.ai/api/v1",
-        temperature=0
-    )
-
-def get_qdrant_client():
-    url = os.getenv("QDRANT_URL")
-    # Clean URL: strip trailing slashes and /dashboard
-    url = url.rstrip('/')
-    if url.endswith('/dashboard'):
-        url = url[:-10]
-    
-    return QdrantClient(
-        url=url,
-        api_key=os.getenv("QDRANT_API_KEY"),
-    )
-
-def ensure_collection():
-    client = get_qdrant_client()
-    collections = [c.name for c in client.get_collections().collections]
-    if QDRANT_COLLECTION not in collections:
-        client.create_collection(
-            collection_name=QDRANT_COLLECTION,
-            vectors_config=VectorParams(size=VECTOR_SIZE, distance=Distance.COSINE)
+    global _llm
+    if _llm is None:
+        _llm = ChatOpenAI(
+            model="openai/gpt-4o-mini",
+            openai_api_key=os.getenv("OPENROUTER_API_KEY"),
+            openai_api_base="https://openrouter.ai/api/v1",
+            temperature=0
         )
-        print(f"Created Qdrant collection '{QDRANT_COLLECTION}'")
-    return client
+    return _llm
 
 def index_blog(text, blog_id):
-    if not text.strip():
-        return []
-    splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=150)
-    chunks = splitter.split_text(text)
-    
-    if not chunks:
-        return []
-
-    embeddings_model = get_embeddings()
-    embeddings = embeddings_model.embed_documents(chunks)
-    
-    client = ensure_collection()
-    
-    # Delete old vectors for this blog
-    try:
-        client.delete(
-            collection_name=QDRANT_COLLECTION,
-            points_selector=Filter(
-                must=[FieldCondition(key="blog_id", match=MatchValue(value=blog_id))]
-            )
-        )
-    except Exception:
-        pass
-    
-    points = []
-    for i, chunk in enumerate(chunks):
-        point_id = str(uuid.uuid5(uuid.NAMESPACE_DNS, f"{blog_id}_{i}"))
-        points.append(PointStruct(
-            id=point_id,
-            vector=embeddings[i],
-            payload={"blog_id": blog_id, "text": chunk, "chunk_index": i}
-        ))
-    
-    client.upsert(collection_name=QDRANT_COLLECTION, points=points)
-    print(f"Indexed {len(points)} chunks to Qdrant for blog {blog_id}")
-    return [{"text": chunk} for chunk in chunks]
+    result = rag_logic.index_blog(text, blog_id)
+    print(
+        f"Indexed {result['chunks']} chunks to Qdrant for blog {blog_id} "
+        f"(version {result['version']}, {result['embedded']} embedded, {result['reused']} reused)"
+    )
+    return result["rag_data"]
 
 def query_blog(blog_id, question):
     print(f"DEBUG: Querying blog {blog_id} with question: {question}", file=sys.stderr)
@@ -115,44 +60,11 @@ def query_blog(blog_id, question):
         print(f"DEBUG: Embedding failed (Check OPENROUTER_API_KEY): {e}", file=sys.stderr)
         raise e
     
-    try:
-        print("DEBUG: searching Qdrant using query_points API...", file=sys.stderr)
-        client = get_qdrant_client()
-        
-        # Using query_points as this version of qdrant-client lacks 'search'
-        search_results = client.query_points(
-            collection_name=QDRANT_COLLECTION,
-            query=query_vector,
-            query_filter=models.Filter(
-                must=[
-                    models.FieldCondition(
-                        key="blog_id",
-                        match=models.MatchValue(value=blog_id)
-                    )
-                ]
-            ),
-            limit=8
-        )
-        
-        # query_points returns a objects with .points attribute
-        points = search_results.points
-        print(f"DEBUG: Found {len(points)} points", file=sys.stderr)
-        top_chunks = [hit.payload["text"] for hit in points]
-        
-        if not top_chunks:
-            return "No information available for this blog."
-            
-        context = "\n\n".join(top_chunks)
-    except Exception as e:
-        print(f"DEBUG: Qdrant search failed: {e}", file=sys.stderr)
-        # Try to extract the response if it's a qdrant_client exception
-        try:
-            from qdrant_client.http.exceptions import UnexpectedResponse
-            if isinstance(e, UnexpectedResponse):
-                print(f"DEBUG: Qdrant Error Content: {e.content}", file=sys.stderr)
-        except:
-            pass
-        raise e
+    # Active index version only, hybrid when the collection has BM25 vectors
+    context = rag_logic.retrieve_context(blog_id, query_vector, question=question)
+    if context is None:
+        print("DEBUG: Found no chunks", file=sys.stderr)
+        return "No information available for this blog."
     
     llm = get_llm()
     RAG_SYSTEM = """
@@ -172,13 +84,130 @@ def query_blog(blog_id, question):
     
     return response.content
 
+# -----------------------------
+# Long-running worker mode
+# -----------------------------
+# One JSON request per line: {"id", "op": "ping" | "index" | "query", ...}
+# One JSON reply per line, in completion order: {"id", "ok", "result"} or {"id", "ok": false, "error"}
+WORKER_THREADS = int(os.getenv("RAG_WORKER_THREADS", "8"))
+
+def handle_request(request, stats):
+    op = request.get("op")
+    if op == "ping":
+        return {"pong": True, "pid": os.getpid(), "uptime_s": round(time.time() - stats["started"], 1),
+                "in_flight": stats["in_flight"], "served": stats["served"]}
+    if op == "index":
+        rag_data = index_blog(request.get("text", ""), request["blog_id"])
+        return {"success": True, "chunks": len(rag_data)}
+    if op == "query":
+        return {"answer": query_blog(request["blog_id"], request["question"])}
+    raise ValueError(f"Unknown op: {op}")
+
+class RequestRunner:
+    """Runs requests on a shared thread pool and writes each reply as one line."""
+
+    def __init__(self, threads):
+        self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="rag-worker")
+        self.lock = threading.Lock()
+        self.stats = {"started": time.time(), "in_flight": 0, "served": 0}
+
+    def submit(self, line, write):
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            write({"id": None, "ok": False, "error": f"Invalid JSON: {e}"})
+            return
+        if request.get("op") == "ping":
+            # Answer health checks inline, even when every worker thread is busy
+            self._run(request, write)
+            return
+        with self.lock:
+            self.stats["in_flight"] += 1
+        self.pool.submit(self._run, request, write)
+
+    def _run(self, request, write):
+        try:
+            reply = {"id": request.get("id"), "ok": True, "result": handle_request(request, self.stats)}
+        except Exception as e:
+            print(f"DEBUG: Request {request.get('id')} ({request.get('op')}) failed: {e}", file=sys.stderr)
+            reply = {"id": request.get("id"), "ok": False, "error": str(e)}
+        finally:
+            if request.get("op") != "ping":
+                with self.lock:
+                    self.stats["in_flight"] -= 1
+                    self.stats["served"] += 1
+        write(reply)
+
+def line_writer(stream):
+    lock = threading.Lock()
+    def write(reply):
+        data = json.dumps(reply) + "\n"
+        with lock:
+            stream.write(data)
+            stream.flush()
+    return write
+
+def warm_up():
+    """Build the embeddings, LLM and Qdrant clients once, before the first request."""
+    started = time.time()
+    get_embeddings()
+    get_llm()
+    rag_logic.ensure_collection()
+    print(f"DEBUG: RAG worker warm in {time.time() - started:.1f}s", file=sys.stderr)
+
+def serve_stdio(threads):
+    # Keep stdout for replies only; stray prints go to stderr
+    out = sys.stdout
+    sys.stdout = sys.stderr
+    runner = RequestRunner(threads)
+    write = line_writer(out)
+    warm_up()
+    write({"id": None, "ok": True, "result": {"ready": True, "pid": os.getpid()}})
+    for line in sys.stdin:
+        if line.strip():
+            runner.submit(line, write)
+    runner.pool.shutdown(wait=True)
+
+def serve_socket(path, threads):
+    import socketserver
+    sys.stdout = sys.stderr
+    runner = RequestRunner(threads)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            stream = io.TextIOWrapper(self.wfile, encoding="utf-8", write_through=True)
+            write = line_writer(stream)
+            for raw in self.rfile:
+                line = raw.decode("utf-8")
+                if line.strip():
+                    runner.submit(line, write)
+
+    if os.path.exists(path):
+        os.remove(path)
+    warm_up()
+    with socketserver.ThreadingUnixStreamServer(path, Handler) as server:
+        server.daemon_threads = True
+        print(f"DEBUG: RAG worker listening on {path} ({threads} threads)", file=sys.stderr)
+        try:
+            server.serve_forever()
+        finally:
+            os.remove(path)
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python rag_service.py <index|query> [args...]")
+        print("Usage: python rag_service.py <index|query|serve> [args...]")
+        print("       python rag_service.py serve [--socket PATH] [--threads N]")
         sys.exit(1)
         
     mode = sys.argv[1]
-    if mode == "index":
+    if mode == "serve":
+        args = sys.argv[2:]
+        threads = int(args[args.index("--threads") + 1]) if "--threads" in args else WORKER_THREADS
+        if "--socket" in args:
+            serve_socket(args[args.index("--socket") + 1], threads)
+        else:
+            serve_stdio(threads)
+    elif mode == "index":
         blog_id = sys.argv[2] if len(sys.argv) > 2 else "unknown"
         if len(sys.argv) > 3 and sys.argv[3] == "--file":
             with open(sys.argv[4], 'r', encoding='utf-8') as f:
@@ -20,7 +20,8 @@ mongoose.connect(process.env.MONGO_URI).then(async () => {
     try {
       const { data } = await axios.post(`${AGENT_SERVICE_URL}/index`, {
         blog_id: BLOG_ID,
-        text: blog.content
+        text: blog.content,
+        wait: true
       });
       console.log('Agent response:', data);
 
@@ -38,7 +38,8 @@ app.use(cors({
   },
   credentials: true
 }));
-app.use(express.json());
+// Keep the raw bytes around so signed webhooks can be verified
+app.use(express.json({ verify: (req, res, buf) => { req.rawBody = buf; } }));
 app.use('/images', express.static(path.join(__dirname, 'images')));
 
 // Routes
@@ -0,0 +1,115 @@
+"""
+Benchmark: Markdown chunker vs. the old RecursiveCharacterTextSplitter(800, 150).
+
+Offline. Builds synthetic blogs shaped like `merge_content` output (`# Title`,
+`##` sections of paragraphs) with one planted fact per paragraph, then reports:
+
+- throughput on large blogs (MB/s, chunks/s)
+- chunk size, overlap (extra characters indexed) and tokens sent for top-k
+- retrieval hit rate on the fixed question set, with a TF-IDF retriever
+  standing in for embeddings (hit = the fact sentence is whole in the top-k)
+
+Usage:
+    python tests/agent/bench_chunker.py [--blogs 20] [--sections 12] [--k 3]
+"""
+import argparse
+import math
+import random
+import re
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "blog_agent_service"))
+from agents.rag.chunker import chunk_markdown, token_counter
+
+WORDS = (
+    "system data model cache query index vector latency memory service request network "
+    "storage cluster shard replica batch stream token prompt answer context section"
+).split()
+ENTITIES = ["default timeout", "retry budget", "shard count", "cache ratio", "batch window", "replica lag"]
+
+
+def make_blog(rng, blog_no, sections, paragraphs=4):
+    lines, questions = [f"# Blog {blog_no}: notes on {rng.choice(WORDS)} design", ""], []
+    for s in range(sections):
+        topic = f"{rng.choice(WORDS)}-{blog_no}-{s}"
+        lines += [f"## Section {s}: {topic}", ""]
+        for p in range(paragraphs):
+            filler = " ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 90)))
+            entity = ENTITIES[(s + p) % len(ENTITIES)]
+            value = f"{rng.randint(10, 999)} units"
+            fact = f"The {entity} of {topic} part {p} is {value}."
+            lines += [f"{filler.capitalize()}. {fact} {filler[:120]}.", ""]
+            questions.append((f"What is the {entity} of {topic} part {p}?", fact))
+    return "\n".join(lines), questions
+
+
+def recursive_chunks(text):
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    return RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=150).split_text(text)
+
+
+def markdown_chunks(text):
+    return [chunk.text for chunk in chunk_markdown(text)]
+
+
+def _terms(text):
+    return re.findall(r"[a-z0-9-]+", text.lower())
+
+
+def hit_rate(chunks, questions, k):
+    docs = [Counter(_terms(c)) for c in chunks]
+    df = Counter(term for doc in docs for term in doc)
+    idf = {term: math.log(len(docs) / n) + 1 for term, n in df.items()}
+    norms = [math.sqrt(sum((tf * idf[t]) ** 2 for t, tf in doc.items())) or 1.0 for doc in docs]
+    hits = 0
+    for question, fact in questions:
+        q = Counter(_terms(question))
+        scores = [
+            sum(qtf * idf.get(t, 0) * doc.get(t, 0) * idf.get(t, 0) for t, qtf in q.items()) / norms[i]
+            for i, doc in enumerate(docs)
+        ]
+        top = sorted(range(len(docs)), key=scores.__getitem__, reverse=True)[:k]
+        hits += any(fact in chunks[i] for i in top)
+    return hits / len(questions)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--blogs", type=int, default=20)
+    parser.add_argument("--sections", type=int, default=12)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+    rng = random.Random(0)
+    count = token_counter()
+    blogs = [make_blog(rng, b, args.sections) for b in range(args.blogs)]
+    total_chars = sum(len(text) for text, _ in blogs)
+    print(f"{args.blogs} blogs, {total_chars / 1e6:.2f} MB, {sum(len(q) for _, q in blogs)} questions, k={args.k}\n")
+
+    splitters = [("markdown", markdown_chunks)]
+    try:
+        recursive_chunks("warm up")
+        splitters.insert(0, ("recursive-800/150", recursive_chunks))
+    except ImportError:
+        print("(langchain_text_splitters not installed; benchmarking the markdown chunker only)\n")
+
+    print(f"{'splitter':>18} {'MB/s':>8} {'chunks/s':>10} {'chunks':>7} {'tok/chunk':>9} {'overlap':>8} {'hit@k':>6} {'ctx tok':>8}")
+    for name, split in splitters:
+        start = time.perf_counter()
+        per_blog = [split(text) for text, _ in blogs]
+        elapsed = time.perf_counter() - start
+        chunks = [c for blog in per_blog for c in blog]
+        tokens = [count(c) for c in chunks]
+        overlap = sum(len(c) for c in chunks) / total_chars - 1
+        rates = [hit_rate(blog_chunks, questions, args.k) for blog_chunks, (_, questions) in zip(per_blog, blogs)]
+        print(
+            f"{name:>18} {total_chars / 1e6 / elapsed:>8.2f} {len(chunks) / elapsed:>10.0f} {len(chunks):>7} "
+            f"{sum(tokens) / len(tokens):>9.0f} {overlap:>7.1%} {sum(rates) / len(rates):>6.1%} "
+            f"{args.k * sum(tokens) / len(tokens):>8.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
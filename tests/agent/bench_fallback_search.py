@@ -0,0 +1,60 @@
+"""
+Microbenchmark: the old per-item Python loop over rag_data vs. FallbackIndex.
+
+Offline; synthetic 1536-d embeddings shaped like MongoDB rag_data.
+
+Usage:
+    python tests/agent/bench_fallback_search.py --chunks 100 500 2000
+"""
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "blog_agent_service"))
+from agents.rag.fallback_index import FallbackIndex
+
+
+def legacy_fallback(rag_data, query_vector, k=8):
+    """The loop `_fallback_chunks` used to run, kept verbatim for comparison."""
+    results = []
+    for item in rag_data:
+        if 'embedding' not in item or not item['embedding']: continue
+        doc_vector = np.array(item['embedding'])
+        q_vector = np.array(query_vector)
+        if doc_vector.shape != q_vector.shape: continue
+        similarity = np.dot(doc_vector, q_vector) / (np.linalg.norm(doc_vector) * np.linalg.norm(q_vector))
+        results.append((item['text'], similarity))
+    results.sort(key=lambda x: x[1], reverse=True)
+    return [res[0] for res in results[:k]]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, nargs="+", default=[100, 500, 2000])
+    parser.add_argument("--dim", type=int, default=1536)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    for n in args.chunks:
+        rag_data = [
+            {"text": f"chunk {i}", "embedding": rng.standard_normal(args.dim).tolist()}
+            for i in range(n)
+        ]
+        query = rng.standard_normal(args.dim).tolist()
+        index = FallbackIndex()
+        assert index.search("blog", rag_data, query) == legacy_fallback(rag_data, query)
+
+        legacy = min(timeit.repeat(lambda: legacy_fallback(rag_data, query), number=5, repeat=3)) / 5
+        cached = min(timeit.repeat(lambda: index.search("blog", rag_data, query), number=50, repeat=3)) / 50
+        cold = min(timeit.repeat(lambda: FallbackIndex().search("blog", rag_data, query), number=5, repeat=3)) / 5
+        print(
+            f"{n:>6} chunks: legacy {legacy * 1e3:8.2f}ms | "
+            f"first call {cold * 1e3:8.2f}ms | cached {cached * 1e6:8.1f}us | x{legacy / cached:.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
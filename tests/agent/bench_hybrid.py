@@ -0,0 +1,148 @@
+"""
+Benchmark: dense-only vs. BM25-only vs. hybrid (RRF) retrieval.
+
+Offline, against an in-memory Qdrant (`QdrantClient(":memory:")`) whose
+collection is laid out like `blog_embeddings`: an unnamed cosine vector plus
+the `bm25` sparse slot with the IDF modifier. Blogs are synthetic, with one
+identifier-heavy fact per paragraph ("`max_retries` of `ingest-3-2` in
+v2.4.1 ..."), and every question asks for one of those facts.
+
+Dense vectors come from a stand-in that hashes the alphabetic words of a
+text and ignores digits and punctuation, the way small embedding models blur
+version numbers and identifiers. Pass --openai to use the configured
+embedding model instead (needs the usual API keys).
+
+Reports hit@k (the fact's chunk is in the top k) and median query latency.
+
+Usage:
+    python tests/agent/bench_hybrid.py [--blogs 10] [--sections 6] [--k 3] [--openai]
+"""
+import argparse
+import random
+import re
+import statistics
+import sys
+import time
+import uuid
+import zlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "blog_agent_service"))
+from agents.rag.chunker import chunk_markdown
+from agents.rag.sparse import encode_document, encode_query
+
+COLLECTION = "blog_embeddings"
+SPARSE = "bm25"
+DIM = 256
+WORDS = "cache queue worker request latency retry batch shard replica index token stream".split()
+SETTINGS = ["max_retries", "batch_size", "timeout_ms", "pool_size", "ef_search", "shard_count"]
+
+
+def make_blog(rng, blog_no, sections, paragraphs=3):
+    lines, questions = [f"# Release notes {blog_no}", ""], []
+    for s in range(sections):
+        service = f"{rng.choice(['ingest', 'search', 'render'])}-{blog_no}-{s}"
+        lines += [f"## {service}", ""]
+        for p in range(paragraphs):
+            setting = SETTINGS[(s + p) % len(SETTINGS)]
+            version = f"v{rng.randint(1, 3)}.{rng.randint(0, 12)}.{rng.randint(0, 9)}"
+            value = rng.randint(2, 900)
+            filler = " ".join(rng.choice(WORDS) for _ in range(rng.randint(30, 60)))
+            fact = f"The {setting} of {service} in {version} defaults to {value}."
+            lines += [f"{filler.capitalize()}. {fact}", ""]
+            questions.append((f"What does {setting} default to for {service} in {version}?", fact))
+    return "\n".join(lines), questions
+
+
+def stand_in_embed(texts):
+    vectors = []
+    for text in texts:
+        v = [0.0] * DIM
+        for word in re.findall(r"[a-z]+", text.lower()):
+            v[zlib.crc32(word.encode()) % DIM] += 1.0
+        vectors.append(v)
+    return vectors
+
+
+def build(client, blogs, embed):
+    from qdrant_client import models
+
+    client.create_collection(
+        COLLECTION,
+        vectors_config=models.VectorParams(size=DIM, distance=models.Distance.COSINE),
+        sparse_vectors_config={SPARSE: models.SparseVectorParams(modifier=models.Modifier.IDF)},
+    )
+    for blog_id, (text, _) in enumerate(blogs):
+        chunks = [c.text for c in chunk_markdown(text, max_tokens=128)]
+        points = []
+        for chunk, dense in zip(chunks, embed(chunks)):
+            indices, values = encode_document(chunk)
+            points.append(models.PointStruct(
+                id=str(uuid.uuid4()),
+                vector={"": dense, SPARSE: models.SparseVector(indices=indices, values=values)},
+                payload={"blog_id": str(blog_id), "text": chunk},
+            ))
+        client.upsert(COLLECTION, points=points)
+
+
+def search(client, mode, blog_id, question, vector, k):
+    from qdrant_client import models
+
+    query_filter = models.Filter(must=[models.FieldCondition(key="blog_id", match=models.MatchValue(value=blog_id))])
+    indices, values = encode_query(question)
+    sparse = models.SparseVector(indices=indices, values=values)
+    if mode == "dense":
+        kwargs = {"query": vector}
+    elif mode == "bm25":
+        kwargs = {"query": sparse, "using": SPARSE}
+    else:
+        kwargs = {
+            "query": models.FusionQuery(fusion=models.Fusion.RRF),
+            "prefetch": [
+                models.Prefetch(query=vector, filter=query_filter, limit=48),
+                models.Prefetch(query=sparse, using=SPARSE, filter=query_filter, limit=48),
+            ],
+        }
+    points = client.query_points(COLLECTION, query_filter=query_filter, limit=k, **kwargs).points
+    return [p.payload["text"] for p in points]
+
+
+def main():
+    global DIM
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--blogs", type=int, default=10)
+    parser.add_argument("--sections", type=int, default=6)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--openai", action="store_true", help="embed with the configured model instead of the stand-in")
+    args = parser.parse_args()
+
+    from qdrant_client import QdrantClient
+
+    embed = stand_in_embed
+    if args.openai:
+        from agents.rag.clients import get_embeddings
+        from agents.rag.config import VECTOR_SIZE
+        embed, DIM = get_embeddings().embed_documents, VECTOR_SIZE
+
+    rng = random.Random(0)
+    blogs = [make_blog(rng, b, args.sections) for b in range(args.blogs)]
+    client = QdrantClient(":memory:")
+    build(client, blogs, embed)
+
+    questions = [(str(b), q, fact) for b, (_, qs) in enumerate(blogs) for q, fact in qs]
+    vectors = embed([q for _, q, _ in questions])
+    print(f"{args.blogs} blogs, {len(questions)} questions, k={args.k}, "
+          f"{'embedding model' if args.openai else 'digit-blind stand-in embeddings'}\n")
+    print(f"{'mode':>7} {'hit@k':>7} {'p50 ms':>8}")
+    for mode in ("dense", "bm25", "hybrid"):
+        hits, latencies = 0, []
+        for (blog_id, question, fact), vector in zip(questions, vectors):
+            start = time.perf_counter()
+            texts = search(client, mode, blog_id, question, vector, args.k)
+            latencies.append((time.perf_counter() - start) * 1000)
+            hits += any(fact in text for text in texts)
+        print(f"{mode:>7} {hits / len(questions):>6.1%} {statistics.median(latencies):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark: N sequential /query calls vs. one /query/batch call.
+
+Runs against a live agent (AGENT_URL, default http://localhost:8000) and real
+indexed blogs. Each question gets a random suffix so neither run is served by
+the exact cache; pass --warm to reuse the same questions and measure cache hits.
+
+Usage:
+    python tests/agent/bench_query_batch.py --blog-ids 65f...a1 65f...b2 --n 100
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+import uuid
+
+import requests
+from dotenv import load_dotenv
+
+load_dotenv()
+
+QUESTIONS = [
+    "What is the main topic of this blog?",
+    "Summarize the key points",
+    "What tools does the author recommend?",
+    "What are the limitations mentioned?",
+    "Who is the target audience?",
+    "What examples are given?",
+]
+
+
+def make_items(blog_ids, n, warm):
+    rng = random.Random(7)
+    items = []
+    for i in range(n):
+        question = rng.choice(QUESTIONS)
+        if not warm:
+            question = f"{question} ({uuid.uuid4().hex[:6]})"
+        items.append({"blog_id": blog_ids[i % len(blog_ids)], "question": question})
+    return items
+
+
+def run_sequential(url, items):
+    latencies = []
+    start = time.perf_counter()
+    for item in items:
+        t0 = time.perf_counter()
+        requests.post(f"{url}/query", json=item, timeout=120).raise_for_status()
+        latencies.append(time.perf_counter() - t0)
+    return time.perf_counter() - start, latencies
+
+
+def run_batch(url, items, concurrency, headers):
+    arrivals = []
+    start = time.perf_counter()
+    with requests.post(
+        f"{url}/query/batch", json={"items": items, "concurrency": concurrency},
+        headers=headers, stream=True, timeout=600,
+    ) as response:
+        response.raise_for_status()
+        sources = {}
+        for line in response.iter_lines():
+            if not line:
+                continue
+            result = json.loads(line)
+            arrivals.append(time.perf_counter() - start)
+            sources[result["source"]] = sources.get(result["source"], 0) + 1
+    return time.perf_counter() - start, arrivals, sources
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default=os.getenv("AGENT_URL", "http://localhost:8000"))
+    parser.add_argument("--blog-ids", nargs="+", required=True)
+    parser.add_argument("--n", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warm", action="store_true")
+    args = parser.parse_args()
+    headers = {"x-agent-key": os.getenv("AGENT_SECRET_KEY", "")}
+
+    items = make_items(args.blog_ids, args.n, args.warm)
+    print(f"🚀 {args.n} questions across {len(args.blog_ids)} blogs")
+
+    seq_total, seq_lat = run_sequential(args.url, items)
+    print(f"  sequential /query : {seq_total:7.2f}s total, p50 {statistics.median(seq_lat) * 1000:.0f}ms per call")
+
+    # Fresh suffixes so the batch run doesn't ride on the sequential run's cache writes
+    items = make_items(args.blog_ids, args.n, args.warm)
+    batch_total, arrivals, sources = run_batch(args.url, items, args.concurrency, headers)
+    print(f"  /query/batch      : {batch_total:7.2f}s total, first result after {arrivals[0] * 1000:.0f}ms")
+    print(f"  sources           : {sources}")
+    print(f"✅ speedup x{seq_total / batch_total:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark: per-blog semantic cache indexes vs. one shared tag-filtered index.
+
+Builds both layouts in a scratch keyspace on the Redis Stack at REDIS_URL and
+reports memory (INFO used_memory delta) and KNN lookup latency for each.
+
+Usage:
+    python tests/agent/bench_semantic_cache.py --blogs 1000 10000 --entries 3
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import redis
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "blog_agent_service"))
+from agents.rag import semantic_cache
+
+load_dotenv()
+
+PREFIX = "bench:semcache"
+
+
+def used_memory(r):
+    return r.info("memory")["used_memory"]
+
+
+def random_vectors(n, dim, rng):
+    v = rng.standard_normal((n, dim)).astype(np.float32)
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+
+def build_per_blog(r, blogs, entries, dim, rng):
+    from redis.commands.search.field import TextField, VectorField
+    from redis.commands.search.indexDefinition import IndexDefinition, IndexType
+    for b in range(blogs):
+        index = f"{PREFIX}:pb:{b}"
+        r.ft(index).create_index(
+            [TextField("question"), VectorField("embedding", "HNSW", {"TYPE": "FLOAT32", "DIM": dim, "DISTANCE_METRIC": "COSINE"})],
+            definition=IndexDefinition(prefix=[f"{index}:"], index_type=IndexType.HASH),
+        )
+        pipe = r.pipeline(transaction=False)
+        for e, vec in enumerate(random_vectors(entries, dim, rng)):
+            pipe.hset(f"{index}:{e}", mapping={"question": f"q{e}", "answer": "a" * 400, "embedding": vec.tobytes()})
+        pipe.execute()
+
+
+def build_shared(r, blogs, entries, dim, rng):
+    from redis.commands.search.field import TagField, TextField, VectorField
+    from redis.commands.search.indexDefinition import IndexDefinition, IndexType
+    index = f"{PREFIX}:shared"
+    r.ft(index).create_index(
+        [TagField("blog_id"), TextField("question"), VectorField("embedding", "HNSW", {"TYPE": "FLOAT32", "DIM": dim, "DISTANCE_METRIC": "COSINE"})],
+        definition=IndexDefinition(prefix=[f"{index}:doc:"], index_type=IndexType.HASH),
+    )
+    for b in range(blogs):
+        pipe = r.pipeline(transaction=False)
+        for e, vec in enumerate(random_vectors(entries, dim, rng)):
+            pipe.hset(f"{index}:doc:{b}:{e}", mapping={"blog_id": f"blog{b}", "question": f"q{e}", "answer": "a" * 400, "embedding": vec.tobytes()})
+        pipe.execute()
+
+
+def time_lookups(r, blogs, dim, queries, shared, rng):
+    from redis.commands.search.query import Query
+    latencies = []
+    for vec in random_vectors(queries, dim, rng):
+        b = random.randrange(blogs)
+        if shared:
+            index, query = f"{PREFIX}:shared", semantic_cache.knn_query(f"blog{b}")
+        else:
+            index = f"{PREFIX}:pb:{b}"
+            query = Query("*=>[KNN 1 @embedding $vec AS distance]").sort_by("distance").return_fields("answer", "distance").dialect(2)
+        start = time.perf_counter()
+        r.ft(index).search(query, query_params={"vec": vec.tobytes()})
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1]
+
+
+def cleanup(r):
+    for name in r.execute_command("FT._LIST"):
+        name = name.decode() if isinstance(name, bytes) else name
+        if name.startswith(PREFIX):
+            r.ft(name).dropindex(delete_documents=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--blogs", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--entries", type=int, default=3, help="Cached questions per blog")
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    r = redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379"))
+    rng = np.random.default_rng(42)
+    cleanup(r)
+
+    print(f"{'blogs':>7} | {'layout':>8} | {'memory MB':>10} | {'p50 ms':>7} | {'p95 ms':>7}")
+    print("-" * 52)
+    for blogs in args.blogs:
+        for shared in (False, True):
+            before = used_memory(r)
+            (build_shared if shared else build_per_blog)(r, blogs, args.entries, args.dim, rng)
+            mem = (used_memory(r) - before) / 1024 / 1024
+            p50, p95 = time_lookups(r, blogs, args.dim, args.queries, shared, rng)
+            print(f"{blogs:>7} | {'shared' if shared else 'per-blog':>8} | {mem:>10.1f} | {p50:>7.2f} | {p95:>7.2f}")
+            cleanup(r)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "blog_agent_service"))
+
+from agents.rag.bulk_index import BulkIndexer, iter_jsonl
+from agents.rag.chunker import Chunk
+
+
+def _split(blog_id, text):
+    chunks, start = [], 0
+    for part in text.split("|"):
+        chunks.append(Chunk(part, "s", start, start + len(part), len(part)))
+        start += len(part) + 1
+    return chunks
+
+
+def _indexer(tmp, embedded, written, committed, fail_on=None):
+    def embed(texts):
+        embedded.append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+    def write(items):
+        if fail_on and any(payload["blog_id"] == fail_on for _, _, payload in items):
+            raise RuntimeError("qdrant down")
+        written.extend(items)
+
+    return BulkIndexer(
+        _split, embed, write, committed.extend,
+        embed_batch=3, window_chunks=4,
+        checkpoint_path=os.path.join(tmp, "ckpt.json"), source="jsonl:test",
+    )
+
+
+def _write_blogs(tmp, blogs):
+    path = os.path.join(tmp, "blogs.jsonl")
+    with open(path, "w") as f:
+        for blog_id, text in blogs:
+            f.write(json.dumps({"blog_id": blog_id, "text": text}) + "\n")
+    return path
+
+
+def test_chunks_of_many_blogs_share_embedding_batches():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = _write_blogs(tmp, [("a", "a1|a2"), ("b", "b1"), ("empty", " "), ("c", "c1|c2|c3")])
+        embedded, written, committed = [], [], []
+        report = _indexer(tmp, embedded, written, committed).run(iter_jsonl(path))
+
+        assert embedded == [["a1", "a2", "b1"], ["c1", "c2", "c3"]]
+        assert committed == ["a", "b", "c"]
+        assert report["blogs"] == 3 and report["skipped"] == 1
+        assert report["chunks"] == 6 and report["tokens"] == 12
+        assert report["chunks_per_s"] > 0
+        assert [payload["chunk_index"] for _, _, payload in written] == [0, 1, 0, 0, 1, 2]
+        assert written[1][2]["char_start"] == 3 and written[1][2]["section"] == "s"
+
+
+def test_interrupted_run_resumes_after_the_last_committed_window():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = _write_blogs(tmp, [("a", "a1|a2|a3|a4"), ("b", "b1|b2|b3|b4"), ("c", "c1")])
+        embedded, written, committed = [], [], []
+        first = _indexer(tmp, embedded, written, committed, fail_on="b")
+        try:
+            first.run(iter_jsonl(path, first.resume_key()))
+            raise AssertionError("expected the upload failure to abort the run")
+        except RuntimeError:
+            pass
+        assert committed == ["a"]
+
+        embedded, written, committed = [], [], []
+        second = _indexer(tmp, embedded, written, committed)
+        after = second.resume_key()
+        assert after == "1"
+        report = second.run(iter_jsonl(path, after))
+        assert committed == ["b", "c"]
+        assert report["totals"]["blogs"] == 3
+
+
+if __name__ == "__main__":
+    test_chunks_of_many_blogs_share_embedding_batches()
+    test_interrupted_run_resumes_after_the_last_committed_window()
+    print("✅ Bulk index checks passed")
@@ -0,0 +1,53 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "blog_agent_service"))
+
+from agents.rag.chunk_diff import chunk_ids, plan_reindex
+
+
+def _stored(blog_id, chunks):
+    return [(point_id, i) for i, (point_id, _) in enumerate(chunk_ids(blog_id, chunks))]
+
+
+def test_single_paragraph_edit_embeds_one_chunk():
+    before = ["intro", "body", "outro"]
+    after = ["intro", "body (edited)", "outro"]
+    plan = plan_reindex("b1", after, _stored("b1", before))
+    assert [text for _, _, text, _ in plan.new] == ["body (edited)"]
+    assert plan.reused == 2
+    assert len(plan.delete) == 1
+    assert plan.moved == []
+    assert plan.changed
+
+
+def test_inserted_paragraph_renumbers_without_reembedding():
+    before = ["a", "b"]
+    after = ["new", "a", "b"]
+    plan = plan_reindex("b1", after, _stored("b1", before))
+    assert [i for _, i, _, _ in plan.new] == [0]
+    assert [i for _, i in plan.moved] == [1, 2]
+    assert plan.delete == []
+
+
+def test_unchanged_blog_is_a_no_op_and_duplicates_get_distinct_ids():
+    chunks = ["same", "same", "other"]
+    ids = [point_id for point_id, _ in chunk_ids("b1", chunks)]
+    assert len(set(ids)) == 3
+    plan = plan_reindex("b1", chunks, _stored("b1", chunks))
+    assert (plan.new, plan.moved, plan.delete, plan.reused) == ([], [], [], 3)
+    assert not plan.changed
+
+
+def test_legacy_points_are_replaced():
+    plan = plan_reindex("b1", ["a"], [("legacy-id", None)])
+    assert len(plan.new) == 1
+    assert plan.delete == ["legacy-id"]
+
+
+if __name__ == "__main__":
+    test_single_paragraph_edit_embeds_one_chunk()
+    test_inserted_paragraph_renumbers_without_reembedding()
+    test_unchanged_blog_is_a_no_op_and_duplicates_get_distinct_ids()
+    test_legacy_points_are_replaced()
+    print("✅ Chunk diff checks passed")
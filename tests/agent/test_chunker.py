@@ -0,0 +1,68 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "blog_agent_service"))
+
+from agents.rag.chunker import chunk_markdown
+
+
+def _count(text):
+    return max(1, len(text) // 4)
+
+
+BLOG = """# Caching Notes
+
+## Why cache
+
+Latency matters. Caches cut it.
+
+Second paragraph of why.
+
+## Code
+
+```python
+# not a heading
+x = 1
+```
+
+## Empty
+
+### Nested
+""" + "Long sentence about vectors and shards. " * 30 + "\n"
+
+
+def test_chunks_follow_sections_and_keep_exact_offsets():
+    chunks = chunk_markdown(BLOG, max_tokens=60, count=_count)
+    for chunk in chunks:
+        assert BLOG[chunk.char_start:chunk.char_end] == chunk.text
+        assert chunk.tokens <= 60 + _count("## Empty\n\n### Nested\n")
+
+    # The title has no body of its own and rides along with the first section
+    assert chunks[0].text.startswith("# Caching Notes")
+    assert chunks[0].section == "Why cache"
+    assert "Second paragraph" in chunks[0].text
+
+    code = [c for c in chunks if c.section == "Code"]
+    assert len(code) == 1 and "# not a heading" in code[0].text
+
+    nested = [c for c in chunks if c.section == "Nested"]
+    assert len(nested) > 1  # oversized paragraph cut between sentences
+    assert nested[0].text.startswith("## Empty")
+    assert all(c.text.rstrip().endswith(".") for c in nested)
+
+    # No overlap: chunks are ordered, disjoint slices
+    assert all(a.char_end <= b.char_start for a, b in zip(chunks, chunks[1:]))
+
+
+def test_paragraphs_pack_up_to_the_token_budget():
+    text = "\n\n".join(f"Paragraph {i} " + "word " * 10 for i in range(6))
+    chunks = chunk_markdown(text, max_tokens=40, count=_count)
+    assert [c.section for c in chunks] == [""] * len(chunks)
+    assert 1 < len(chunks) < 6
+    assert chunk_markdown("   ", count=_count) == []
+
+
+if __name__ == "__main__":
+    test_chunks_follow_sections_and_keep_exact_offsets()
+    test_paragraphs_pack_up_to_the_token_budget()
+    print("✅ Markdown chunker checks passed")
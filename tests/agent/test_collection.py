@@ -0,0 +1,29 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "blog_agent_service"))
+
+from agents.rag import config
+from agents.rag.collection import vector_bytes
+
+
+def test_memory_per_vector_drops_3_to_12x():
+    full = vector_bytes(1536)["ram"]
+    assert full == 6144
+    assert full / vector_bytes(512)["ram"] == 3
+    # int8 copy in RAM, float32 originals on disk for rescoring
+    shortened = vector_bytes(512, "int8", on_disk=True)
+    assert full / shortened["ram"] == 12 and shortened["disk"] == 2048
+    # Without on_disk the originals stay in RAM next to the quantized copy
+    assert vector_bytes(512, "int8")["ram"] == 2560
+
+
+def test_embedding_keys_keep_sizes_apart():
+    assert config.embedding_model_key(config.EMBEDDING_NATIVE_DIMENSIONS) == config.EMBEDDING_MODEL
+    assert config.embedding_model_key(512) == f"{config.EMBEDDING_MODEL}@512"
+
+
+if __name__ == "__main__":
+    test_memory_per_vector_drops_3_to_12x()
+    test_embedding_keys_keep_sizes_apart()
+    print("✅ Collection layout checks passed")
@@ -0,0 +1,131 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "blog_agent_service"))
+
+from agents.rag.chunker import chunk_sections
+from agents.rag.context import adaptive_k, expand_to_sections, select_chunks, strip_overlap
+from agents.rag.sections import SectionCache
+
+
+def _count(text):
+    return max(1, len(text) // 4)
+
+
+BLOG = "# Title\n\n## Setup\n\n" + "Install the agent first. " * 8 + "\n\nThen set the key.\n\n## Tuning\n\n" + "Raise the batch size. " * 30
+
+
+def test_children_are_cut_from_sections_and_expand_back_within_budget():
+    sections, chunks = chunk_sections(BLOG, section_tokens=80, chunk_tokens=20, count=_count)
+    assert all(BLOG[c.char_start:c.char_end] == c.text for c in chunks)
+    assert all(c.text in sections[c.parent].text for c in chunks)
+    texts = [s.text for s in sections]
+
+    setup = [c.text for c in chunks if c.section == "Setup"]
+    tuning = [c.text for c in chunks if c.section == "Tuning"]
+    # Two fragments of Setup plus one of Tuning: Setup is sent once, whole
+    blocks = expand_to_sections([setup[1], tuning[0], setup[0]], texts, budget_tokens=1000, count=_count)
+    assert blocks[0] == texts[0] and "Then set the key." in blocks[0]
+    assert len(blocks) == 2
+
+    # A tight budget keeps the best section and only the retrieved chunks after it
+    tight = expand_to_sections([setup[0], tuning[0]], texts, budget_tokens=_count(texts[0]) + 10, count=_count)
+    assert tight[0] == texts[0]
+    assert len(tight) == 1 or tight[1] == tuning[0]
+
+    # Unknown chunks (legacy points, rag_data) pass through untouched
+    assert expand_to_sections(["legacy text"], texts, 1000, _count) == ["legacy text"]
+
+
+def test_section_cache_loads_once_and_invalidates():
+    loads = []
+
+    def loader(blog_id):
+        loads.append(blog_id)
+        if blog_id == "down":
+            raise ConnectionError("qdrant down")
+        return [f"{blog_id} section"]
+
+    cache = SectionCache(loader, max_blogs=1)
+    assert cache.get("a") == ["a section"]
+    assert cache.get("a") == ["a section"]
+    assert loads == ["a"]
+    cache.invalidate("a")
+    cache.get("a")
+    cache.get("b")  # evicts a
+    assert cache.cached("a") is None
+    assert cache.get("down") == [] and cache.cached("down") is None
+
+
+def test_adaptive_k_cuts_at_the_first_relevance_drop():
+    assert adaptive_k([0.9, 0.88, 0.7, 0.69], min_k=1, max_k=8, gap=0.08) == 2
+    assert adaptive_k([0.9, 0.5, 0.49], min_k=2, max_k=8, gap=0.08) == 3  # drop before min_k is ignored
+    assert adaptive_k([0.9, 0.89, 0.88, 0.87], min_k=1, max_k=3, gap=0.08) == 3
+
+
+def test_strip_overlap_drops_repeated_text():
+    shared = "the shared overlap between two chunks"
+    first = "Opening paragraph. " + shared
+    second = shared + " and what follows it."
+    assert strip_overlap([first, second, "Opening paragraph."]) == [first, "and what follows it."]
+    # Overlap shorter than min_chars is left alone
+    assert strip_overlap(["abc xyz", "xyz def"]) == ["abc xyz", "xyz def"]
+
+
+def test_mmr_prefers_a_different_chunk_over_a_near_duplicate():
+    import numpy as np
+
+    query = [1.0, 1.0, 0.0]
+    hits = [
+        ("a", 0.95, np.array([1.0, 0.9, 0.0])),
+        ("a again", 0.94, np.array([1.0, 0.91, 0.0])),
+        ("b", 0.90, np.array([0.6, 1.0, 0.3])),
+    ]
+    assert select_chunks(query, hits, max_k=2, min_k=1, gap=0.5, lambda_=0.3) == ["a", "b"]
+    assert select_chunks(query, hits, max_k=2, min_k=1, gap=0.5, lambda_=1.0) == ["a", "a again"]
+    # No vectors (legacy fallback): adaptive k alone, in score order
+    assert select_chunks(None, [("x", 0.9, None), ("y", 0.5, None)], max_k=8, min_k=1, gap=0.1) == ["x"]
+
+
+def test_adaptive_k_cuts_hybrid_results_by_dense_score():
+    from types import SimpleNamespace
+
+    from agents import rag_logic
+
+    # RRF ranks c first, but its dense score sits well below a and b
+    points = [
+        SimpleNamespace(payload={"text": text}, score=rrf, vector={"": dense, "bm25": None})
+        for text, rrf, dense in [
+            ("c", 0.5, [0.6, 0.8]), ("a", 0.33, [1.0, 0.0]), ("b", 0.25, [0.98, 0.2]), ("d", 0.2, [0.5, 0.86]),
+        ]
+    ]
+    client = SimpleNamespace(query_points=lambda **kwargs: SimpleNamespace(points=points))
+    patched = {
+        "HYBRID_ENABLED": True,
+        "RETRIEVAL_BACKEND": "qdrant",
+        "_hot_chunks": lambda blog_id, query_vector, k: None,
+        "_blog_filter": lambda blog_id: None,
+        "_hybrid_prefetch": lambda query_filter, query_vector, question: ["dense", "bm25"],
+        "get_qdrant_client": lambda: client,
+    }
+    saved = {name: getattr(rag_logic, name) for name in patched}
+    try:
+        for name, value in patched.items():
+            setattr(rag_logic, name, value)
+        query = [1.0, 0.0]
+        hits = rag_logic._search_chunks("blog", query, question="how to set the key")
+        assert all(score is not None for _, score, _ in hits)
+        assert sorted(rag_logic._pack_chunks(query, hits)) == ["a", "b"]
+    finally:
+        for name, value in saved.items():
+            setattr(rag_logic, name, value)
+
+
+if __name__ == "__main__":
+    test_children_are_cut_from_sections_and_expand_back_within_budget()
+    test_section_cache_loads_once_and_invalidates()
+    test_adaptive_k_cuts_at_the_first_relevance_drop()
+    test_strip_overlap_drops_repeated_text()
+    test_mmr_prefers_a_different_chunk_over_a_near_duplicate()
+    test_adaptive_k_cuts_hybrid_results_by_dense_score()
+    print("✅ Context packing checks passed")
@@ -0,0 +1,61 @@
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "blog_agent_service"))
+
+from agents.rag.embed_batcher import AsyncEmbeddingBatcher, EmbeddingBatcher
+
+
+def test_concurrent_queries_share_one_call():
+    calls = []
+
+    def embed_many(texts):
+        calls.append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+    batcher = EmbeddingBatcher(embed_many, window_ms=100, max_batch=16)
+    results = {}
+    threads = [
+        threading.Thread(target=lambda t=t: results.__setitem__(t, batcher.embed(t)))
+        for t in ["a", "bb", "ccc", "dddd"]
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    batcher.close()
+
+    assert len(calls) == 1
+    assert results == {"a": [1.0], "bb": [2.0], "ccc": [3.0], "dddd": [4.0]}
+
+
+def test_full_batch_flushes_without_waiting_and_errors_propagate():
+    calls = []
+
+    async def aembed_many(texts):
+        calls.append(len(texts))
+        if "boom" in texts:
+            raise RuntimeError("provider down")
+        return [[1.0] for _ in texts]
+
+    async def main():
+        batcher = AsyncEmbeddingBatcher(aembed_many, window_ms=10_000, max_batch=3)
+        vectors = await asyncio.wait_for(
+            asyncio.gather(*(batcher.embed(str(i)) for i in range(3))), timeout=1.0
+        )
+        assert vectors == [[1.0]] * 3
+        failed = await asyncio.gather(
+            batcher.embed("boom"), batcher.embed("x"), batcher.embed("y"), return_exceptions=True
+        )
+        assert all(isinstance(f, RuntimeError) for f in failed)
+
+    asyncio.run(main())
+    assert calls == [3, 3]
+
+
+if __name__ == "__main__":
+    test_concurrent_queries_share_one_call()
+    test_full_batch_flushes_without_waiting_and_errors_propagate()
+    print("✅ Embedding batcher checks passed")
@@ -0,0 +1,72 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "blog_agent_service"))
+
+from langchain_core.embeddings import Embeddings
+
+from agents.rag.embedding_cache import CachedEmbeddings
+
+
+class CountingEmbeddings(Embeddings):
+    def __init__(self):
+        self.texts = []
+
+    def embed_documents(self, texts):
+        self.texts.extend(texts)
+        return [[float(len(t)), 1.0, 0.5] for t in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+class DictRedis:
+    """Just enough of redis-py for the cache: mget + a pipeline of set()."""
+
+    def __init__(self):
+        self.data = {}
+
+    def mget(self, keys):
+        return [self.data.get(k) for k in keys]
+
+    def pipeline(self, transaction=False):
+        return self
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def execute(self):
+        pass
+
+
+def test_repeated_question_skips_provider():
+    inner = CountingEmbeddings()
+    cache = CachedEmbeddings(inner, model="m")
+    first = cache.embed_query("What is RAG?")
+    again = cache.embed_query("  what is   rag ")
+    assert first == again
+    assert inner.texts == ["What is RAG?"]
+
+
+def test_redis_tier_survives_a_new_worker():
+    inner = CountingEmbeddings()
+    redis = DictRedis()
+    CachedEmbeddings(inner, model="m", redis_getter=lambda: redis).embed_documents(["a", "bb"])
+
+    fresh = CachedEmbeddings(inner, model="m", redis_getter=lambda: redis)
+    vectors = fresh.embed_documents(["bb", "ccc", "a", "ccc"])
+    assert inner.texts == ["a", "bb", "ccc"]
+    assert vectors[0] == [2.0, 1.0, 0.5]
+    assert vectors[1] == vectors[3]
+
+
+def test_model_is_part_of_the_key():
+    inner = CountingEmbeddings()
+    assert CachedEmbeddings(inner, model="a").key("q") != CachedEmbeddings(inner, model="b").key("q")
+
+
+if __name__ == "__main__":
+    test_repeated_question_skips_provider()
+    test_redis_tier_survives_a_new_worker()
+    test_model_is_part_of_the_key()
+    print("✅ Embedding cache checks passed")
@@ -0,0 +1,54 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "blog_agent_service"))
+
+from agents.rag.embedding_store import EmbeddingStore, StoredEmbeddings, text_hash
+
+
+class CountingEmbeddings:
+    def __init__(self):
+        self.texts = []
+
+    def embed_documents(self, texts):
+        self.texts.extend(texts)
+        return [[float(len(t)), 0.5] for t in texts]
+
+
+def test_seen_chunks_skip_the_provider_across_restarts():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "emb.sqlite3")
+        inner = CountingEmbeddings()
+        StoredEmbeddings(inner, EmbeddingStore(path), "m").embed_documents(["alpha", "beta"])
+
+        reopened = StoredEmbeddings(inner, EmbeddingStore(path), "m")
+        vectors = reopened.embed_documents(["beta", "gamma", "alpha", "gamma"])
+        assert inner.texts == ["alpha", "beta", "gamma"]
+        assert vectors[0] == [4.0, 0.5]
+        assert vectors[1] == vectors[3]
+
+        # A different model never reuses these vectors
+        StoredEmbeddings(inner, EmbeddingStore(path), "other").embed_documents(["alpha"])
+        assert inner.texts[-1] == "alpha"
+
+
+def test_stats_and_compaction():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = EmbeddingStore(os.path.join(tmp, "emb.sqlite3"))
+        store.put_many("old-model", [(text_hash("a"), [1.0, 2.0])])
+        store.put_many("m", [(text_hash("b"), [1.0, 2.0]), (text_hash("c"), [3.0, 4.0])])
+        stats = store.stats()
+        assert stats["entries"] == 3
+        assert stats["models"]["m"]["vector_bytes"] == 2 * 2 * 2  # float16
+
+        assert store.compact(keep_models=["m"]) == 1
+        assert store.compact(max_age_days=-1) == 2
+        assert store.stats()["entries"] == 0
+
+
+if __name__ == "__main__":
+    test_seen_chunks_skip_the_provider_across_restarts()
+    test_stats_and_compaction()
+    print("✅ Embedding store checks passed")
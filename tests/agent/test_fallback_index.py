@@ -0,0 +1,62 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "blog_agent_service"))
+
+from agents.rag.fallback_index import FallbackIndex, fingerprint
+
+
+def _rag_data():
+    return [
+        {"text": "x-axis", "embedding": [1.0, 0.0, 0.0]},
+        {"text": "mostly x", "embedding": [0.9, 0.1, 0.0]},
+        {"text": "y-axis", "embedding": [0.0, 5.0, 0.0]},
+        {"text": "no vector"},
+        {"text": "wrong dim", "embedding": [1.0, 0.0]},
+    ]
+
+
+def test_ranks_by_cosine_and_skips_bad_items():
+    index = FallbackIndex()
+    assert index.search("b1", _rag_data(), [1.0, 0.0, 0.0], k=2) == ["x-axis", "mostly x"]
+    assert index.search("b1", _rag_data(), [0.0, 1.0, 0.0], k=1) == ["y-axis"]
+    assert index.search("b1", _rag_data(), [1.0, 0.0], k=1) == []
+
+
+def test_rebuilds_when_rag_data_changes_and_evicts_lru():
+    index = FallbackIndex(max_blogs=1)
+    index.search("b1", _rag_data(), [1.0, 0.0, 0.0])
+    changed = [{"text": "new chunk", "embedding": [1.0, 0.0, 0.0]}]
+    assert index.search("b1", changed, [1.0, 0.0, 0.0]) == ["new chunk"]
+    index.search("b2", _rag_data(), [1.0, 0.0, 0.0])
+    assert list(index._blogs) == ["b2"]
+
+
+def test_shortens_full_size_rag_data_to_the_query_size():
+    index = FallbackIndex(dimensions=2)
+    assert index.search("b1", _rag_data(), [0.0, 1.0], k=1) == ["y-axis"]
+    hits = index.search("b1", _rag_data(), [1.0, 0.0], k=1, with_vectors=True)
+    assert hits[0][0] == "x-axis" and abs(hits[0][1] - 1.0) < 1e-6 and len(hits[0][2]) == 2
+
+
+
+def test_fingerprint_sees_re_embedded_chunks():
+    data = _rag_data()
+    re_embedded = _rag_data()
+    re_embedded[0]["embedding"] = [0.0, 0.0, 1.0]
+    shortened = _rag_data()
+    shortened[2]["embedding"] = [0.0, 5.0, 0.0, 0.0, 0.0]
+    assert fingerprint(data) == fingerprint(_rag_data())
+    assert fingerprint(data) != fingerprint(re_embedded)
+    assert fingerprint(data) != fingerprint(shortened)
+    # Only the first, middle and last chunks are read
+    sparse = [data[0]] + [None] * 499 + [data[1]] + [None] * 498 + [data[2]]
+    assert fingerprint(sparse) == fingerprint(list(sparse))
+
+
+if __name__ == "__main__":
+    test_ranks_by_cosine_and_skips_bad_items()
+    test_rebuilds_when_rag_data_changes_and_evicts_lru()
+    test_shortens_full_size_rag_data_to_the_query_size()
+    test_fingerprint_sees_re_embedded_chunks()
+    print("✅ Fallback index checks passed")
@@ -0,0 +1,59 @@
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "blog_agent_service"))
+
+from agents.rag.hot_tier import HotBlogTier
+
+BLOGS = {
+    "hot": (["x chunk", "y chunk"], [[1.0, 0.0], [0.0, 1.0]]),
+    "warm": (["only chunk"], [[1.0, 1.0]]),
+}
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_popular_blog_is_promoted_and_searched_locally():
+    loads = []
+
+    def loader(blog_id):
+        loads.append(blog_id)
+        return BLOGS[blog_id]
+
+    tier = HotBlogTier(loader, max_blogs=1, min_queries=3)
+    assert tier.search("hot", [1.0, 0.0]) is None
+    assert tier.search("hot", [1.0, 0.0]) is None
+    assert tier.search("hot", [1.0, 0.0]) is None  # third query crosses the threshold
+    assert _wait_for(lambda: "hot" in tier.resident())
+    assert tier.search("hot", [0.1, 0.9], k=1) == ["y chunk"]
+
+    # A colder blog can't push the hot one out
+    for _ in range(3):
+        tier.search("warm", [1.0, 0.0])
+    time.sleep(0.05)
+    assert tier.resident() == {"hot": 2}
+    assert loads == ["hot"]
+
+
+def test_refresh_reloads_a_resident_blog():
+    versions = iter([BLOGS["hot"], (["new chunk"], [[1.0, 0.0]])])
+    tier = HotBlogTier(lambda blog_id: next(versions), min_queries=1)
+    tier.search("hot", [1.0, 0.0])
+    assert _wait_for(lambda: tier.resident() == {"hot": 2})
+    tier.refresh("hot")
+    assert _wait_for(lambda: tier.resident() == {"hot": 1})
+    assert tier.search("hot", [1.0, 0.0]) == ["new chunk"]
+
+
+if __name__ == "__main__":
+    test_popular_blog_is_promoted_and_searched_locally()
+    test_refresh_reloads_a_resident_blog()
+    print("✅ Hot tier checks passed")
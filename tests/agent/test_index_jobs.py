@@ -0,0 +1,76 @@
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "blog_agent_service"))
+
+from agents.rag.index_jobs import IndexJobQueue
+
+
+def _wait_done(queue, job_id, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_queued_saves_collapse_to_the_last_text():
+    gate = threading.Event()
+    runs = []
+
+    def run(blog_id, text):
+        gate.wait(1.0)
+        runs.append((blog_id, text))
+        return {"chunks": len(text)}
+
+    notified = []
+    queue = IndexJobQueue(run, notify=lambda job: notified.append((job["job_id"], job["status"])), workers=2)
+    first = queue.submit("b1", "v1")
+    time.sleep(0.05)  # v1 is now running
+    second = queue.submit("b1", "v2", notify=True)
+    third = queue.submit("b1", "v3")
+    assert second["job_id"] == third["job_id"] != first["job_id"]
+    gate.set()
+
+    assert _wait_done(queue, first["job_id"])["status"] == "succeeded"
+    job = _wait_done(queue, third["job_id"])
+    assert job["result"] == {"chunks": 2}
+    assert job["collapsed"] == 1
+    assert runs == [("b1", "v1"), ("b1", "v3")]
+    time.sleep(0.05)
+    # Only the collapsed job asked for a webhook, and it gets exactly one
+    assert notified == [(third["job_id"], "succeeded")]
+    queue.close()
+
+
+def test_failures_are_reported_and_other_blogs_run_in_parallel():
+    started = []
+    both_started = threading.Event()
+
+    def run(blog_id, text):
+        started.append(blog_id)
+        if len(started) == 2:
+            both_started.set()
+        both_started.wait(1.0)
+        if blog_id == "bad":
+            raise RuntimeError("qdrant down")
+        return {}
+
+    queue = IndexJobQueue(run, workers=2)
+    good = queue.submit("good", "x")
+    bad = queue.submit("bad", "y")
+    assert _wait_done(queue, bad["job_id"])["error"] == "qdrant down"
+    assert _wait_done(queue, good["job_id"])["status"] == "succeeded"
+    assert both_started.is_set()
+    assert queue.get("missing") is None
+    queue.close()
+
+
+if __name__ == "__main__":
+    test_queued_saves_collapse_to_the_last_text()
+    test_failures_are_reported_and_other_blogs_run_in_parallel()
+    print("✅ Index job queue checks passed")
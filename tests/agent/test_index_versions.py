@@ -0,0 +1,86 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "blog_agent_service"))
+
+from agents.rag.versions import IndexVersions, active_key
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.gets = 0
+        self.down = False
+
+    def get(self, key):
+        if self.down:
+            raise ConnectionError("redis down")
+        self.gets += 1
+        return self.data.get(key)
+
+    def set(self, key, value):
+        self.data[key] = str(value).encode()
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1).encode()
+        return int(self.data[key])
+
+    def register_script(self, script):
+        # Only ACTIVATE_SCRIPT is used here
+        def activate(keys, args):
+            current = self.data.get(keys[0])
+            if current is not None and int(current) >= int(args[0]):
+                return int(current)
+            self.set(keys[0], args[0])
+            return int(args[0])
+        return activate
+
+
+def test_versions_flip_atomically_and_are_cached():
+    redis = FakeRedis()
+    versions = IndexVersions(lambda: redis, ttl=60)
+    assert versions.active("b1") is None  # never versioned: blog-only filter
+
+    v1 = versions.next_version("b1")
+    v2 = versions.next_version("b1")
+    assert (v1, v2) == (1, 2)
+    assert versions.active("b1") is None  # building a version does not expose it
+
+    versions.activate("b1", v2)
+    assert redis.data[active_key("b1")] == b"2"
+    gets = redis.gets
+    assert versions.active("b1") == 2
+    assert redis.gets == gets  # served from the process cache
+
+    # Another process activated v3; the bus message drops our cached value
+    redis.set(active_key("b1"), 3)
+    assert versions.active("b1") == 2
+    versions.invalidate("b1")
+    assert versions.active("b1") == 3
+    assert versions.active("b1", fresh=True) == 3
+
+
+def test_late_older_version_does_not_roll_back():
+    redis = FakeRedis()
+    versions = IndexVersions(lambda: redis, ttl=60)
+    slow, fast = versions.next_version("b1"), versions.next_version("b1")
+    assert versions.activate("b1", fast) == fast
+    assert versions.activate("b1", slow) == fast  # the slow re-index finished last
+    assert redis.data[active_key("b1")] == b"2"
+    assert versions.active("b1") == fast
+
+
+def test_redis_outage_keeps_last_known_version():
+    redis = FakeRedis()
+    versions = IndexVersions(lambda: redis, ttl=0)
+    versions.activate("b1", 4)
+    redis.down = True
+    assert versions.active("b1") == 4
+    assert versions.active("unknown") is None
+
+
+if __name__ == "__main__":
+    test_versions_flip_atomically_and_are_cached()
+    test_late_older_version_does_not_roll_back()
+    test_redis_outage_keeps_last_known_version()
+    print("✅ Index version checks passed")
@@ -0,0 +1,89 @@
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "blog_agent_service"))
+
+from agents.rag.invalidation import InvalidationBus
+
+
+class FakeThread:
+    def __init__(self):
+        self.alive = True
+
+    def is_alive(self):
+        return self.alive
+
+    def stop(self):
+        self.alive = False
+
+
+class FakePubSub:
+    def __init__(self, redis):
+        self.redis = redis
+        self.handler = None
+
+    def subscribe(self, **channels):
+        if self.redis.down:
+            raise ConnectionError("redis down")
+
+    def run_in_thread(self, sleep_time, daemon, exception_handler):
+        self.handler = exception_handler
+        self.thread = FakeThread()
+        self.redis.listeners.append(self)
+        return self.thread
+
+    def close(self):
+        pass
+
+
+class FakeRedis:
+    def __init__(self):
+        self.down = False
+        self.listeners = []
+
+    def pubsub(self, ignore_subscribe_messages=True):
+        return FakePubSub(self)
+
+    def publish(self, channel, message):
+        pass
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_listener_restarts_with_backoff_after_an_error():
+    redis = FakeRedis()
+    bus = InvalidationBus(lambda: redis, restart_delay=0.02)
+    bus.subscribe(lambda blog_id: None)
+    assert len(redis.listeners) == 1
+
+    # Connection drops, and Redis is still down for the first retry
+    redis.down = True
+    first = redis.listeners[0]
+    first.handler(ConnectionError("dropped"), first, first.thread)
+    assert not first.thread.is_alive()
+    time.sleep(0.05)
+    assert len(redis.listeners) == 1
+
+    redis.down = False
+    assert _wait_for(lambda: len(redis.listeners) == 2)
+    assert redis.listeners[1].thread.is_alive()
+
+    # Closed buses stay down
+    bus.close()
+    second = redis.listeners[1]
+    second.handler(ConnectionError("dropped"), second, second.thread)
+    time.sleep(0.1)
+    assert len(redis.listeners) == 2
+
+
+if __name__ == "__main__":
+    test_listener_restarts_with_backoff_after_an_error()
+    print("✅ Invalidation bus checks passed")
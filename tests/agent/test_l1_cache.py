@@ -0,0 +1,59 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "blog_agent_service"))
+
+import numpy as np
+
+from agents.rag.l1_cache import L1AnswerCache
+
+
+def test_exact_hit_and_lru_bound():
+    cache = L1AnswerCache(max_entries=2, ttl=60)
+    cache.put("b1", "q1", "a1")
+    cache.put("b1", "q2", "a2")
+    assert cache.get("b1", "q1") == "a1"  # q1 is now most recent
+    cache.put("b1", "q3", "a3")
+    assert cache.get("b1", "q2") is None
+    assert cache.get("b1", "q1") == "a1"
+
+
+def test_similar_question_hits_local_matrix():
+    cache = L1AnswerCache(max_distance=0.2)
+    v = np.zeros(8, dtype=np.float32)
+    v[0] = 1.0
+    cache.put("b1", "what is rag", "RAG answer", v)
+
+    near = v.copy()
+    near[1] = 0.1
+    far = np.zeros(8, dtype=np.float32)
+    far[2] = 1.0
+    assert cache.get_similar("b1", near) == "RAG answer"
+    assert cache.get_similar("b1", far) is None
+    assert cache.get_similar("b2", near) is None
+
+
+def test_invalidate_blog_drops_both_tiers():
+    cache = L1AnswerCache()
+    v = np.ones(4, dtype=np.float32)
+    cache.put("b1", "q", "a", v)
+    cache.put("b2", "q", "other", v)
+    cache.invalidate_blog("b1")
+    assert cache.get("b1", "q") is None
+    assert cache.get_similar("b1", v) is None
+    assert cache.get("b2", "q") == "other"
+
+
+def test_expired_entries_miss():
+    cache = L1AnswerCache(ttl=-1)
+    cache.put("b1", "q", "a", np.ones(4))
+    assert cache.get("b1", "q") is None
+    assert cache.get_similar("b1", np.ones(4)) is None
+
+
+if __name__ == "__main__":
+    test_exact_hit_and_lru_bound()
+    test_similar_question_hits_local_matrix()
+    test_invalidate_blog_drops_both_tiers()
+    test_expired_entries_miss()
+    print("✅ L1 cache checks passed")
@@ -0,0 +1,86 @@
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Allow `from agents...` when run from the repo root
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "blog_agent_service"))
+
+from agents.rag.singleflight import SingleFlight, AsyncSingleFlight, LeaderError
+
+
+def _no_redis():
+    raise ConnectionError("redis offline")
+
+
+def test_threads_share_one_call():
+    flight = SingleFlight(_no_redis)
+    calls = []
+    results = []
+
+    def slow_answer():
+        calls.append(1)
+        time.sleep(0.2)
+        return "answer"
+
+    threads = [
+        threading.Thread(target=lambda: results.append(flight.do("blog:q", None, slow_answer)))
+        for _ in range(5)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == ["answer"] * 5
+
+
+def test_leader_error_reaches_followers():
+    flight = SingleFlight(_no_redis)
+    errors = []
+
+    def failing():
+        time.sleep(0.2)
+        raise RuntimeError("LLM down")
+
+    def run():
+        try:
+            flight.do("blog:q", None, failing)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(errors) == 3
+    assert sum(isinstance(e, LeaderError) for e in errors) == 2
+    assert all("LLM down" in str(e) for e in errors)
+
+
+def test_async_tasks_share_one_call():
+    async def main():
+        flight = AsyncSingleFlight(_no_redis)
+        calls = []
+
+        async def slow_answer():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return "answer"
+
+        results = await asyncio.gather(*[flight.do("blog:q", None, slow_answer) for _ in range(10)])
+        assert len(calls) == 1
+        assert results == ["answer"] * 10
+
+    asyncio.run(main())
+
+
+if __name__ == "__main__":
+    test_threads_share_one_call()
+    test_leader_error_reaches_followers()
+    test_async_tasks_share_one_call()
+    print("✅ Single-flight checks passed")
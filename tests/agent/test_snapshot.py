@@ -0,0 +1,72 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "blog_agent_service"))
+
+from agents.rag.snapshot import SnapshotStore, export_snapshot
+
+
+class FakeQdrant:
+    """Single-page `scroll` over an in-memory point list."""
+
+    def __init__(self, points):
+        self.points = points
+        self.vector_fetches = []
+
+    def scroll(self, collection_name, limit, offset=None, scroll_filter=None, with_payload=True, with_vectors=False):
+        points = self.points
+        if scroll_filter is not None:
+            blog_id = scroll_filter.must[0].match.value
+            points = [p for p in points if p.payload["blog_id"] == blog_id]
+        if with_vectors:
+            self.vector_fetches.append(points[0].payload["blog_id"])
+        return points, None
+
+
+def _point(pid, blog_id, i, text, vector):
+    return SimpleNamespace(id=pid, vector=vector, payload={"blog_id": blog_id, "chunk_index": i, "text": text})
+
+
+def test_export_search_and_incremental_refresh():
+    client = FakeQdrant([
+        _point("1", "b1", 0, "x chunk", [1.0, 0.0]),
+        _point("2", "b1", 1, "y chunk", [0.0, 1.0]),
+        _point("3", "b2", 0, "other blog", [1.0, 0.0]),
+    ])
+    with tempfile.TemporaryDirectory() as path:
+        stats = export_snapshot(client, "c", path, dim=2)
+        assert stats["fetched"] == 2 and stats["points"] == 3
+
+        store = SnapshotStore(path)
+        assert store.search("b1", [0.2, 0.8], k=1) == ["y chunk"]
+        assert store.search("b2", [0.0, 1.0]) == ["other blog"]
+        assert store.search("missing", [1.0, 0.0]) == []
+        early = SnapshotStore(path)
+        assert early.available()
+
+        client.points[2] = _point("3", "b2", 0, "rewritten", [0.0, 1.0])
+        client.vector_fetches.clear()
+        stats = export_snapshot(client, "c", path, dim=2)
+        assert (stats["reused"], stats["fetched"]) == (1, 1)
+        assert client.vector_fetches == ["b2"]
+        assert SnapshotStore(path).search("b2", [0.0, 1.0]) == ["rewritten"]
+        assert SnapshotStore(path).search("b1", [1.0, 0.0], k=1) == ["x chunk"]
+        # A store that hasn't re-checked the manifest keeps reading its own generation
+        assert early.search("b2", [0.0, 1.0]) == ["other blog"]
+
+        export_snapshot(client, "c", path, dim=2)
+        assert len(os.listdir(path)) == 5  # manifest + current and previous generation
+
+
+def test_no_snapshot_means_no_answer():
+    with tempfile.TemporaryDirectory() as path:
+        assert SnapshotStore(path).search("b1", [1.0, 0.0]) is None
+
+
+if __name__ == "__main__":
+    test_export_search_and_incremental_refresh()
+    test_no_snapshot_means_no_answer()
+    print("✅ Snapshot checks passed")
@@ -0,0 +1,34 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "blog_agent_service"))
+
+from agents.rag.sparse import encode_document, encode_query, term_index, tokenize
+
+
+def test_identifiers_stay_whole_and_split_into_parts():
+    terms = tokenize("Set max_tokens in query_points for Qdrant v1.10.1 (see the re-rank step)")
+    assert "max_tokens" in terms and "query_points" in terms
+    assert "v1.10.1" in terms and "v1" in terms and "10" in terms
+    assert "re-rank" in terms and "rank" in terms
+    assert "the" not in terms and "in" not in terms
+
+
+def test_vectors_are_stable_sorted_and_bm25_saturated():
+    indices, values = encode_document("cache cache cache shard")
+    assert indices == sorted(indices) and len(indices) == 2
+    weights = dict(zip(indices, values))
+    # Repeats raise the weight, but by less than their count (k1 saturation)
+    assert weights[term_index("shard")] < weights[term_index("cache")] < 3 * weights[term_index("shard")]
+    # Longer chunks weigh each occurrence less (length normalisation)
+    long_indices, long_values = encode_document("shard " + "filler " * 300)
+    assert dict(zip(long_indices, long_values))[term_index("shard")] < weights[term_index("shard")]
+    # Query terms count once; no API, no corpus statistics
+    assert encode_query("shard shard cache") == (sorted([term_index("shard"), term_index("cache")]), [1.0, 1.0])
+    assert encode_document("  the of  ") == ([], [])
+
+
+if __name__ == "__main__":
+    test_identifiers_stay_whole_and_split_into_parts()
+    test_vectors_are_stable_sorted_and_bm25_saturated()
+    print("✅ BM25 sparse vector checks passed")